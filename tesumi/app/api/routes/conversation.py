@@ -4,14 +4,17 @@ Integrates memory activation with Claude API for contextual responses
 """
 
 from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
+import json
 import uuid
 import logging
 
 from app.core.database import get_db
 from app.models.memory import ConversationRequest, ConversationResponse
 from app.services.memory_manager import MemoryManager
+from app.services.inference_executor import ExecutorOverloadedError
 from app.services.claude_client import ClaudeClient
 
 router = APIRouter()
@@ -21,12 +24,13 @@ logger = logging.getLogger(__name__)
 @router.post("/chat", response_model=ConversationResponse)
 async def chat(
     request: ConversationRequest,
-    db: AsyncSession = Depends(get_db),
     app_request: Request = None
 ):
     """
     Main conversation endpoint
-    Activates memories and generates contextual response using Claude API
+    Activates memories and generates contextual response using Claude API;
+    the turn is committed before the response, and turned into a memory
+    in the background
     """
     try:
         # Get services from app state
@@ -37,19 +41,13 @@ async def chat(
         if not request.session_id:
             request.session_id = str(uuid.uuid4())
         
-        # Search for relevant memories
-        activated_memories = await memory_manager.search_memories(
-            db=db,
+        # Search for relevant memories and get conversation history, concurrently
+        activated_memories, conversation_context = await memory_manager.retrieve_chat_context(
             query=request.message,
-            limit=10,
-            min_activation=0.1
-        )
-        
-        # Get conversation history for context
-        conversation_context = await memory_manager.get_conversation_context(
-            db=db,
             session_id=request.session_id,
-            limit=5
+            memory_limit=10,
+            history_limit=5,
+            min_activation=0.1
         )
         
         # Generate response using Claude API
@@ -59,9 +57,8 @@ async def chat(
             conversation_history=conversation_context
         )
         
-        # Store conversation in database
-        await memory_manager.store_conversation(
-            db=db,
+        # Persist the turn (batched with concurrent requests)
+        await memory_manager.conversation_recorder.record(
             session_id=request.session_id,
             user_input=request.message,
             system_response=response_text,
@@ -74,11 +71,92 @@ async def chat(
             activated_memories=[m['id'] for m in activated_memories]
         )
         
+    except ExecutorOverloadedError:
+        raise HTTPException(status_code=503, detail="Server busy, please retry")
     except Exception as e:
         logger.error(f"Error in chat endpoint: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+def sse_event(event: str, data: dict) -> str:
+    """Format one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+@router.post("/chat/stream")
+async def chat_stream(
+    request: ConversationRequest,
+    app_request: Request = None
+):
+    """
+    Streaming conversation endpoint (server-sent events)
+    
+    Events: `memories` (session id and activated memory ids, sent first),
+    `token` (response text chunks), then `done`, or `error` if generation
+    fails (including when the turn cannot be stored). The turn is stored
+    once the stream completes, before `done`.
+    """
+    try:
+        memory_manager: MemoryManager = app_request.app.state.memory_manager
+        claude_client: ClaudeClient = app_request.app.state.claude_client
+        
+        if not request.session_id:
+            request.session_id = str(uuid.uuid4())
+        
+        activated_memories, conversation_context = await memory_manager.retrieve_chat_context(
+            query=request.message,
+            session_id=request.session_id,
+            memory_limit=10,
+            history_limit=5,
+            min_activation=0.1
+        )
+        
+    except ExecutorOverloadedError:
+        raise HTTPException(status_code=503, detail="Server busy, please retry")
+    except Exception as e:
+        logger.error(f"Error in chat stream endpoint: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+    
+    memory_ids = [m['id'] for m in activated_memories]
+    
+    async def events():
+        yield sse_event("memories", {"session_id": request.session_id, "activated_memories": memory_ids})
+        
+        chunks = []
+        try:
+            async for chunk in claude_client.stream_response(
+                user_message=request.message,
+                context_memories=activated_memories,
+                conversation_history=conversation_context
+            ):
+                chunks.append(chunk)
+                yield sse_event("token", {"text": chunk})
+        except Exception as e:
+            logger.error(f"Error streaming Claude response: {e}")
+            yield sse_event("error", {"detail": "応答の生成中にエラーが発生しました。"})
+            return
+        
+        # Persist the turn once the response is complete
+        try:
+            await memory_manager.conversation_recorder.record(
+                session_id=request.session_id,
+                user_input=request.message,
+                system_response="".join(chunks),
+                activated_memories=memory_ids
+            )
+        except Exception as e:
+            logger.error(f"Error storing streamed conversation: {e}")
+            yield sse_event("error", {"detail": "会話の保存中にエラーが発生しました。"})
+            return
+        yield sse_event("done", {"session_id": request.session_id})
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/sessions/{session_id}/history")
 async def get_conversation_history(
     session_id: str,
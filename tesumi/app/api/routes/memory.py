@@ -13,6 +13,9 @@ from app.models.memory import (
     MemoryNodeCreate, MemoryNodeResponse, MemoryEdgeCreate
 )
 from app.services.memory_manager import MemoryManager
+from app.services.inference_executor import ExecutorOverloadedError
+from app.services.bulk_ingest import IngestJobClaimedError, spool_upload, get_ingest_job
+from app.services.retention import get_retention_job
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -44,17 +47,59 @@ async def create_memory_node(
             category=memory_node.category,
             valence=memory_node.valence,
             arousal=memory_node.arousal,
+            emotion_pending=memory_node.emotion_pending,
             activation_strength=memory_node.activation_strength,
             access_count=memory_node.access_count,
             created_at=memory_node.created_at,
             last_accessed=memory_node.last_accessed
         )
         
+    except ExecutorOverloadedError:
+        raise HTTPException(status_code=503, detail="Server busy, please retry")
     except Exception as e:
         logger.error(f"Error creating memory node: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+@router.post("/nodes/bulk", status_code=202)
+async def bulk_create_memory_nodes(
+    job_id: Optional[str] = Query(None, description="Ingestion job to resume"),
+    app_request: Request = None
+):
+    """
+    Bulk-import memories from an NDJSON request body (one record per line:
+    content, optional memory_type, category, valence, arousal, created_at).
+    The upload is ingested in the background: poll GET /nodes/bulk/{job_id}
+    for progress. Re-send the same file with the returned job_id to resume
+    after a failure (409 while the job is still running).
+    """
+    try:
+        memory_manager: MemoryManager = app_request.app.state.memory_manager
+        
+        path = await spool_upload(app_request.stream())
+        return await memory_manager.bulk_ingestor.start(path, job_id=job_id)
+        
+    except IngestJobClaimedError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error in bulk memory ingestion: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.get("/nodes/bulk/{job_id}")
+async def get_bulk_ingestion_status(
+    job_id: str,
+    db: AsyncSession = Depends(get_db)
+):
+    """Progress of a bulk ingestion job"""
+    status = await get_ingest_job(db, job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Ingestion job not found")
+    return status
+
+
 @router.get("/search")
 async def search_memories(
     query: str = Query(..., description="Search query"),
@@ -82,30 +127,24 @@ async def search_memories(
             "total_results": len(memories)
         }
         
+    except ExecutorOverloadedError:
+        raise HTTPException(status_code=503, detail="Server busy, please retry")
     except Exception as e:
         logger.error(f"Error searching memories: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
 @router.get("/statistics")
-async def get_memory_statistics(
-    db: AsyncSession = Depends(get_db),
-    app_request: Request = None
-):
-    """Get memory system statistics"""
+async def get_memory_statistics(app_request: Request = None):
+    """Get memory system statistics (served from memory, see statistics_as_of)"""
     try:
         memory_manager: MemoryManager = app_request.app.state.memory_manager
-        gnn_processor = app_request.app.state.gnn_processor
         
-        # Get database statistics
-        db_stats = await memory_manager.get_memory_statistics(db)
-        
-        # Get GNN processor statistics
-        gnn_stats = gnn_processor.get_memory_statistics()
+        db_stats = await memory_manager.get_memory_statistics()
         
         return {
             "database_statistics": db_stats,
-            "gnn_statistics": gnn_stats,
+            "gnn_statistics": db_stats.get('gnn_statistics'),
             "status": "healthy"
         }
         
@@ -133,36 +172,62 @@ async def create_memory_edge(
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+@router.post("/edges/rebuild")
+async def rebuild_similarity_edges(
+    similarity_threshold: Optional[float] = Query(None, ge=0.0, le=1.0, description="Defaults to SIMILARITY_EDGE_THRESHOLD"),
+    max_connections: Optional[int] = Query(None, ge=1, le=100, description="Defaults to SIMILARITY_EDGE_MAX_CONNECTIONS"),
+    app_request: Request = None
+):
+    """Rebuild all similarity edges in the background (after changing the edge settings)"""
+    memory_manager: MemoryManager = app_request.app.state.memory_manager
+    return memory_manager.edge_worker.start_rebuild(similarity_threshold, max_connections)
+
+
+@router.get("/edges/rebuild")
+async def get_similarity_edge_rebuild_status(app_request: Request = None):
+    """Status of the last similarity edge rebuild"""
+    memory_manager: MemoryManager = app_request.app.state.memory_manager
+    return memory_manager.edge_worker.rebuild_status
+
+
 @router.post("/cleanup")
 async def cleanup_old_memories(
     days_threshold: int = Query(365, ge=30, description="Age threshold in days"),
     min_activation: float = Query(0.01, ge=0.0, le=1.0, description="Minimum activation threshold"),
-    db: AsyncSession = Depends(get_db),
     app_request: Request = None
 ):
-    """Clean up old and unused memories"""
+    """Start deleting old and unused memories in the background (chunked, resumable)"""
     try:
         memory_manager: MemoryManager = app_request.app.state.memory_manager
         
-        await memory_manager.cleanup_old_memories(
-            db=db,
+        return await memory_manager.cleanup_old_memories(
             days_threshold=days_threshold,
             min_activation=min_activation
         )
         
-        return {
-            "message": "Memory cleanup completed",
-            "parameters": {
-                "days_threshold": days_threshold,
-                "min_activation": min_activation
-            }
-        }
-        
     except Exception as e:
-        logger.error(f"Error cleaning up memories: {e}")
+        logger.error(f"Error starting memory cleanup: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+@router.get("/cleanup")
+async def get_latest_cleanup_status(db: AsyncSession = Depends(get_db)):
+    """Status of the most recent memory cleanup job"""
+    status = await get_retention_job(db)
+    if status is None:
+        raise HTTPException(status_code=404, detail="No cleanup job found")
+    return status
+
+
+@router.get("/cleanup/{job_id}")
+async def get_cleanup_status(job_id: str, db: AsyncSession = Depends(get_db)):
+    """Status of a memory cleanup job"""
+    status = await get_retention_job(db, job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Cleanup job not found")
+    return status
+
+
 @router.get("/nodes/{node_id}")
 async def get_memory_node(
     node_id: str,
@@ -11,6 +11,7 @@ import logging
 
 from app.core.database import get_db
 from app.services.memory_manager import MemoryManager
+from app.services.inference_executor import ExecutorOverloadedError
 from app.services.claude_client import ClaudeClient
 
 router = APIRouter()
@@ -103,6 +104,8 @@ async def generate_daily_report(
             "generated_at": datetime.utcnow().isoformat()
         }
         
+    except ExecutorOverloadedError:
+        raise HTTPException(status_code=503, detail="Server busy, please retry")
     except Exception as e:
         logger.error(f"Error generating daily report: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -130,7 +133,6 @@ async def get_report_history(
 @router.get("/analytics")
 async def get_report_analytics(
     days_back: int = Query(30, ge=7, le=365, description="Number of days to analyze"),
-    db: AsyncSession = Depends(get_db),
     app_request: Request = None
 ):
     """Get analytics from daily reports"""
@@ -138,7 +140,7 @@ async def get_report_analytics(
         memory_manager: MemoryManager = app_request.app.state.memory_manager
         
         # Get memory statistics for analytics
-        stats = await memory_manager.get_memory_statistics(db)
+        stats = await memory_manager.get_memory_statistics()
         
         # TODO: Implement proper analytics based on stored reports
         # For now, return basic memory statistics
@@ -149,6 +151,7 @@ async def get_report_analytics(
             "recent_memories": stats.get('recent_memories_24h', 0),
             "average_activation": stats.get('average_activation', 0),
             "memory_types": stats.get('memory_types', {}),
+            "statistics_as_of": stats.get('statistics_as_of'),
             "generated_at": datetime.utcnow().isoformat()
         }
         
@@ -30,6 +30,12 @@ class Settings(BaseSettings):
     
     # Vector database settings
     VECTOR_DIMENSION: int = 384  # Sentence-BERT embedding dimension
+    VECTOR_INDEX_TYPE: str = "hnsw"  # hnsw, ivfflat or none (rebuild with rebuild_vector_index.py)
+    VECTOR_HNSW_M: int = 16  # Graph degree
+    VECTOR_HNSW_EF_CONSTRUCTION: int = 64  # Build-time candidate list
+    VECTOR_HNSW_EF_SEARCH: int = 40  # Search-time candidate list (recall vs latency)
+    VECTOR_IVFFLAT_LISTS: Optional[int] = None  # Derived from the row count at rebuild when unset
+    VECTOR_IVFFLAT_PROBES: int = 10  # Lists scanned per query (recall vs latency)
     
     # Claude API
     CLAUDE_API_KEY: Optional[str] = None
@@ -41,13 +47,99 @@ class Settings(BaseSettings):
     MEMORY_DECAY_FACTOR: float = 0.95
     EMOTION_DIMENSION: int = 2  # Valence-Arousal
     
+    # Deferred emotion enrichment (nodes without scores are analyzed in the background)
+    EMOTION_BATCH_SIZE: int = 20  # Texts per Claude request
+    EMOTION_BATCH_MAX_WAIT: float = 2.0  # Seconds new nodes wait for their batch to fill
+    EMOTION_ENRICH_INTERVAL: float = 60.0  # Seconds between backlog passes (also the retry delay)
+    EMOTION_CACHE_SIZE: int = 10000  # Scores cached by content hash
+    EMOTION_CLAIM_LEASE: float = 300.0  # Seconds a claimed batch is reserved for its enricher (then retried)
+    EMOTION_LOCAL_CONFIDENCE: float = 0.6  # Local lexicon scores at or above this skip Claude
+    EMOTION_LOCAL_SHADOW_RATE: float = 0.0  # Fraction of confident texts also sent to Claude to measure disagreement
+    
+    # External memory ANN index (IVF)
+    EXTERNAL_MEMORY_ANN_LISTS: int = 64
+    EXTERNAL_MEMORY_ANN_PROBES: int = 8
+    EXTERNAL_MEMORY_ANN_MIN_TRAIN: int = 1024  # Exact scan below this size
+    EXTERNAL_MEMORY_ANN_RETRAIN_RATIO: float = 0.5  # Refit once added + replaced slots reach this fraction of the fitted size
+    EXTERNAL_MEMORY_ANN_TRAIN_INTERVAL: float = 10.0  # Seconds between background checks for a refit
+    
+    # External memory snapshots (np.memmap); disabled when no directory is set
+    EXTERNAL_MEMORY_DIR: Optional[str] = None
+    EXTERNAL_MEMORY_SNAPSHOT_INTERVAL: float = 300.0  # Seconds between snapshots
+    EXTERNAL_MEMORY_READ_ONLY: bool = False  # Never write snapshots (otherwise the process holding the directory's flock writes; other processes skip interaction writes)
+    
+    # Similarity edges
+    SIMILARITY_EDGE_THRESHOLD: float = 0.7  # Minimum cosine similarity
+    SIMILARITY_EDGE_MAX_CONNECTIONS: int = 5  # Edges per new node
+    SIMILARITY_EDGE_BATCH_SIZE: int = 256  # New nodes linked per background pass
+    SIMILARITY_EDGE_MAX_WAIT: float = 1.0  # Seconds a queued node waits for its batch to fill
+    
+    # Memory access counters (write-behind)
+    MEMORY_ACCESS_FLUSH_INTERVAL: float = 5.0  # Seconds between access counter flushes
+    MEMORY_ACCESS_FLUSH_BATCH: int = 1000  # Nodes per batched UPDATE
+    
+    # Memory statistics (rollup refreshed in the background)
+    MEMORY_STATS_REFRESH_INTERVAL: float = 30.0  # Seconds between rollup refreshes
+    MEMORY_STATS_MAX_STALENESS: float = 120.0  # Older statistics are flagged stale
+    
+    # Memory retention (cleanup) job
+    RETENTION_CHUNK_SIZE: int = 500  # Nodes deleted per transaction
+    RETENTION_CHUNK_PAUSE: float = 0.2  # Minimum seconds between chunks (at least the chunk's own duration)
+    RETENTION_CLAIM_LEASE: float = 300.0  # Seconds before another process takes over a job whose runner stopped renewing it
+    RETENTION_MAX_PASSES: int = 3  # Passes over the candidates; later ones sweep up rows skipped as locked or recently accessed
+    RETENTION_RESUME_INTERVAL: float = 60.0  # Seconds between checks for a job whose lease expired
+    
+    # Chat turn persistence (after the response is returned)
+    CONVERSATION_RECORD_BATCH_SIZE: int = 32  # Turns inserted per background pass
+    CONVERSATION_RECORD_MAX_WAIT: float = 0.01  # Seconds a turn waits for its insert batch to fill (adds to chat latency)
+    CONVERSATION_RECORD_MAX_ATTEMPTS: int = 5  # Insert attempts (exponential backoff) before the chat request fails
+    CONVERSATION_MEMORY_CLAIM_LEASE: float = 600.0  # Seconds pending turns are reserved for the process forming their memories
+    CONVERSATION_MEMORY_RECOVER_INTERVAL: float = 60.0  # Seconds between passes retrying released or expired turns
+    
+    # Recent turns per session kept in process (chat context, history endpoint)
+    CONVERSATION_CACHE_TURNS: int = 20  # Ring buffer size per session (0 disables the cache)
+    CONVERSATION_CACHE_SESSIONS: int = 10000  # Least recently used sessions are evicted beyond this
+    CONVERSATION_CACHE_TTL: float = 300.0  # Seconds before a session is reloaded (turns from other processes)
+    
+    # Bulk ingestion
+    BULK_INGEST_BATCH_SIZE: int = 500  # Records per encode / COPY / commit
+    BULK_INGEST_ENCODE_CHUNK: int = 64  # Texts per executor call, so online encodes interleave
+    BULK_INGEST_CLAIM_LEASE: float = 300.0  # Seconds before a resume may take over a job whose runner stopped renewing it
+    
+    # In-process memory graph replica (vector search + subgraphs without DB round-trips)
+    MEMORY_REPLICA_ENABLED: bool = False
+    MEMORY_REPLICA_RECONCILE_INTERVAL: float = 60.0  # Seconds between reconciliation passes
+    MEMORY_REPLICA_SUBGRAPH_HOPS: int = 0  # Neighbour hops added around the candidates
+    
     # GNN settings
     GNN_HIDDEN_DIM: int = 128
     GNN_NUM_LAYERS: int = 3
     GNN_DROPOUT: float = 0.1
+    GNN_STATE_CAPACITY: int = 10000  # Max GRU states kept in memory
+    GNN_STATE_FLUSH_INTERVAL: float = 30.0  # Seconds between gru_state write-behind passes
+    GNN_STATE_FLUSH_BATCH: int = 500
+    GNN_INFERENCE_VARIANT: str = "optimized"  # eager, optimized, compiled, int8
+    GNN_INCREMENTAL_INFERENCE: bool = False  # Cache per-layer node representations
+    GNN_INCREMENTAL_CACHE_SIZE: int = 10000  # Cached rows per layer
+    GNN_BATCHING_ENABLED: bool = True  # Micro-batch concurrent activations
+    GNN_BATCH_MAX_SIZE: int = 16
+    GNN_BATCH_MAX_WAIT_MS: float = 5.0
+    
+    # Inference executor (embedding + GNN work off the event loop)
+    INFERENCE_WORKERS: int = 2
+    INFERENCE_MAX_QUEUE_DEPTH: int = 64  # Requests beyond this get HTTP 503
+    INFERENCE_BACKGROUND_WORKERS: int = 1  # Separate pool for bulk ingestion and edge building
+    INFERENCE_BACKGROUND_MAX_QUEUE_DEPTH: int = 16  # Background calls beyond this wait and retry
+    TORCH_NUM_THREADS: Optional[int] = None  # Intra-op threads per worker process
     
     # Embedding model
     EMBEDDING_MODEL: str = "sentence-transformers/all-MiniLM-L6-v2"
+    EMBEDDING_BATCHING_ENABLED: bool = True  # Batch concurrent encode requests
+    EMBEDDING_BATCH_MAX_SIZE: int = 32
+    EMBEDDING_BATCH_MAX_WAIT_MS: float = 5.0
+    EMBEDDING_CACHE_SIZE: int = 10000  # In-process LRU entries
+    EMBEDDING_CACHE_PATH: Optional[str] = None  # SQLite store shared by workers; memory-only when unset
+    EMBEDDING_CACHE_DISK_MAX_ENTRIES: int = 1000000
     
     # Logging
     LOG_LEVEL: str = "INFO"
@@ -7,6 +7,7 @@ from sqlalchemy import text
 import logging
 
 from app.core.config import settings
+from app.core.vector_index import install_search_settings
 from app.models.memory import Base
 
 logger = logging.getLogger(__name__)
@@ -15,6 +16,69 @@ logger = logging.getLogger(__name__)
 engine = None
 SessionLocal = None
 
+# create_all does not alter existing tables; columns added since the first
+# release are applied here (idempotent)
+SCHEMA_UPGRADES = [
+    "ALTER TABLE memory_nodes ADD COLUMN IF NOT EXISTS emotion_pending boolean NOT NULL DEFAULT false",
+    "CREATE INDEX IF NOT EXISTS ix_memory_nodes_emotion_pending ON memory_nodes (created_at) WHERE emotion_pending",
+    "ALTER TABLE memory_nodes ADD COLUMN IF NOT EXISTS emotion_claimed_at timestamp",
+    "ALTER TABLE memory_nodes ADD COLUMN IF NOT EXISTS edges_pending boolean NOT NULL DEFAULT false",
+    "CREATE INDEX IF NOT EXISTS ix_memory_nodes_edges_pending ON memory_nodes (created_at) WHERE edges_pending",
+    "ALTER TABLE memory_nodes ADD COLUMN IF NOT EXISTS ingest_job_id varchar(100)",
+    "CREATE INDEX IF NOT EXISTS ix_memory_nodes_ingest_pending ON memory_nodes (ingest_job_id, id) WHERE edges_pending",
+    "ALTER TABLE memory_nodes ADD COLUMN IF NOT EXISTS updated_at timestamp",
+    "CREATE INDEX IF NOT EXISTS ix_memory_nodes_updated_at ON memory_nodes (updated_at)",
+    "ALTER TABLE conversation_history ADD COLUMN IF NOT EXISTS memory_pending boolean NOT NULL DEFAULT false",
+    "CREATE INDEX IF NOT EXISTS ix_conversation_memory_pending ON conversation_history (created_at) WHERE memory_pending",
+    "ALTER TABLE conversation_history ADD COLUMN IF NOT EXISTS memory_claimed_at timestamp",
+    "ALTER TABLE memory_retention_jobs ADD COLUMN IF NOT EXISTS claimed_at timestamp",
+    "ALTER TABLE memory_retention_jobs ADD COLUMN IF NOT EXISTS passes integer NOT NULL DEFAULT 0",
+    "ALTER TABLE memory_ingest_jobs ADD COLUMN IF NOT EXISTS claimed_at timestamp",
+    # Edge inserts rely on ON CONFLICT over this index; duplicates left by
+    # concurrent inserts before it existed are dropped once
+    """
+    DO $$
+    BEGIN
+        IF to_regclass('ix_memory_edges_pair') IS NULL THEN
+            DELETE FROM memory_edges a USING memory_edges b
+            WHERE a.source_id = b.source_id AND a.target_id = b.target_id
+            AND a.edge_type = b.edge_type AND a.ctid > b.ctid;
+            CREATE UNIQUE INDEX ix_memory_edges_pair ON memory_edges (source_id, target_id, edge_type);
+        END IF;
+    END $$
+    """,
+    """
+    CREATE UNIQUE INDEX IF NOT EXISTS ix_memory_retention_jobs_running
+    ON memory_retention_jobs ((status)) WHERE status = 'running'
+    """,
+    # Rollup behind /api/memory/statistics (refreshed by MemoryStatistics);
+    # rollups created before refreshed_at was added are rebuilt
+    """
+    DO $$
+    BEGIN
+        IF to_regclass('memory_stats_rollup') IS NOT NULL AND NOT EXISTS (
+            SELECT 1 FROM pg_attribute
+            WHERE attrelid = to_regclass('memory_stats_rollup') AND attname = 'refreshed_at'
+        ) THEN
+            DROP MATERIALIZED VIEW memory_stats_rollup;
+        END IF;
+    END $$
+    """,
+    """
+    CREATE MATERIALIZED VIEW IF NOT EXISTS memory_stats_rollup AS
+    SELECT coalesce(memory_type, 'unknown') AS memory_type,
+           count(*) AS memories,
+           count(*) FILTER (
+               WHERE created_at >= (now() AT TIME ZONE 'utc') - interval '24 hours'
+           ) AS recent_24h,
+           coalesce(sum(activation_strength), 0) AS activation_sum,
+           now() AT TIME ZONE 'utc' AS refreshed_at
+    FROM memory_nodes
+    GROUP BY 1
+    """,
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_memory_stats_rollup_type ON memory_stats_rollup (memory_type)",
+]
+
 
 async def init_db():
     """Initialize database connection and create tables"""
@@ -30,6 +94,9 @@ async def init_db():
         pool_recycle=3600,
     )
     
+    # hnsw.ef_search / ivfflat.probes for every pooled connection
+    install_search_settings(engine)
+    
     # Create session factory
     SessionLocal = async_sessionmaker(
         engine,
@@ -48,6 +115,8 @@ async def init_db():
         
         # Create all tables
         await conn.run_sync(Base.metadata.create_all)
+        for statement in SCHEMA_UPGRADES:
+            await conn.execute(text(statement))
         logger.info("Database tables created")
 
 
@@ -0,0 +1,171 @@
+"""
+pgvector ANN index on memory_nodes.embedding
+Index type and build parameters come from Settings; the search-time knob
+(hnsw.ef_search / ivfflat.probes) is set on every pooled connection
+"""
+
+import logging
+import math
+import time
+from typing import Dict, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+VECTOR_INDEX_NAME = "ix_memory_nodes_embedding"
+VECTOR_INDEX_TYPES = ("hnsw", "ivfflat", "none")
+
+# Searches order by `<=>`, which only a cosine-operator-class index serves
+VECTOR_INDEX_OPCLASS = "vector_cosine_ops"
+
+
+def index_parameters(index_type: str, rows: int = 0, lists: Optional[int] = None) -> Dict[str, int]:
+    """
+    Build parameters (WITH options) of the embedding index
+
+    IVFFlat lists default to the pgvector guideline: rows / 1000 up to
+    1M rows, sqrt(rows) beyond.
+    """
+    if index_type == "hnsw":
+        return {'m': settings.VECTOR_HNSW_M, 'ef_construction': settings.VECTOR_HNSW_EF_CONSTRUCTION}
+    if index_type == "ivfflat":
+        lists = lists or settings.VECTOR_IVFFLAT_LISTS
+        if not lists:
+            lists = rows // 1000 if rows <= 1_000_000 else int(math.sqrt(rows))
+        return {'lists': max(lists, 1)}
+    raise ValueError(f"Unknown vector index type: {index_type}")
+
+
+def create_index_sql(
+    name: str,
+    index_type: str,
+    parameters: Dict[str, int],
+    table: str = "memory_nodes",
+    concurrently: bool = False
+) -> str:
+    options = ", ".join(f"{key} = {int(value)}" for key, value in parameters.items())
+    return (
+        f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}{name} ON {table} "
+        f"USING {index_type} (embedding {VECTOR_INDEX_OPCLASS}) WITH ({options})"
+    )
+
+
+def search_settings_sql(index_type: Optional[str] = None) -> Optional[str]:
+    """SET statement for the search-time recall/latency knob of the index type"""
+    index_type = index_type or settings.VECTOR_INDEX_TYPE
+    if index_type == "hnsw":
+        return f"SET hnsw.ef_search = {int(settings.VECTOR_HNSW_EF_SEARCH)}"
+    if index_type == "ivfflat":
+        return f"SET ivfflat.probes = {int(settings.VECTOR_IVFFLAT_PROBES)}"
+    return None
+
+
+def required_ef_search(limit: int) -> Optional[int]:
+    """
+    An HNSW scan returns at most ef_search rows; a query for more
+    candidates than that needs a larger value for its transaction
+    """
+    if settings.VECTOR_INDEX_TYPE == "hnsw" and limit > settings.VECTOR_HNSW_EF_SEARCH:
+        return int(limit)
+    return None
+
+
+def install_search_settings(engine: AsyncEngine):
+    """Apply the configured ef_search / probes to every new pooled connection"""
+    statement = search_settings_sql()
+    if statement is None:
+        return
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _apply_search_settings(dbapi_connection, connection_record):
+        # Outside a transaction: the asyncpg adapter would otherwise open one
+        # and the pool's reset-on-return rollback would undo the SET
+        autocommit = dbapi_connection.autocommit
+        dbapi_connection.autocommit = True
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute(statement)
+        finally:
+            cursor.close()
+            dbapi_connection.autocommit = autocommit
+
+
+async def rebuild_vector_index(
+    engine: AsyncEngine,
+    index_type: Optional[str] = None,
+    lists: Optional[int] = None
+) -> Dict:
+    """
+    Rebuild the embedding index without blocking writes
+
+    Builds a new index with CREATE INDEX CONCURRENTLY, then swaps it in
+    place of the old one (DROP INDEX CONCURRENTLY + rename). Meant to be
+    run once the table has grown (IVFFlat centroids are trained on the rows
+    present at build time) or after the index settings change.
+
+    Args:
+        engine: Database engine
+        index_type: hnsw or ivfflat (default: VECTOR_INDEX_TYPE)
+        lists: IVFFlat lists (default: VECTOR_IVFFLAT_LISTS, else derived from the row count)
+
+    Returns:
+        Index type, parameters, row count and build time
+    """
+    index_type = index_type or settings.VECTOR_INDEX_TYPE
+    if index_type not in ("hnsw", "ivfflat"):
+        raise ValueError(f"Cannot build a vector index of type {index_type!r}")
+
+    new_name = f"{VECTOR_INDEX_NAME}_new"
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        rows = await conn.scalar(text("SELECT count(*) FROM memory_nodes"))
+        parameters = index_parameters(index_type, rows, lists)
+
+        # Leftover of an interrupted rebuild (an invalid index)
+        await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {new_name}"))
+
+        logger.info(f"Building {index_type} index over {rows} memory nodes ({parameters})")
+        started = time.perf_counter()
+        await conn.execute(text(create_index_sql(new_name, index_type, parameters, concurrently=True)))
+        build_seconds = time.perf_counter() - started
+
+        await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {VECTOR_INDEX_NAME}"))
+        await conn.execute(text(f"ALTER INDEX {new_name} RENAME TO {VECTOR_INDEX_NAME}"))
+
+    logger.info(f"Rebuilt {VECTOR_INDEX_NAME} in {build_seconds:.1f}s")
+    return {
+        'index': VECTOR_INDEX_NAME,
+        'index_type': index_type,
+        'parameters': parameters,
+        'rows': rows,
+        'build_seconds': build_seconds
+    }
+
+
+async def vector_index_status(engine: AsyncEngine) -> Dict:
+    """Definition and size of the current embedding index"""
+    async with engine.connect() as conn:
+        rows = await conn.scalar(text("SELECT count(*) FROM memory_nodes"))
+        index = (await conn.execute(
+            text("""
+                SELECT i.indexdef, pg_relation_size(c.oid), x.indisvalid
+                FROM pg_indexes i
+                JOIN pg_class c ON c.relname = i.indexname
+                JOIN pg_index x ON x.indexrelid = c.oid
+                WHERE i.tablename = 'memory_nodes' AND i.indexname = :name
+            """),
+            {"name": VECTOR_INDEX_NAME}
+        )).first()
+
+    return {
+        'rows': rows,
+        'definition': index[0] if index else None,
+        'size_bytes': index[1] if index else 0,
+        'valid': index[2] if index else False,
+        'configured_type': settings.VECTOR_INDEX_TYPE,
+        'search_settings': search_settings_sql()
+    }
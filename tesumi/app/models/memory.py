@@ -3,7 +3,7 @@ Database models for memory system
 Memory nodes with embeddings, emotions (Valence-Arousal), and timestamps
 """
 
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, ForeignKey, Index
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Text, ForeignKey, Index, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID, ARRAY
@@ -14,10 +14,30 @@ from typing import List, Optional
 from pydantic import BaseModel
 
 from app.core.config import settings
+from app.core.vector_index import VECTOR_INDEX_NAME, VECTOR_INDEX_OPCLASS, index_parameters
 
 Base = declarative_base()
 
 
+def embedding_indexes() -> tuple:
+    """
+    ANN index created with the table. HNSW builds fine on an empty table;
+    IVFFlat trains its lists on existing rows, so it is left to the
+    rebuild command (rebuild_vector_index.py) once the table has data.
+    """
+    if settings.VECTOR_INDEX_TYPE != "hnsw":
+        return ()
+    return (
+        Index(
+            VECTOR_INDEX_NAME,
+            "embedding",
+            postgresql_using="hnsw",
+            postgresql_with=index_parameters("hnsw"),
+            postgresql_ops={"embedding": VECTOR_INDEX_OPCLASS}
+        ),
+    )
+
+
 class MemoryNode(Base):
     """
     Memory node with embedding + emotions (Valence-Arousal) + timestamp
@@ -34,10 +54,15 @@ class MemoryNode(Base):
     # Emotion coordinates (Valence-Arousal model)
     valence = Column(Float, nullable=False, default=0.0)  # -1 to 1 (negative to positive)
     arousal = Column(Float, nullable=False, default=0.0)  # -1 to 1 (calm to excited)
+    emotion_pending = Column(Boolean, nullable=False, default=False, server_default=text("false"))  # Scores not analyzed yet
+    emotion_claimed_at = Column(DateTime, nullable=True)  # Lease of the enricher scoring this node
+    edges_pending = Column(Boolean, nullable=False, default=False, server_default=text("false"))  # Similarity edges not built yet
+    ingest_job_id = Column(String(100), nullable=True)  # Bulk ingestion job that stored the node
     
     # Time information
     created_at = Column(DateTime, default=datetime.utcnow)
     last_accessed = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # Replica reconciliation watermark
     
     # Memory strength and activation
     activation_strength = Column(Float, default=1.0)  # 0 to 1
@@ -56,11 +81,15 @@ class MemoryNode(Base):
     
     # Indexes for efficient querying
     __table_args__ = (
-        Index("ix_memory_nodes_embedding", "embedding", postgresql_using="ivfflat"),
+        *embedding_indexes(),
         Index("ix_memory_nodes_valence", "valence"),
         Index("ix_memory_nodes_arousal", "arousal"),
         Index("ix_memory_nodes_created_at", "created_at"),
         Index("ix_memory_nodes_activation", "activation_strength"),
+        Index("ix_memory_nodes_updated_at", "updated_at"),
+        Index("ix_memory_nodes_emotion_pending", "created_at", postgresql_where=text("emotion_pending")),
+        Index("ix_memory_nodes_edges_pending", "created_at", postgresql_where=text("edges_pending")),
+        Index("ix_memory_nodes_ingest_pending", "ingest_job_id", "id", postgresql_where=text("edges_pending")),
     )
 
 
@@ -94,6 +123,7 @@ class MemoryEdge(Base):
         Index("ix_memory_edges_target", "target_id"),
         Index("ix_memory_edges_type", "edge_type"),
         Index("ix_memory_edges_weight", "weight"),
+        Index("ix_memory_edges_pair", "source_id", "target_id", "edge_type", unique=True),
     )
 
 
@@ -112,12 +142,17 @@ class ConversationHistory(Base):
     # Associated memory nodes
     activated_memories = Column(ARRAY(String), nullable=True)  # UUIDs as strings
     
+    # Conversation memory formation not run yet (background recorder)
+    memory_pending = Column(Boolean, nullable=False, default=False, server_default=text("false"))
+    memory_claimed_at = Column(DateTime, nullable=True)  # Lease of the process forming the memory
+    
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Indexes
     __table_args__ = (
         Index("ix_conversation_session", "session_id"),
         Index("ix_conversation_created", "created_at"),
+        Index("ix_conversation_memory_pending", "created_at", postgresql_where=text("memory_pending")),
     )
 
 
@@ -143,6 +178,65 @@ class DailyReport(Base):
     )
 
 
+class IngestJob(Base):
+    """
+    Progress checkpoint of a bulk memory ingestion job
+    """
+    __tablename__ = "memory_ingest_jobs"
+    
+    id = Column(String(100), primary_key=True)
+    status = Column(String(20), nullable=False, default="running")  # running, linking, completed, failed
+    
+    # Checkpoint: NDJSON lines whose nodes are committed (edges follow in the linking pass)
+    lines_done = Column(Integer, nullable=False, default=0)
+    nodes_inserted = Column(Integer, nullable=False, default=0)
+    edges_inserted = Column(Integer, nullable=False, default=0)
+    failed_lines = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+    
+    # Lease of the process running the job, renewed with every batch
+    claimed_at = Column(DateTime, nullable=True)
+    
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+
+class RetentionJob(Base):
+    """
+    Progress checkpoint of a memory retention (cleanup) job
+    """
+    __tablename__ = "memory_retention_jobs"
+    
+    id = Column(String(100), primary_key=True)
+    status = Column(String(20), nullable=False, default="running")  # running, completed, failed
+    
+    # Criteria, fixed when the job starts so a resumed job deletes the same set
+    cutoff = Column(DateTime, nullable=False)
+    min_activation = Column(Float, nullable=False)
+    
+    # Checkpoint: last node id (keyset order) of the last committed chunk,
+    # and the number of finished passes (later passes sweep up skipped rows)
+    last_id = Column(UUID(as_uuid=True), nullable=True)
+    passes = Column(Integer, nullable=False, default=0)
+    nodes_deleted = Column(Integer, nullable=False, default=0)
+    edges_deleted = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+    
+    # Lease of the process running the job, renewed with every chunk
+    claimed_at = Column(DateTime, nullable=True)
+    
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+    
+    # At most one running job across all processes
+    __table_args__ = (
+        Index(
+            "ix_memory_retention_jobs_running", text("(status)"),
+            unique=True, postgresql_where=text("status = 'running'")
+        ),
+    )
+
+
 # Pydantic models for API
 class MemoryNodeCreate(BaseModel):
     content: str
@@ -159,6 +253,7 @@ class MemoryNodeResponse(BaseModel):
     category: Optional[str]
     valence: float
     arousal: float
+    emotion_pending: bool = False  # Scores are filled in by the background enricher
     activation_strength: float
     access_count: int
     created_at: datetime
@@ -0,0 +1,163 @@
+"""
+Activation Batcher
+Collects concurrent memory activation requests for a few milliseconds and
+runs them through GNNProcessor as one batched forward pass
+"""
+
+import asyncio
+import logging
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.gnn_processor import GNNProcessor
+from app.services.inference_executor import ExecutorOverloadedError, InferenceExecutor
+
+logger = logging.getLogger(__name__)
+
+# Queued by stop() behind the last request: the worker dispatches its batch and exits
+_STOP = object()
+
+
+class ActivationBatcher:
+    """
+    Dynamic micro-batching layer in front of GNNProcessor.activate_memories_batch
+    A batch is dispatched when it reaches `max_batch_size` requests or when
+    `max_wait_ms` has passed since its first request arrived.
+    """
+
+    def __init__(
+        self,
+        gnn_processor: GNNProcessor,
+        executor: InferenceExecutor,
+        max_batch_size: int = 16,
+        max_wait_ms: float = 5.0
+    ):
+        self.gnn_processor = gnn_processor
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+        # Metrics
+        self._batches = 0
+        self._requests = 0
+        self._batch_sizes = Counter()
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and not self._worker.done()
+
+    def start(self):
+        """Start the batching worker on the running event loop"""
+        if not self.running:
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the worker; queued requests are still answered"""
+        if self._worker is None:
+            return
+
+        # Not cancelled: the batch being collected is already off the queue
+        self._queue.put_nowait(_STOP)
+        await self._worker
+        self._worker = None
+
+        pending = []
+        while not self._queue.empty():
+            request = self._queue.get_nowait()
+            if request is not _STOP:
+                pending.append(request)
+        if pending:
+            await self._dispatch(pending)
+
+    async def activate(
+        self,
+        memory_nodes: List[Dict],
+        memory_edges: List[Dict],
+        query_embedding: np.ndarray,
+        top_k: int = 10
+    ) -> List[Dict]:
+        """Queue one activation request and wait for its batched result"""
+        if not self.running:
+            return await self.executor.run(
+                "gnn_forward",
+                self.gnn_processor.activate_memories,
+                memory_nodes, memory_edges, query_embedding, top_k
+            )
+
+        if self._queue.qsize() >= self.executor.max_queue_depth:
+            raise ExecutorOverloadedError(
+                f"Activation queue full ({self._queue.qsize()}/{self.executor.max_queue_depth})"
+            )
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(((memory_nodes, memory_edges, query_embedding, top_k), future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            request = await self._queue.get()
+            if request is _STOP:
+                break
+            batch = [request]
+            deadline = loop.time() + self.max_wait
+
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    request = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if request is _STOP:
+                    stopping = True
+                    break
+                batch.append(request)
+
+            await self._dispatch(batch)
+
+    async def _dispatch(self, batch: List[Tuple[Tuple, asyncio.Future]]):
+        """Run one batched forward pass and resolve the waiting futures"""
+        self._batches += 1
+        self._requests += len(batch)
+        self._batch_sizes[len(batch)] += 1
+
+        try:
+            results = await self.executor.run(
+                "gnn_forward",
+                self.gnn_processor.activate_memories_batch,
+                [request for request, _ in batch]
+            )
+        except ExecutorOverloadedError as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        except Exception as e:
+            logger.error(f"Error in batched memory activation: {e}")
+            results = [[] for _ in batch]
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def get_metrics(self) -> Dict:
+        """Batch fill statistics"""
+        average_size = self._requests / self._batches if self._batches else 0.0
+        return {
+            'batches': self._batches,
+            'requests': self._requests,
+            'average_batch_size': average_size,
+            'average_batch_fill': average_size / self.max_batch_size,
+            'batch_size_histogram': dict(sorted(self._batch_sizes.items())),
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000.0
+        }
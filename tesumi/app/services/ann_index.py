@@ -0,0 +1,267 @@
+"""
+Approximate nearest-neighbour index for external memory
+Pure NumPy IVF (inverted file) index over slot-addressed, pre-normalized vectors
+"""
+
+import logging
+from typing import List, Optional, Set, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize vectors along the last axis"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / (norms + 1e-8)
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first, via argpartition"""
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < scores.shape[0]:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(scores.shape[0])
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+class IVFIndex:
+    """
+    Inverted-file index for cosine similarity search
+    Vectors are stored normalized in fixed slots so ExternalMemory can insert
+    or replace a slot in place. Each slot is assigned to its nearest centroid
+    and kept in that list's posting array; a query only scores the slots of
+    its `n_probe` nearest lists. Until enough vectors exist to train
+    centroids, search falls back to an exact scan.
+
+    Training is not done by `set`: the owner polls `needs_training` and runs
+    `prepare_training` / `fit` / `install`, so k-means can run off its lock.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        dim: int,
+        n_lists: int = 64,
+        n_probe: int = 8,
+        min_train_size: int = 1024,
+        retrain_ratio: float = 1.0,
+        kmeans_iterations: int = 10,
+        seed: int = 0
+    ):
+        self.capacity = capacity
+        self.dim = dim
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.min_train_size = max(min_train_size, n_lists)
+        self.retrain_ratio = retrain_ratio
+        self.kmeans_iterations = kmeans_iterations
+
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self.assignments = np.full(capacity, -1, dtype=np.int32)
+        self.size = 0
+
+        self.centroids: Optional[np.ndarray] = None
+        self._trained_size = 0
+        # Slots replaced since the last fit (evictions once capacity is reached)
+        self.replacements = 0
+        self._rng = np.random.default_rng(seed)
+
+        # Posting arrays: list i holds _lists[i][:_list_sizes[i]];
+        # _positions[slot] is the slot's index inside its list
+        self._lists: List[np.ndarray] = []
+        self._list_sizes = np.zeros(0, dtype=np.int64)
+        self._positions = np.full(capacity, -1, dtype=np.int64)
+
+        # Slots written while a fit runs on a copy (reassigned on install)
+        self._changed: Optional[Set[int]] = None
+        self._prepared_replacements = 0
+
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+
+    @property
+    def needs_training(self) -> bool:
+        """Whether enough slots were added or replaced since the last fit"""
+        if self.size < self.min_train_size:
+            return False
+        if not self.is_trained:
+            return True
+        changes = (self.size - self._trained_size) + self.replacements
+        return changes >= self.retrain_ratio * self._trained_size
+
+    def set(self, slot: int, vector: np.ndarray):
+        """Insert or replace the vector stored in a slot"""
+        if slot < self.size:
+            self.replacements += 1
+        self.vectors[slot] = normalize(vector)
+        self.size = max(self.size, slot + 1)
+
+        if self.is_trained:
+            self._unlink(slot)
+            self.assignments[slot] = self._assign(self.vectors[slot:slot + 1])[0]
+            self._link(slot, self.assignments[slot])
+        if self._changed is not None:
+            self._changed.add(slot)
+
+    def train(self):
+        """Fit centroids with k-means over current vectors and reassign all slots"""
+        self.install(*self.fit(self.prepare_training()))
+
+    def prepare_training(self) -> np.ndarray:
+        """Copy the current vectors for `fit` and start tracking later writes"""
+        self._changed = set()
+        self._prepared_replacements = self.replacements
+        return np.array(self.vectors[:self.size])
+
+    def fit(self, data: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Run k-means over a copy from `prepare_training` (touches no index state
+        except the RNG, so it can run without the owner's lock)
+
+        Returns:
+            centroids: Fitted centroids
+            assignments: List of each copied vector
+        """
+        size = data.shape[0]
+        n_lists = min(self.n_lists, size)
+
+        centroids = data[self._rng.choice(size, n_lists, replace=False)].copy()
+        for _ in range(self.kmeans_iterations):
+            labels = np.argmax(data @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, data)
+            counts = np.bincount(labels, minlength=n_lists)
+            nonempty = counts > 0
+            centroids[nonempty] = normalize(sums[nonempty])
+
+        return centroids, np.argmax(data @ centroids.T, axis=1).astype(np.int32)
+
+    def install(self, centroids: np.ndarray, assignments: np.ndarray) -> bool:
+        """
+        Switch to fitted centroids; slots written since the copy are reassigned
+
+        Returns:
+            False if the fit was discarded because the index was re-attached
+        """
+        if self._changed is None:
+            return False
+        fitted = assignments.shape[0]
+        self.centroids = centroids
+        self.assignments[:fitted] = assignments
+
+        changed = [slot for slot in (self._changed or ()) if slot < self.size]
+        changed.extend(range(fitted, self.size))
+        if changed:
+            changed = np.unique(np.asarray(changed, dtype=np.int64))
+            self.assignments[changed] = self._assign(self.vectors[changed])
+
+        self._trained_size = self.size
+        self.replacements = max(self.replacements - self._prepared_replacements, 0)
+        self._changed = None
+        self.rebuild_lists()
+        logger.info(f"Trained IVF index with {centroids.shape[0]} lists over {fitted} vectors")
+        return True
+
+    def attach(
+        self,
+        vectors: np.ndarray,
+        assignments: np.ndarray,
+        centroids: Optional[np.ndarray],
+        size: int,
+        trained_size: int,
+        replacements: int = 0
+    ):
+        """Take over restored arrays (a fit in progress is discarded)"""
+        self.vectors = vectors
+        self.assignments = assignments
+        self.centroids = centroids
+        self.size = size
+        self._trained_size = trained_size
+        self.replacements = replacements
+        self._changed = None
+        self.rebuild_lists()
+
+    def rebuild_lists(self):
+        """Rebuild the posting arrays from `assignments` (after training or a restore)"""
+        if not self.is_trained:
+            self._lists = []
+            self._list_sizes = np.zeros(0, dtype=np.int64)
+            return
+
+        n_lists = self.centroids.shape[0]
+        assignments = np.asarray(self.assignments[:self.size], dtype=np.int64)
+        order = np.argsort(assignments, kind="stable")
+        counts = np.bincount(assignments, minlength=n_lists)
+        bounds = np.concatenate(([0], np.cumsum(counts)))
+
+        self._lists = [order[bounds[i]:bounds[i + 1]].copy() for i in range(n_lists)]
+        self._list_sizes = counts.astype(np.int64)
+        self._positions[:] = -1
+        self._positions[order] = np.arange(self.size) - bounds[assignments[order]]
+
+    def _link(self, slot: int, list_id: int):
+        members = self._lists[list_id]
+        count = self._list_sizes[list_id]
+        if count == members.shape[0]:
+            grown = np.empty(max(2 * count, 16), dtype=np.int64)
+            grown[:count] = members
+            members = self._lists[list_id] = grown
+        members[count] = slot
+        self._positions[slot] = count
+        self._list_sizes[list_id] = count + 1
+
+    def _unlink(self, slot: int):
+        """Swap-remove a slot from its posting array"""
+        position = self._positions[slot]
+        if position < 0:
+            return
+        list_id = self.assignments[slot]
+        members = self._lists[list_id]
+        last = self._list_sizes[list_id] - 1
+        moved = members[last]
+        members[position] = moved
+        self._positions[moved] = position
+        self._list_sizes[list_id] = last
+        self._positions[slot] = -1
+
+    def _assign(self, vectors: np.ndarray) -> np.ndarray:
+        return np.argmax(vectors @ self.centroids.T, axis=1).astype(np.int32)
+
+    def search(self, query: np.ndarray, k: int = 5) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the k most similar slots to a query
+
+        Args:
+            query: Query vector
+            k: Number of nearest neighbours
+
+        Returns:
+            slots: Slot indices, most similar first
+            similarities: Cosine similarity for each slot
+        """
+        if self.size == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        query = normalize(query)
+
+        if not self.is_trained:
+            scores = self.vectors[:self.size] @ query
+            best = top_k(scores, k)
+            return best, scores[best]
+
+        n_probe = min(self.n_probe, self.centroids.shape[0])
+        probes = top_k(self.centroids @ query, n_probe)
+        candidates = np.concatenate([self._lists[p][:self._list_sizes[p]] for p in probes])
+        if candidates.size < k:
+            candidates = np.arange(self.size)
+
+        scores = self.vectors[candidates] @ query
+        best = top_k(scores, k)
+        return candidates[best], scores[best]
@@ -0,0 +1,568 @@
+"""
+Bulk Memory Ingestion
+Imports NDJSON memory records in batches: one batched encode, a COPY into a
+staging table and a set-based node insert per batch, committed together
+with the job checkpoint so an interrupted job resumes where it stopped.
+Similarity edges are built afterwards in set-based chunks over the job's
+nodes still stored with edges_pending, so early records also link to
+later ones.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import database
+from app.core.config import settings
+from app.models.memory import IngestJob
+from app.services.embedding_service import EmbeddingService
+from app.services.inference_executor import ExecutorOverloadedError, InferenceExecutor
+from app.services.similarity_edges import CLEAR_EDGES_PENDING_SQL, insert_similarity_edges
+
+logger = logging.getLogger(__name__)
+
+# Node ids are derived from (job id, line number) so a resumed batch
+# re-inserts nothing it already committed
+INGEST_NAMESPACE = uuid.UUID("6f1c9a52-5d0e-4b7a-9a43-2f8e1d3c7b10")
+
+STAGING_COLUMNS = (
+    'id', 'content', 'memory_type', 'category', 'valence', 'arousal', 'emotion_pending',
+    'created_at', 'embedding'
+)
+
+CREATE_STAGING_SQL = text("""
+    CREATE TEMP TABLE IF NOT EXISTS memory_ingest_staging (
+        id uuid,
+        content text,
+        memory_type varchar(50),
+        category varchar(100),
+        valence float8,
+        arousal float8,
+        emotion_pending boolean,
+        created_at timestamp,
+        embedding float4[]
+    ) ON COMMIT DELETE ROWS
+""")
+
+INSERT_FROM_STAGING_SQL = text("""
+    INSERT INTO memory_nodes (
+        id, content, memory_type, category, valence, arousal, emotion_pending, edges_pending,
+        ingest_job_id, embedding, activation_strength, access_count, created_at, last_accessed,
+        updated_at
+    )
+    SELECT id, content, memory_type, category, valence, arousal, emotion_pending, true,
+           :job_id, embedding::vector, 1.0, 0, created_at, created_at, (now() AT TIME ZONE 'utc')
+    FROM memory_ingest_staging
+    ON CONFLICT (id) DO NOTHING
+    RETURNING id
+""")
+
+# Only the job's own nodes: other pending nodes belong to the
+# SimilarityEdgeWorker or to other jobs. Rows it has locked (it clears the
+# flag first) are left to it, so no node is linked twice concurrently
+PENDING_EDGES_CHUNK_SQL = text("""
+    SELECT id FROM memory_nodes
+    WHERE edges_pending
+    AND ingest_job_id = :job_id
+    AND (CAST(:after AS uuid) IS NULL OR id > :after)
+    ORDER BY id
+    LIMIT :limit
+    FOR UPDATE SKIP LOCKED
+""")
+
+# Resuming claims the job with a lease like RetentionRunner: a job whose
+# runner is alive (renewing the lease with every batch) is not reopened, so
+# two resumes of one job_id never run against the same checkpoint
+CLAIM_JOB_SQL = text("""
+    UPDATE memory_ingest_jobs
+    SET status = 'running', error = NULL, claimed_at = :now, updated_at = :now
+    WHERE id = :job_id
+    AND status <> 'completed'
+    AND (status NOT IN ('running', 'linking') OR claimed_at IS NULL OR claimed_at < :lease_expired)
+    RETURNING lines_done
+""")
+
+# Pause between encode attempts while the (background) executor is saturated
+OVERLOAD_RETRY_DELAY = 1.0
+OVERLOAD_MAX_ATTEMPTS = 30
+
+# Bytes of whole lines read from an NDJSON file per worker-thread call
+READ_CHUNK_SIZE = 1 << 20
+
+
+class IngestRecordError(ValueError):
+    """A line that is not a valid memory record"""
+
+
+class IngestJobClaimedError(RuntimeError):
+    """The job is run by another request or process (or this runner lost its lease)"""
+
+
+def parse_record(line: str, job_id: str, line_number: int) -> Dict:
+    """
+    Parse one NDJSON line into a memory record
+
+    Required: content. Optional: id, memory_type, category, valence,
+    arousal, created_at (ISO 8601). Records without emotion scores are
+    marked emotion_pending for the background enricher.
+    """
+    try:
+        data = json.loads(line)
+    except json.JSONDecodeError as e:
+        raise IngestRecordError(f"line {line_number}: invalid JSON ({e})")
+
+    content = data.get('content') if isinstance(data, dict) else None
+    if not isinstance(content, str) or not content.strip():
+        raise IngestRecordError(f"line {line_number}: missing content")
+
+    try:
+        node_id = uuid.UUID(str(data['id'])) if data.get('id') else uuid.uuid5(
+            INGEST_NAMESPACE, f"{job_id}:{line_number}"
+        )
+        created_at = datetime.fromisoformat(data['created_at']) if data.get('created_at') else datetime.utcnow()
+        if created_at.tzinfo is not None:
+            created_at = created_at.astimezone(timezone.utc).replace(tzinfo=None)
+        valence = max(-1.0, min(1.0, float(data.get('valence') or 0.0)))
+        arousal = max(-1.0, min(1.0, float(data.get('arousal') or 0.0)))
+        return {
+            'id': node_id,
+            'content': content,
+            'memory_type': data.get('memory_type') or "episodic",
+            'category': data.get('category'),
+            'valence': valence,
+            'arousal': arousal,
+            'emotion_pending': valence == 0.0 and arousal == 0.0,
+            'created_at': created_at
+        }
+    except (TypeError, ValueError) as e:
+        raise IngestRecordError(f"line {line_number}: {e}")
+
+
+async def read_ndjson_file(path: str) -> AsyncIterator[str]:
+    """Lines of an NDJSON file, read in chunks off the event loop"""
+    f = await asyncio.to_thread(open, path, encoding="utf-8")
+    try:
+        while True:
+            lines = await asyncio.to_thread(f.readlines, READ_CHUNK_SIZE)
+            if not lines:
+                break
+            for line in lines:
+                yield line
+    finally:
+        f.close()
+
+
+async def spool_upload(chunks: AsyncIterator[bytes]) -> str:
+    """
+    Write a streaming upload to a temporary file
+
+    Lets the request return while the ingestion continues in the
+    background; the caller owns (and removes) the file.
+    """
+    spool = tempfile.NamedTemporaryFile(prefix="memory-ingest-", suffix=".ndjson", delete=False)
+    try:
+        async for chunk in chunks:
+            await asyncio.to_thread(spool.write, chunk)
+    except BaseException:
+        spool.close()
+        os.unlink(spool.name)
+        raise
+    spool.close()
+    return spool.name
+
+
+class BulkIngestor:
+    """
+    Batched NDJSON ingestion into memory_nodes / memory_edges
+    Emotion scores come from the records (no per-item Claude call; records
+    without them are scored later by the emotion enricher); the in-process
+    replica and GNN processor are updated write-through. Uploads run as
+    background jobs (start); the CLI awaits run directly.
+    """
+
+    def __init__(
+        self,
+        embedding_service: EmbeddingService,
+        executor: Optional[InferenceExecutor] = None,
+        replica=None,
+        gnn_processor=None,
+        emotion_enricher=None,
+        stats=None,
+        batch_size: int = settings.BULK_INGEST_BATCH_SIZE,
+        encode_chunk: int = settings.BULK_INGEST_ENCODE_CHUNK,
+        claim_lease: float = settings.BULK_INGEST_CLAIM_LEASE
+    ):
+        self.embedding_service = embedding_service
+        self.executor = executor
+        self.replica = replica
+        self.gnn_processor = gnn_processor
+        self.emotion_enricher = emotion_enricher
+        self.stats = stats
+        self.batch_size = batch_size
+        self.encode_chunk = encode_chunk
+        self.claim_lease = claim_lease
+
+        self._tasks: Set[asyncio.Task] = set()
+        self._claims: Dict[str, datetime] = {}  # job id -> lease held by this runner
+
+    async def start(self, path: str, job_id: Optional[str] = None) -> Dict:
+        """
+        Ingest an NDJSON file in the background
+
+        Args:
+            path: Spooled upload; removed when the job ends
+            job_id: Existing job to resume, or None for a new job
+
+        Returns:
+            Status of the started job
+
+        Raises:
+            ValueError: The job already completed
+            IngestJobClaimedError: The job is running elsewhere
+        """
+        try:
+            job_id, lines_done = await self._open_job(job_id)
+        except BaseException:
+            os.unlink(path)
+            raise
+
+        task = asyncio.create_task(self._run_file(path, job_id, lines_done))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return {'job_id': job_id, 'status': "running", 'lines_done': lines_done}
+
+    async def _run_file(self, path: str, job_id: str, lines_done: int):
+        try:
+            await self._ingest(read_ndjson_file(path), job_id, lines_done)
+        except asyncio.CancelledError:
+            await self._fail_job(job_id, "Interrupted by shutdown; re-send the file with this job_id to resume")
+        except Exception as e:
+            # _ingest has already logged it and recorded it on the job
+            logger.debug(f"Ingestion job {job_id} ended with an error: {e}")
+        finally:
+            os.unlink(path)
+
+    async def stop(self):
+        """Interrupt background jobs; they resume from their checkpoints when re-sent"""
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def run(
+        self,
+        lines: AsyncIterator[str],
+        job_id: Optional[str] = None,
+        progress: Optional[Callable[[Dict], None]] = None
+    ) -> Dict:
+        """
+        Ingest NDJSON lines
+
+        Args:
+            lines: NDJSON lines (1-based line numbers count every line)
+            job_id: Existing job to resume, or None for a new job; lines up
+                to the job's checkpoint are skipped
+            progress: Called with the job status after every batch
+
+        Returns:
+            Final job status
+
+        Raises:
+            IngestJobClaimedError: The job is running elsewhere
+        """
+        job_id, lines_done = await self._open_job(job_id)
+        return await self._ingest(lines, job_id, lines_done, progress)
+
+    async def _ingest(
+        self,
+        lines: AsyncIterator[str],
+        job_id: str,
+        lines_done: int,
+        progress: Optional[Callable[[Dict], None]] = None
+    ) -> Dict:
+        """Ingest the lines of an opened job after its checkpoint"""
+        started = time.perf_counter()
+        batch: List[Dict] = []
+        failed_lines = 0
+        line_number = 0
+        logger.info(f"Bulk ingestion {job_id} starting after line {lines_done}")
+
+        try:
+            async for line in lines:
+                line_number += 1
+                if line_number <= lines_done or not line.strip():
+                    continue
+                try:
+                    batch.append(parse_record(line, job_id, line_number))
+                except IngestRecordError as e:
+                    failed_lines += 1
+                    logger.warning(f"Bulk ingestion {job_id}: {e}")
+
+                if len(batch) >= self.batch_size:
+                    status = await self._ingest_batch(job_id, batch, line_number, failed_lines, started)
+                    batch, failed_lines = [], 0
+                    if progress:
+                        progress(status)
+
+            status = await self._ingest_batch(job_id, batch, line_number, failed_lines, started, final=True)
+            if progress:
+                progress(status)
+            status = await self._link_pending(job_id, started, progress)
+            logger.info(f"Bulk ingestion {job_id} completed: {status}")
+            return status
+
+        except IngestJobClaimedError as e:
+            logger.warning(f"Bulk ingestion {job_id} stopped: {e}")
+            self._claims.pop(job_id, None)
+            raise
+        except Exception as e:
+            logger.error(f"Bulk ingestion {job_id} failed at line {line_number}: {e}")
+            await self._fail_job(job_id, str(e))
+            raise
+
+    async def _open_job(self, job_id: Optional[str]) -> Tuple[str, int]:
+        """Create a job, or claim an existing one; returns (job id, checkpoint)"""
+        now = datetime.utcnow()
+        async with database.SessionLocal() as db:
+            if job_id:
+                row = (await db.execute(
+                    CLAIM_JOB_SQL,
+                    {"job_id": job_id, "now": now, "lease_expired": now - timedelta(seconds=self.claim_lease)}
+                )).first()
+                await db.commit()
+                if row is not None:
+                    self._claims[job_id] = now
+                    return job_id, row[0]
+
+                job = await db.get(IngestJob, job_id)
+                if job is not None:
+                    if job.status == "completed":
+                        raise ValueError(f"Ingestion job {job.id} already completed")
+                    raise IngestJobClaimedError(f"Ingestion job {job.id} is already running")
+
+            job = IngestJob(
+                id=job_id or str(uuid.uuid4()),
+                status="running",
+                lines_done=0,
+                nodes_inserted=0,
+                edges_inserted=0,
+                failed_lines=0,
+                claimed_at=now,
+                created_at=now,
+                updated_at=now
+            )
+            db.add(job)
+            try:
+                await db.commit()
+            except IntegrityError:
+                raise IngestJobClaimedError(f"Ingestion job {job.id} is already running")
+            self._claims[job.id] = now
+            return job.id, 0
+
+    async def _renew_claim(self, db: AsyncSession, job_id: str) -> IngestJob:
+        """
+        Lock the job row and renew this runner's lease (committed by the caller)
+
+        Raises:
+            IngestJobClaimedError: The lease expired and another runner took the job
+        """
+        job = await db.get(IngestJob, job_id, with_for_update=True)
+        if job.status not in ("running", "linking") or job.claimed_at != self._claims.get(job_id):
+            raise IngestJobClaimedError(f"Ingestion job {job_id} lost its lease")
+        job.claimed_at = job.updated_at = datetime.utcnow()
+        return job
+
+    async def _fail_job(self, job_id: str, error: str):
+        try:
+            async with database.SessionLocal() as db:
+                job = await db.get(IngestJob, job_id)
+                # Leave a job taken over by another runner alone
+                claimed_at = self._claims.pop(job_id, None)
+                if job is not None and claimed_at is not None and job.claimed_at == claimed_at:
+                    job.status = "failed"
+                    job.error = error[:2000]
+                    job.claimed_at = None
+                    job.updated_at = datetime.utcnow()
+                    await db.commit()
+        except Exception as e:
+            logger.error(f"Error recording failed ingestion job {job_id}: {e}")
+
+    async def _encode(self, texts: List[str]) -> np.ndarray:
+        """Encode in executor calls of encode_chunk texts, so online encodes wait for one chunk, not the whole batch"""
+        chunks = []
+        for start in range(0, len(texts), self.encode_chunk):
+            chunks.append(await self._encode_chunk(texts[start:start + self.encode_chunk]))
+        return np.concatenate(chunks)
+
+    async def _encode_chunk(self, texts: List[str]) -> np.ndarray:
+        if self.executor is None:
+            return await asyncio.to_thread(self.embedding_service.encode_sync, texts)
+
+        # A full queue is waited out instead of failing the job
+        for attempt in range(1, OVERLOAD_MAX_ATTEMPTS + 1):
+            try:
+                return await self.executor.run("embedding", self.embedding_service.encode_sync, texts)
+            except ExecutorOverloadedError:
+                if attempt == OVERLOAD_MAX_ATTEMPTS:
+                    raise
+                await asyncio.sleep(OVERLOAD_RETRY_DELAY)
+
+    async def _ingest_batch(
+        self,
+        job_id: str,
+        batch: List[Dict],
+        line_number: int,
+        failed_lines: int,
+        started: float,
+        final: bool = False
+    ) -> Dict:
+        """Encode, COPY, insert nodes and checkpoint in one transaction"""
+        embeddings = await self._encode([record['content'] for record in batch]) if batch else []
+
+        async with database.SessionLocal() as db:
+            job = await self._renew_claim(db, job_id)
+            inserted_ids: List[str] = []
+            if batch:
+                inserted_ids = await self._copy_nodes(db, job_id, batch, embeddings)
+
+            job.lines_done = line_number
+            job.nodes_inserted += len(inserted_ids)
+            job.failed_lines += failed_lines
+            if final:
+                job.status = "linking"
+            await db.commit()
+            self._claims[job_id] = job.claimed_at
+            status = self.job_status(job, time.perf_counter() - started)
+
+        self._write_through(batch, embeddings, set(inserted_ids))
+        return status
+
+    async def _link_pending(
+        self,
+        job_id: str,
+        started: float,
+        progress: Optional[Callable[[Dict], None]] = None
+    ) -> Dict:
+        """
+        Build similarity edges for the job's nodes stored with edges_pending
+
+        One kNN insert per chunk of batch_size nodes, committed with the
+        cleared flags and the job's edge count; the job completes once none
+        of its nodes is pending.
+        """
+        after = None
+        while True:
+            async with database.SessionLocal() as db:
+                job = await self._renew_claim(db, job_id)
+                node_ids = (await db.execute(
+                    PENDING_EDGES_CHUNK_SQL, {"job_id": job_id, "after": after, "limit": self.batch_size}
+                )).scalars().all()
+
+                edges: List[Dict] = []
+                if node_ids:
+                    await db.execute(CLEAR_EDGES_PENDING_SQL, {"node_ids": node_ids})
+                    edges = await insert_similarity_edges(
+                        db,
+                        [str(node_id) for node_id in node_ids],
+                        settings.SIMILARITY_EDGE_THRESHOLD,
+                        settings.SIMILARITY_EDGE_MAX_CONNECTIONS
+                    )
+
+                job.edges_inserted += len(edges)
+                if not node_ids:
+                    job.status = "completed"
+                    job.claimed_at = None
+                await db.commit()
+                self._claims[job_id] = job.claimed_at
+                status = self.job_status(job, time.perf_counter() - started)
+
+            self._write_through_edges(edges)
+            if not node_ids:
+                self._claims.pop(job_id, None)
+                return status
+            after = node_ids[-1]
+            if progress:
+                progress(status)
+
+    async def _copy_nodes(self, db: AsyncSession, job_id: str, batch: List[Dict], embeddings) -> List[str]:
+        """COPY the batch into the temp staging table and insert new nodes from it"""
+        await db.execute(CREATE_STAGING_SQL)
+        connection = await db.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            "memory_ingest_staging",
+            records=[
+                tuple(record[column] for column in STAGING_COLUMNS[:-1]) + (embedding.tolist(),)
+                for record, embedding in zip(batch, embeddings)
+            ],
+            columns=STAGING_COLUMNS
+        )
+        result = await db.execute(INSERT_FROM_STAGING_SQL, {"job_id": job_id})
+        return [str(row[0]) for row in result.fetchall()]
+
+    def _write_through(self, batch: List[Dict], embeddings, inserted_ids: set):
+        new_nodes = [
+            dict(record, id=str(record['id']), embedding=embedding,
+                 activation_strength=1.0, access_count=0, last_accessed=record['created_at'])
+            for record, embedding in zip(batch, embeddings)
+            if str(record['id']) in inserted_ids
+        ]
+        if self.replica is not None:
+            self.replica.add_nodes(new_nodes)
+        if self.gnn_processor is not None:
+            for node in new_nodes:
+                self.gnn_processor.register_memory_node(
+                    node['id'], node['embedding'], node['valence'], node['arousal']
+                )
+        if self.stats is not None:
+            self.stats.nodes_added(
+                (node['memory_type'], node['activation_strength'], node['created_at']) for node in new_nodes
+            )
+        if self.emotion_enricher is not None and any(node['emotion_pending'] for node in new_nodes):
+            self.emotion_enricher.notify()
+
+    def _write_through_edges(self, edges: List[Dict]):
+        if not edges:
+            return
+        if self.replica is not None:
+            self.replica.add_edges(edges)
+        if self.gnn_processor is not None:
+            self.gnn_processor.register_memory_edges(
+                [(edge['source_id'], edge['target_id']) for edge in edges]
+            )
+        if self.stats is not None:
+            self.stats.edges_added(len(edges))
+
+    @staticmethod
+    def job_status(job: IngestJob, elapsed: Optional[float] = None) -> Dict:
+        status = {
+            'job_id': job.id,
+            'status': job.status,
+            'lines_done': job.lines_done,
+            'nodes_inserted': job.nodes_inserted,
+            'edges_inserted': job.edges_inserted,
+            'failed_lines': job.failed_lines,
+            'error': job.error,
+            'updated_at': job.updated_at
+        }
+        if elapsed:
+            status['elapsed_seconds'] = elapsed
+        return status
+
+
+async def get_ingest_job(db: AsyncSession, job_id: str) -> Optional[Dict]:
+    """Current status of an ingestion job"""
+    job = await db.get(IngestJob, job_id)
+    return BulkIngestor.job_status(job) if job is not None else None
@@ -4,14 +4,21 @@ Integrates with memory system for context-aware responses
 """
 
 import asyncio
+import json
 import logging
-from typing import List, Dict, Optional
+import random
+from collections import Counter
+from typing import AsyncIterator, List, Dict, Optional
 from anthropic import AsyncAnthropic
 
 from app.core.config import settings
+from app.services.emotion_scorer import LexiconEmotionScorer
 
 logger = logging.getLogger(__name__)
 
+# Per-text limit in batched emotion prompts (the tone is clear well before this)
+EMOTION_TEXT_MAX_CHARS = 2000
+
 
 class ClaudeClient:
     """Claude API client for generating contextual responses"""
@@ -22,6 +29,11 @@ class ClaudeClient:
             self.client = None
         else:
             self.client = AsyncAnthropic(api_key=settings.CLAUDE_API_KEY)
+        
+        # Local emotion scoring; Claude only for low-confidence texts
+        self.local_scorer = LexiconEmotionScorer()
+        self._emotion_counts = Counter()
+        self._disagreement = {'accepted': [0, 0.0, 0.0], 'fallback': [0, 0.0, 0.0]}
     
     async def generate_response(
         self,
@@ -70,6 +82,46 @@ class ClaudeClient:
             logger.error(f"Error generating Claude response: {e}")
             return "申し訳ありませんが、応答の生成中にエラーが発生しました。"
     
+    async def stream_response(
+        self,
+        user_message: str,
+        context_memories: List[Dict] = None,
+        conversation_history: List[Dict] = None,
+        system_prompt: str = None
+    ) -> AsyncIterator[str]:
+        """
+        Generate a response like generate_response, yielding text as it arrives
+        
+        Uses the streaming Messages API; errors are raised to the caller
+        (the stream may already have yielded part of the response).
+        
+        Yields:
+            Response text chunks
+        """
+        if not self.client:
+            yield "申し訳ありませんが、Claude APIが設定されていません。"
+            return
+        
+        prompt = self._build_contextual_prompt(
+            user_message=user_message,
+            context_memories=context_memories,
+            conversation_history=conversation_history,
+            system_prompt=system_prompt
+        )
+        
+        stream = await self.client.messages.create(
+            model=settings.CLAUDE_MODEL,
+            max_tokens=settings.CLAUDE_MAX_TOKENS,
+            messages=[
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.7,
+            stream=True
+        )
+        async for event in stream:
+            if event.type == "content_block_delta" and getattr(event.delta, "text", None):
+                yield event.delta.text
+    
     def _build_contextual_prompt(
         self,
         user_message: str,
@@ -147,12 +199,26 @@ class ClaudeClient:
     
     async def analyze_emotion(self, text: str) -> Dict[str, float]:
         """
-        Analyze emotion in text using Claude
-        Returns valence and arousal scores
+        Analyze emotion in text
+        Scored locally first; Claude is asked only when the local confidence
+        is below EMOTION_LOCAL_CONFIDENCE. Returns valence and arousal scores
         """
+        local = self.local_scorer.score(text)
+        confident = local["confidence"] >= settings.EMOTION_LOCAL_CONFIDENCE
         if not self.client:
-            return {"valence": 0.0, "arousal": 0.0}
+            self._emotion_counts['no_client'] += 1
+            return self._scores(local)
+        if confident and not self._shadow_sample():
+            self._emotion_counts['local'] += 1
+            return self._scores(local)
         
+        emotion = await self._request_emotion(text)
+        if emotion is None:
+            return self._scores(local)
+        return self._record_llm_result(local, emotion, confident)
+    
+    async def _request_emotion(self, text: str) -> Optional[Dict[str, float]]:
+        """Score one text with Claude (None if the request failed)"""
         try:
             prompt = f"""以下のテキストの感情を分析して、Valence-Arousalモデルでの座標を返してください。
 
@@ -175,7 +241,6 @@ JSON形式で返してください:
             response_text = response.content[0].text
             
             # Extract valence and arousal from response
-            import json
             try:
                 emotion_data = json.loads(response_text)
                 return {
@@ -188,30 +253,143 @@ JSON形式で返してください:
                 
         except Exception as e:
             logger.error(f"Error analyzing emotion: {e}")
-            return {"valence": 0.0, "arousal": 0.0}
+            return None
     
-    def _simple_emotion_analysis(self, text: str) -> Dict[str, float]:
-        """Simple keyword-based emotion analysis fallback"""
-        positive_words = ["嬉しい", "楽しい", "良い", "素晴らしい", "最高", "好き", "ありがとう"]
-        negative_words = ["悲しい", "つらい", "嫌", "ダメ", "最悪", "心配", "不安"]
-        high_arousal_words = ["興奮", "驚き", "ビックリ", "急に", "すごい", "やばい"]
-        low_arousal_words = ["疲れた", "眠い", "落ち着く", "リラックス", "静か"]
+    async def analyze_emotions_batch(self, texts: List[str]) -> Optional[List[Optional[Dict[str, float]]]]:
+        """
+        Analyze the emotion of several texts
+        Texts the local scorer is confident about never reach Claude; the
+        rest share one request.
         
-        text_lower = text.lower()
+        Args:
+            texts: Texts to score
+            
+        Returns:
+            Valence and arousal per text (same order), or None if the
+            request failed and the texts should be retried later. A text
+            whose entry in Claude's response could not be parsed gets None
+            unless its local score is confident (retry it later).
+        """
+        if not texts:
+            return []
         
-        valence = 0.0
-        arousal = 0.0
+        local = self.local_scorer.score_many(texts)
+        results = [self._scores(scores) for scores in local]
+        if not self.client:
+            self._emotion_counts['no_client'] += len(texts)
+            return results
         
-        # Calculate valence
-        pos_count = sum(1 for word in positive_words if word in text_lower)
-        neg_count = sum(1 for word in negative_words if word in text_lower)
-        if pos_count + neg_count > 0:
-            valence = (pos_count - neg_count) / (pos_count + neg_count)
+        threshold = settings.EMOTION_LOCAL_CONFIDENCE
+        ask = [
+            i for i, scores in enumerate(local)
+            if scores["confidence"] < threshold or self._shadow_sample()
+        ]
+        self._emotion_counts['local'] += len(texts) - len(ask)
+        if ask:
+            emotions = await self._request_emotions_batch([texts[i] for i in ask])
+            if emotions is None:
+                return None
+            for i, emotion in zip(ask, emotions):
+                confident = local[i]["confidence"] >= threshold
+                if emotion is None:
+                    results[i] = self._scores(local[i]) if confident else None
+                else:
+                    results[i] = self._record_llm_result(local[i], emotion, confident)
+        return results
+    
+    async def _request_emotions_batch(self, texts: List[str]) -> Optional[List[Optional[Dict[str, float]]]]:
+        """
+        Score several texts with one Claude request (None if the request
+        failed; None entries for texts missing from or unparsable in the response)
+        """
+        try:
+            numbered = json.dumps(
+                [text[:EMOTION_TEXT_MAX_CHARS] for text in texts], ensure_ascii=False, indent=0
+            )
+            prompt = f"""以下のJSON配列の各テキストの感情を分析して、Valence-Arousalモデルでの座標を返してください。
+
+テキスト: {numbered}
+
+Valence（感情価）: -1.0（非常にネガティブ）から1.0（非常にポジティブ）
+Arousal（覚醒度）: -1.0（非常に静か・リラックス）から1.0（非常に興奮・アクティブ）
+
+入力と同じ順序・同じ件数（{len(texts)}件）のJSON配列だけを返してください:
+[{{"valence": 数値, "arousal": 数値}}, ...]"""
+
+            response = await self.client.messages.create(
+                model=settings.CLAUDE_MODEL,
+                max_tokens=50 + 30 * len(texts),
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0.3
+            )
+            response_text = response.content[0].text
+        except Exception as e:
+            logger.error(f"Error analyzing emotions of {len(texts)} texts: {e}")
+            return None
         
-        # Calculate arousal
-        high_count = sum(1 for word in high_arousal_words if word in text_lower)
-        low_count = sum(1 for word in low_arousal_words if word in text_lower)
-        if high_count + low_count > 0:
-            arousal = (high_count - low_count) / (high_count + low_count)
+        try:
+            items = json.loads(response_text[response_text.index("["):response_text.rindex("]") + 1])
+        except ValueError:
+            items = []
         
-        return {"valence": valence, "arousal": arousal}
+        results = []
+        for i, text in enumerate(texts):
+            item = items[i] if i < len(items) and isinstance(items[i], dict) else None
+            try:
+                results.append({
+                    "valence": max(-1.0, min(1.0, float(item.get("valence", 0.0)))),
+                    "arousal": max(-1.0, min(1.0, float(item.get("arousal", 0.0))))
+                })
+            except (AttributeError, TypeError, ValueError):
+                # Not scored: the caller keeps the text pending instead of
+                # storing a low-confidence lexicon score as final
+                results.append(None)
+        return results
+    
+    def _shadow_sample(self) -> bool:
+        """Whether a confidently scored text is also sent to Claude for comparison"""
+        return settings.EMOTION_LOCAL_SHADOW_RATE > 0 and random.random() < settings.EMOTION_LOCAL_SHADOW_RATE
+    
+    def _record_llm_result(
+        self,
+        local: Dict[str, float],
+        emotion: Dict[str, float],
+        confident: bool
+    ) -> Dict[str, float]:
+        """Track local-vs-Claude disagreement; a shadowed confident score stays local"""
+        self._emotion_counts['llm'] += 1
+        group = self._disagreement['accepted' if confident else 'fallback']
+        group[0] += 1
+        group[1] += abs(local["valence"] - emotion["valence"])
+        group[2] += abs(local["arousal"] - emotion["arousal"])
+        return self._scores(local) if confident else emotion
+    
+    @staticmethod
+    def _scores(scores: Dict[str, float]) -> Dict[str, float]:
+        return {"valence": scores["valence"], "arousal": scores["arousal"]}
+    
+    def _simple_emotion_analysis(self, text: str) -> Dict[str, float]:
+        """Simple keyword-based emotion analysis fallback"""
+        return self._scores(self.local_scorer.score(text))
+    
+    def get_emotion_metrics(self) -> Dict:
+        """Share of emotion scores served locally and local-vs-Claude disagreement"""
+        local, llm = self._emotion_counts['local'], self._emotion_counts['llm']
+        return {
+            'local': local,
+            'llm': llm,
+            'no_client': self._emotion_counts['no_client'],
+            'llm_avoided_share': local / (local + llm) if local + llm else 0.0,
+            'confidence_threshold': settings.EMOTION_LOCAL_CONFIDENCE,
+            'shadow_rate': settings.EMOTION_LOCAL_SHADOW_RATE,
+            # accepted: confident local scores shadow-checked against Claude;
+            # fallback: low-confidence texts that went to Claude
+            'disagreement': {
+                group: {
+                    'samples': n,
+                    'valence_mae': valence_error / n if n else None,
+                    'arousal_mae': arousal_error / n if n else None
+                }
+                for group, (n, valence_error, arousal_error) in self._disagreement.items()
+            }
+        }
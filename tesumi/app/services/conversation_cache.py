@@ -0,0 +1,152 @@
+"""
+Conversation Cache
+Per-session ring buffers of the most recent chat turns, so chat turns and
+the history endpoint read conversation context without querying
+conversation_history. Sessions expire after a TTL (turns written by other
+processes become visible then) and the least recently used sessions are
+evicted beyond max_sessions.
+"""
+
+import time
+from collections import OrderedDict, deque
+from typing import Dict, Iterable, List, Optional
+
+TURN_KEYS = ('user_input', 'system_response', 'created_at', 'activated_memories')
+
+
+def _turn_key(turn: Dict):
+    return turn['created_at'], turn['user_input']
+
+
+class _SessionBuffer:
+    def __init__(self, capacity: int, expires_at: float):
+        self.turns: deque = deque(maxlen=capacity)
+        # True when the buffer holds every turn of the session
+        self.complete = False
+        self.expires_at = expires_at
+
+
+class ConversationCache:
+    """
+    LRU of per-session turn ring buffers
+
+    A buffer always holds the newest turns of its session. A read for the
+    last `limit` turns is a hit when the buffer has at least that many, or
+    has the whole session. Reads larger than a buffer that it cannot serve
+    are counted as oversized, not as misses, and callers do not refill the
+    buffer for them.
+    """
+
+    def __init__(self, turns_per_session: int = 20, max_sessions: int = 10000, ttl: float = 300.0):
+        self.turns_per_session = turns_per_session
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+
+        self._sessions: "OrderedDict[str, _SessionBuffer]" = OrderedDict()
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.oversized = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_sessions > 0 and self.turns_per_session > 0
+
+    def _buffer(self, session_id: str) -> Optional[_SessionBuffer]:
+        buffer = self._sessions.get(session_id)
+        if buffer is None:
+            return None
+        if buffer.expires_at <= time.monotonic():
+            del self._sessions[session_id]
+            self.expirations += 1
+            return None
+        self._sessions.move_to_end(session_id)
+        return buffer
+
+    def _new_buffer(self, session_id: str) -> _SessionBuffer:
+        buffer = _SessionBuffer(self.turns_per_session, time.monotonic() + self.ttl)
+        self._sessions[session_id] = buffer
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.evictions += 1
+        return buffer
+
+    def get(self, session_id: str, limit: int) -> Optional[List[Dict]]:
+        """
+        Last `limit` turns of a session (oldest first)
+
+        Returns:
+            The turns, or None on a miss
+        """
+        if not self.enabled:
+            return None
+
+        buffer = self._buffer(session_id)
+        if buffer is None or (len(buffer.turns) < limit and not buffer.complete):
+            if limit > self.turns_per_session:
+                self.oversized += 1
+            else:
+                self.misses += 1
+            return None
+
+        self.hits += 1
+        turns = list(buffer.turns)
+        return turns[-limit:] if limit else []
+
+    def append(self, session_id: str, turn: Dict):
+        """Add a new turn (the newest of its session)"""
+        if not self.enabled:
+            return
+
+        buffer = self._buffer(session_id) or self._new_buffer(session_id)
+        if len(buffer.turns) == buffer.turns.maxlen:
+            buffer.complete = False  # The oldest turn falls out
+        buffer.turns.append({key: turn[key] for key in TURN_KEYS})
+
+    def load(self, session_id: str, turns: Iterable[Dict], complete: bool, fill: bool = True) -> List[Dict]:
+        """
+        Fill a session's buffer after a miss
+
+        Turns appended while the caller was querying the database are kept;
+        turns present in both are merged.
+
+        Args:
+            session_id: Session
+            turns: Newest turns of the session from the database (oldest first)
+            complete: Whether `turns` is the whole session
+            fill: Replace the buffer with the merged turns (False for
+                oversized reads: the buffer is only merged from)
+
+        Returns:
+            Merged turns (oldest first), not truncated to the buffer size
+        """
+        merged = {_turn_key(turn): {key: turn[key] for key in TURN_KEYS} for turn in turns}
+        buffer = self._buffer(session_id) if self.enabled else None
+        if buffer is not None:
+            for turn in buffer.turns:
+                merged.setdefault(_turn_key(turn), turn)
+        merged_turns = sorted(merged.values(), key=lambda turn: turn['created_at'])
+
+        if self.enabled and fill:
+            buffer = self._new_buffer(session_id)
+            buffer.turns.extend(merged_turns)
+            buffer.complete = complete and len(merged_turns) <= self.turns_per_session
+        return merged_turns
+
+    def get_metrics(self) -> Dict:
+        """Hit rate and occupancy"""
+        lookups = self.hits + self.misses
+        return {
+            'sessions': len(self._sessions),
+            'hits': self.hits,
+            'misses': self.misses,
+            'oversized_reads': self.oversized,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'turns_per_session': self.turns_per_session,
+            'ttl': self.ttl
+        }
@@ -0,0 +1,356 @@
+"""
+Conversation Recorder
+Persists chat turns and forms conversation memories off the request path.
+A request awaits only the batched insert of its turn (group commit); the
+turn is stored flagged memory_pending and claimed by the inserting process,
+and memory formation (encoding, emotion scoring, edges) runs afterwards in
+a separate worker. Turns whose formation never finished are reclaimed
+periodically once their claim is released or its lease expires, so failed
+turns are retried and a restart resumes unfinished work.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+
+from app.core import database
+from app.models.memory import ConversationHistory
+
+logger = logging.getLogger(__name__)
+
+# Claimed with a lease in a short transaction, like EmotionEnricher's
+# batches: several app processes recovering at once never form the same
+# turn's memory twice, and a lease left by a crashed process expires
+CLAIM_PENDING_MEMORY_SQL = text("""
+    UPDATE conversation_history SET memory_claimed_at = :now
+    WHERE id IN (
+        SELECT id FROM conversation_history
+        WHERE memory_pending
+        AND (memory_claimed_at IS NULL OR memory_claimed_at < :lease_expired)
+        ORDER BY created_at
+        LIMIT :limit
+        FOR NO KEY UPDATE SKIP LOCKED
+    )
+    RETURNING id, user_input, system_response, activated_memories
+""")
+
+CLEAR_MEMORY_PENDING_SQL = text("""
+    UPDATE conversation_history SET memory_pending = false, memory_claimed_at = NULL
+    WHERE id = ANY(:ids)
+""").bindparams(bindparam("ids", type_=ARRAY(UUID(as_uuid=True))))
+
+RELEASE_MEMORY_CLAIM_SQL = text("""
+    UPDATE conversation_history SET memory_claimed_at = NULL WHERE id = ANY(:ids)
+""").bindparams(bindparam("ids", type_=ARRAY(UUID(as_uuid=True))))
+
+# Queued last by stop(): a worker finishes its batch and exits
+_STOP = object()
+
+
+class ConversationRecorder:
+    """
+    Batched, durable writer for chat turns
+    Turns waiting for their insert are visible to get_conversation_context
+    (via `pending`), so a quick follow-up message in the same session still
+    sees them. A turn is acknowledged only once committed; when the insert
+    keeps failing the caller gets the error instead of losing the turn.
+    """
+
+    def __init__(
+        self,
+        memory_manager,
+        cache=None,
+        batch_size: int = 32,
+        max_wait: float = 0.05,
+        max_attempts: int = 5,
+        retry_delay: float = 0.5,
+        claim_lease: float = 600.0,
+        recover_interval: float = 60.0
+    ):
+        self.memory_manager = memory_manager
+        self.cache = cache
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.claim_lease = claim_lease
+        self.recover_interval = recover_interval
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._memory_queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._memory_worker: Optional[asyncio.Task] = None
+        self._pending: Dict[str, List[Dict]] = {}
+
+        # Metrics
+        self.batches = 0
+        self.turns_recorded = 0
+        self.memories_processed = 0
+        self.memory_failures = 0
+        self.recovered = 0
+        self.record_retries = 0
+        self.record_failures = 0
+
+    def start(self):
+        """Start the workers on the running event loop"""
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        if self._memory_queue is None:
+            self._memory_queue = asyncio.Queue()
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._run())
+        if self._memory_worker is None:
+            self._memory_worker = asyncio.create_task(self._form_loop())
+
+    async def stop(self):
+        """Stop after recording the queued turns and forming the queued memories"""
+        if self._worker is not None:
+            # Not cancelled: a batch taken off the queue would be lost
+            self._queue.put_nowait(_STOP)
+            await self._worker
+            self._worker = None
+
+        pending = []
+        while self._queue is not None and not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not _STOP:
+                pending.append(item)
+        if pending:
+            await self._record(pending)
+
+        if self._memory_worker is not None:
+            self._memory_queue.put_nowait(_STOP)
+            await self._memory_worker
+            self._memory_worker = None
+
+    async def record(
+        self,
+        session_id: str,
+        user_input: str,
+        system_response: str,
+        activated_memories: List[str] = None
+    ):
+        """
+        Persist a chat turn; returns once it is committed
+
+        Memory formation for the turn runs afterwards in the background.
+
+        Raises:
+            Exception: The insert's error, once max_attempts have failed
+        """
+        turn = {
+            'session_id': session_id,
+            'user_input': user_input,
+            'system_response': system_response,
+            'created_at': datetime.utcnow(),
+            'activated_memories': activated_memories or []
+        }
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        committed = asyncio.get_running_loop().create_future()
+        self._pending.setdefault(session_id, []).append(turn)
+        self._queue.put_nowait((turn, committed))
+        # Shielded: a disconnecting client does not withdraw its turn
+        await asyncio.shield(committed)
+
+    def pending(self, session_id: str) -> List[Dict]:
+        """Turns of a session waiting for their insert (oldest first)"""
+        return list(self._pending.get(session_id, ()))
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = loop.time() + self.max_wait
+
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            await self._record(batch)
+
+    async def _insert(self, turns: List[Dict]) -> List[ConversationHistory]:
+        """Insert turns (claimed for this process's memory worker), retrying with backoff"""
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                async with database.SessionLocal() as db:
+                    now = datetime.utcnow()
+                    conversations = [
+                        ConversationHistory(
+                            session_id=turn['session_id'],
+                            user_input=turn['user_input'],
+                            system_response=turn['system_response'],
+                            activated_memories=turn['activated_memories'],
+                            memory_pending=True,
+                            memory_claimed_at=now,
+                            created_at=turn['created_at']
+                        )
+                        for turn in turns
+                    ]
+                    db.add_all(conversations)
+                    await db.commit()
+                return conversations
+            except Exception as e:
+                logger.error(
+                    f"Error recording {len(turns)} conversation turns "
+                    f"(attempt {attempt}/{self.max_attempts}): {e}"
+                )
+                if attempt == self.max_attempts:
+                    raise
+                self.record_retries += 1
+                await asyncio.sleep(self.retry_delay * 2 ** (attempt - 1))
+
+    async def _record(self, items: List[Tuple[Dict, asyncio.Future]]):
+        turns = [turn for turn, _ in items]
+        try:
+            conversations = await self._insert(turns)
+        except Exception as e:
+            self.record_failures += len(turns)
+            for _, committed in items:
+                if not committed.done():
+                    committed.set_exception(e)
+            return
+        finally:
+            for turn in turns:
+                session_turns = self._pending.get(turn['session_id'])
+                if session_turns is not None:
+                    session_turns.remove(turn)
+                    if not session_turns:
+                        del self._pending[turn['session_id']]
+
+        for turn, committed in items:
+            if self.cache is not None:
+                self.cache.append(turn['session_id'], turn)
+            if not committed.done():
+                committed.set_result(None)
+
+        self.batches += 1
+        self.turns_recorded += len(turns)
+        if self._memory_queue is None:
+            self._memory_queue = asyncio.Queue()
+        self._memory_queue.put_nowait([
+            (conversation.id, conversation.user_input, conversation.system_response,
+             conversation.activated_memories)
+            for conversation in conversations
+        ])
+
+    async def _form_loop(self):
+        loop = asyncio.get_running_loop()
+        await self._recover()
+        next_recover = loop.time() + self.recover_interval
+
+        while True:
+            try:
+                rows = await asyncio.wait_for(
+                    self._memory_queue.get(), max(next_recover - loop.time(), 0)
+                )
+            except asyncio.TimeoutError:
+                rows = None
+            if rows is _STOP:
+                break
+            if rows is not None:
+                await self._form_memories(rows)
+            # Retries released claims and expired leases, also while busy
+            if loop.time() >= next_recover:
+                await self._recover()
+                next_recover = loop.time() + self.recover_interval
+
+    async def _form_memories(self, rows: List[tuple]) -> bool:
+        """
+        Create conversation memories, clearing each turn's memory_pending in
+        the transaction that commits its memory; the claims of failed turns
+        are released so a later recovery retries them
+
+        Returns:
+            Whether every turn was processed
+        """
+        done = []
+        try:
+            async with database.SessionLocal() as db:
+                for conversation_id, user_input, system_response, activated_memories in rows:
+                    try:
+                        # Committed by create_memory_node together with the
+                        # memory, or rolled back with it, so a committed
+                        # memory is never formed again
+                        await db.execute(CLEAR_MEMORY_PENDING_SQL, {"ids": [conversation_id]})
+                        if await self.memory_manager._create_conversation_memory(
+                            db, user_input, system_response, activated_memories
+                        ):
+                            await db.commit()
+                            done.append(conversation_id)
+                        else:
+                            await db.rollback()
+                    except Exception as e:
+                        logger.error(f"Error forming conversation memory {conversation_id}: {e}")
+                        await db.rollback()
+        except Exception as e:
+            logger.error(f"Error forming conversation memories: {e}")
+
+        self.memories_processed += len(done)
+        self.memory_failures += len(rows) - len(done)
+        failed = [row[0] for row in rows if row[0] not in done]
+        if failed:
+            await self._release(failed)
+        return not failed
+
+    async def _release(self, conversation_ids: List):
+        try:
+            async with database.SessionLocal() as db:
+                await db.execute(RELEASE_MEMORY_CLAIM_SQL, {"ids": conversation_ids})
+                await db.commit()
+        except Exception as e:
+            logger.error(f"Error releasing conversation memory claim: {e}")
+
+    async def _recover(self):
+        """Form the memories of turns left pending by a failure, an earlier shutdown or a crash"""
+        try:
+            while True:
+                now = datetime.utcnow()
+                async with database.SessionLocal() as db:
+                    rows = (await db.execute(
+                        CLAIM_PENDING_MEMORY_SQL,
+                        {
+                            "now": now,
+                            "lease_expired": now - timedelta(seconds=self.claim_lease),
+                            "limit": self.batch_size
+                        }
+                    )).fetchall()
+                    await db.commit()
+                if not rows or not await self._form_memories(rows):
+                    break
+                self.recovered += len(rows)
+                if len(rows) < self.batch_size:
+                    break
+        except Exception as e:
+            logger.error(f"Error recovering conversation memories: {e}")
+
+    def get_metrics(self) -> Dict:
+        """Queue depth and throughput"""
+        return {
+            'pending_turns': self._queue.qsize() if self._queue is not None else 0,
+            'pending_memories': self._memory_queue.qsize() if self._memory_queue is not None else 0,
+            'batches': self.batches,
+            'turns_recorded': self.turns_recorded,
+            'memories_processed': self.memories_processed,
+            'memory_failures': self.memory_failures,
+            'recovered': self.recovered,
+            'record_retries': self.record_retries,
+            'record_failures': self.record_failures
+        }
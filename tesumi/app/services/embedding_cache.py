@@ -0,0 +1,233 @@
+"""
+Embedding Cache
+Content-addressed cache of sentence embeddings keyed by hash(model, text):
+an in-process LRU in front of an optional SQLite store shared by workers
+"""
+
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Disk last-used times are written in batches of this many touched keys
+TOUCH_FLUSH_SIZE = 256
+
+# The disk table size is checked against its limit after this many inserts
+TRIM_CHECK_INTERVAL = 1000
+
+
+class EmbeddingCache:
+    """
+    Two-level embedding cache
+    Level 1 is an LRU dict of float32 vectors; level 2 is a SQLite table in
+    WAL mode, so several worker processes can share it. The disk table is
+    trimmed to `disk_max_entries` by least-recent use. Each level has its own
+    lock, so in-memory lookups never wait behind disk I/O.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        dim: int,
+        capacity: int = 10000,
+        path: Optional[str] = None,
+        disk_max_entries: int = 1000000
+    ):
+        self.model_name = model_name
+        self.dim = dim
+        self.capacity = capacity
+        self.path = path
+        self.disk_max_entries = disk_max_entries
+
+        self._memory: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()  # Level 1 (and the hit counters)
+        self._disk_lock = threading.Lock()  # SQLite connection, touched keys, trim counter
+        self._touched: Dict[bytes, float] = {}
+        self._inserts_since_trim = 0
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            self._open(path)
+
+        # Metrics
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _open(self, path: str):
+        try:
+            self._db = sqlite3.connect(path, timeout=30.0, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    key BLOB PRIMARY KEY,
+                    vector BLOB NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            self._db.execute("CREATE INDEX IF NOT EXISTS ix_embeddings_last_used ON embeddings (last_used)")
+            self._db.commit()
+            logger.info(f"Embedding cache store opened at {path}")
+        except Exception as e:
+            logger.error(f"Could not open embedding cache store {path}: {e}")
+            self._db = None
+
+    def key(self, text: str) -> bytes:
+        return hashlib.blake2b(f"{self.model_name}\x1f{text}".encode(), digest_size=16).digest()
+
+    def get_memory(self, text: str) -> Optional[np.ndarray]:
+        """In-process lookup only (cheap enough for the event loop)"""
+        key = self.key(text)
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+        return vector
+
+    def get_many(self, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """
+        Look texts up in memory, then on disk
+
+        Args:
+            texts: Texts to look up
+
+        Returns:
+            One vector per text, None where both levels miss
+        """
+        keys = [self.key(text) for text in texts]
+        results: List[Optional[np.ndarray]] = [None] * len(keys)
+        missing = []
+        with self._lock:
+            for i, key in enumerate(keys):
+                vector = self._memory.get(key)
+                if vector is None:
+                    missing.append(i)
+                else:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    results[i] = vector
+
+        found = {}
+        if missing and self._db is not None:
+            with self._disk_lock:
+                if self._db is not None:
+                    found = self._read_disk([keys[i] for i in missing])
+                    now = time.time()
+                    for key in found:
+                        self._touched[key] = now
+                    if len(self._touched) >= TOUCH_FLUSH_SIZE:
+                        self._flush_touched()
+
+        with self._lock:
+            for i in missing:
+                vector = found.get(keys[i])
+                if vector is not None:
+                    results[i] = vector
+                    self._remember(keys[i], vector)
+                    self.disk_hits += 1
+                else:
+                    self.misses += 1
+        return results
+
+    def put_many(self, texts: Sequence[str], vectors: Sequence[np.ndarray]):
+        """Store freshly encoded vectors in both levels"""
+        rows = []
+        now = time.time()
+        with self._lock:
+            for text, vector in zip(texts, vectors):
+                vector = np.asarray(vector, dtype=np.float32)
+                key = self.key(text)
+                self._remember(key, vector)
+                rows.append((key, vector.tobytes(), now))
+
+        if self._db is None or not rows:
+            return
+        with self._disk_lock:
+            if self._db is not None:
+                try:
+                    self._db.executemany(
+                        "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)", rows
+                    )
+                    self._flush_touched(commit=False)
+                    self._db.commit()
+                    self._inserts_since_trim += len(rows)
+                    if self._inserts_since_trim >= TRIM_CHECK_INTERVAL:
+                        self._trim_disk()
+                except Exception as e:
+                    logger.error(f"Error writing embedding cache store: {e}")
+
+    def _remember(self, key: bytes, vector: np.ndarray):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.capacity:
+            self._memory.popitem(last=False)
+
+    def _read_disk(self, keys: List[bytes]) -> Dict[bytes, np.ndarray]:
+        found = {}
+        try:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                for key, blob in self._db.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", chunk
+                ):
+                    vector = np.frombuffer(blob, dtype=np.float32)
+                    if vector.size == self.dim:
+                        found[key] = vector
+        except Exception as e:
+            logger.error(f"Error reading embedding cache store: {e}")
+        return found
+
+    def _flush_touched(self, commit: bool = True):
+        if not self._touched:
+            return
+        try:
+            self._db.executemany(
+                "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                [(used, key) for key, used in self._touched.items()]
+            )
+            if commit:
+                self._db.commit()
+        except Exception as e:
+            logger.error(f"Error updating embedding cache store: {e}")
+        self._touched.clear()
+
+    def _trim_disk(self):
+        self._inserts_since_trim = 0
+        count = self._db.execute("SELECT count(*) FROM embeddings").fetchone()[0]
+        excess = count - self.disk_max_entries
+        if excess > 0:
+            self._db.execute(
+                "DELETE FROM embeddings WHERE key IN "
+                "(SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+                (excess,)
+            )
+            self._db.commit()
+
+    def close(self):
+        with self._disk_lock:
+            if self._db is not None:
+                self._flush_touched()
+                self._db.close()
+                self._db = None
+
+    def get_metrics(self) -> Dict:
+        """Hit rates per level"""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            'memory_entries': len(self._memory),
+            'memory_capacity': self.capacity,
+            'disk_store': self.path if self._db is not None else None,
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0
+        }
@@ -0,0 +1,206 @@
+"""
+Embedding Service
+Queues sentence-embedding requests from every caller and encodes them in
+batches on the inference executor; identical texts in flight share one encode
+and previously seen texts are served from the embedding cache
+"""
+
+import asyncio
+import logging
+from collections import Counter
+from typing import Dict, List, Optional
+
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+from app.services.embedding_cache import EmbeddingCache
+from app.services.inference_executor import ExecutorOverloadedError, InferenceExecutor
+
+logger = logging.getLogger(__name__)
+
+# Queued by stop() behind the last request: the worker dispatches its batch and exits
+_STOP = object()
+
+
+class EmbeddingService:
+    """
+    Dynamic batching front end for SentenceTransformer.encode
+    A batch is dispatched when it holds `max_batch_size` distinct texts or
+    when `max_wait_ms` has passed since its first request arrived.
+    """
+
+    def __init__(
+        self,
+        model: SentenceTransformer,
+        executor: InferenceExecutor,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        cache: Optional[EmbeddingCache] = None
+    ):
+        self.model = model
+        self.executor = executor
+        self.cache = cache
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+        # Metrics
+        self._batches = 0
+        self._requests = 0
+        self._coalesced = 0
+        self._batch_sizes = Counter()
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and not self._worker.done()
+
+    def start(self):
+        """Start the batching worker on the running event loop"""
+        if not self.running:
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the worker; queued texts are still encoded"""
+        if self._worker is None:
+            return
+
+        # Not cancelled: the batch being collected is already off the queue
+        self._queue.put_nowait(_STOP)
+        await self._worker
+        self._worker = None
+
+        pending = []
+        while not self._queue.empty():
+            text = self._queue.get_nowait()
+            if text is not _STOP:
+                pending.append(text)
+        if pending:
+            await self._dispatch(pending)
+
+    def encode_sync(self, texts: List[str]) -> np.ndarray:
+        """Blocking batched encode through the cache, for callers already off the event loop"""
+        if self.cache is None:
+            return self.model.encode(texts, batch_size=max(len(texts), 1), convert_to_numpy=True)
+
+        vectors = self.cache.get_many(texts)
+        missing = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+        if missing:
+            encoded = self.model.encode(missing, batch_size=len(missing), convert_to_numpy=True)
+            self.cache.put_many(missing, encoded)
+            fresh = dict(zip(missing, encoded))
+            vectors = [fresh[text] if vector is None else vector for text, vector in zip(texts, vectors)]
+        return np.stack(vectors)
+
+    async def encode(self, text: str) -> np.ndarray:
+        """
+        Embed one text
+
+        Args:
+            text: Text to embed
+
+        Returns:
+            Embedding vector
+
+        Raises:
+            ExecutorOverloadedError: If too many texts are waiting
+        """
+        self._requests += 1
+
+        if self.cache is not None:
+            cached = self.cache.get_memory(text)
+            if cached is not None:
+                return cached
+
+        if not self.running:
+            return (await self.executor.run("embedding", self.encode_sync, [text]))[0]
+
+        future = self._in_flight.get(text)
+        if future is not None:
+            self._coalesced += 1
+            return await asyncio.shield(future)
+
+        if self._queue.qsize() >= self.executor.max_queue_depth:
+            raise ExecutorOverloadedError(
+                f"Embedding queue full ({self._queue.qsize()}/{self.executor.max_queue_depth})"
+            )
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[text] = future
+        await self._queue.put(text)
+        return await asyncio.shield(future)
+
+    async def encode_many(self, texts: List[str]) -> np.ndarray:
+        """Embed several texts; they join the shared batches like single calls"""
+        if not texts:
+            return np.empty((0, self.model.get_sentence_embedding_dimension()), dtype=np.float32)
+        return np.stack(await asyncio.gather(*(self.encode(text) for text in texts)))
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            text = await self._queue.get()
+            if text is _STOP:
+                break
+            batch = [text]
+            deadline = loop.time() + self.max_wait
+
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    text = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if text is _STOP:
+                    stopping = True
+                    break
+                batch.append(text)
+
+            await self._dispatch(batch)
+
+    async def _dispatch(self, texts: List[str]):
+        """Encode one batch and resolve the waiting futures"""
+        self._batches += 1
+        self._batch_sizes[len(texts)] += 1
+
+        try:
+            embeddings = await self.executor.run("embedding", self.encode_sync, texts)
+        except Exception as e:
+            if not isinstance(e, ExecutorOverloadedError):
+                logger.error(f"Error in batched embedding: {e}")
+            for text in texts:
+                future = self._in_flight.pop(text, None)
+                if future is not None and not future.done():
+                    future.set_exception(e)
+            return
+
+        for text, embedding in zip(texts, embeddings):
+            future = self._in_flight.pop(text, None)
+            if future is not None and not future.done():
+                future.set_result(embedding)
+
+    def close(self):
+        if self.cache is not None:
+            self.cache.close()
+
+    def get_metrics(self) -> Dict:
+        """Batch fill, coalescing and cache statistics"""
+        encoded = sum(size * count for size, count in self._batch_sizes.items())
+        average_size = encoded / self._batches if self._batches else 0.0
+        return {
+            'requests': self._requests,
+            'coalesced': self._coalesced,
+            'batches': self._batches,
+            'average_batch_size': average_size,
+            'average_batch_fill': average_size / self.max_batch_size,
+            'batch_size_histogram': dict(sorted(self._batch_sizes.items())),
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000.0,
+            'cache': self.cache.get_metrics() if self.cache is not None else None
+        }
@@ -0,0 +1,271 @@
+"""
+Deferred Emotion Enrichment
+Memory nodes created without emotion scores are stored immediately with
+emotion_pending set; a background worker scores them in batches (one Claude
+request per batch) and fills in valence / arousal afterwards
+"""
+
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import Float, bindparam, text
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+
+from app.core import database
+from app.core.config import settings
+from app.services.memory_subgraph import decode_vectors
+
+logger = logging.getLogger(__name__)
+
+# A batch is claimed with a lease in its own short transaction, so no row
+# lock is held during the Claude request (FOR NO KEY UPDATE does not block
+# the FOR KEY SHARE locks of edge inserts). SKIP LOCKED and the lease let
+# several app processes drain the backlog without scoring the same rows
+# twice; a lease left by a crashed worker expires.
+CLAIM_PENDING_SQL = text("""
+    UPDATE memory_nodes SET emotion_claimed_at = :now
+    WHERE id IN (
+        SELECT id FROM memory_nodes
+        WHERE emotion_pending
+        AND (emotion_claimed_at IS NULL OR emotion_claimed_at < :lease_expired)
+        ORDER BY created_at
+        LIMIT :limit
+        FOR NO KEY UPDATE SKIP LOCKED
+    )
+    RETURNING id, content
+""")
+
+RELEASE_CLAIM_SQL = text("""
+    UPDATE memory_nodes SET emotion_claimed_at = NULL WHERE id = ANY(:ids)
+""").bindparams(bindparam("ids", type_=ARRAY(UUID(as_uuid=True))))
+
+UPDATE_EMOTIONS_SQL = text("""
+    UPDATE memory_nodes n
+    SET valence = e.valence, arousal = e.arousal, emotion_pending = false, emotion_claimed_at = NULL,
+        updated_at = (now() AT TIME ZONE 'utc')
+    FROM unnest(:ids, :valences, :arousals) AS e(id, valence, arousal)
+    WHERE n.id = e.id AND n.emotion_pending
+    RETURNING n.id, n.valence, n.arousal, vector_send(n.embedding)
+""").bindparams(
+    bindparam("ids", type_=ARRAY(UUID(as_uuid=True))),
+    bindparam("valences", type_=ARRAY(Float)),
+    bindparam("arousals", type_=ARRAY(Float))
+)
+
+
+def content_hash(content: str) -> str:
+    return hashlib.blake2b(content.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class EmotionEnricher:
+    """
+    Background scorer for memory nodes with emotion_pending set
+    The pending flag lives in the database, so the backlog survives restarts;
+    scores are cached by content hash so repeated texts cost no request.
+    """
+
+    def __init__(
+        self,
+        claude_client,
+        replica=None,
+        gnn_processor=None,
+        batch_size: int = 20,
+        max_wait: float = 2.0,
+        interval: float = 60.0,
+        cache_size: int = 10000,
+        claim_lease: float = 300.0
+    ):
+        self.claude_client = claude_client
+        self.replica = replica
+        self.gnn_processor = gnn_processor
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.interval = interval
+        self.cache_size = cache_size
+        self.claim_lease = claim_lease
+
+        self._cache: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._wake: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+
+        # Metrics
+        self.batches = 0
+        self.nodes_enriched = 0
+        self.nodes_unscored = 0
+        self.score_requests = 0
+        self.texts_scored = 0
+        self.cache_hits = 0
+        self.failed_batches = 0
+
+    def start(self):
+        """Start the worker on the running event loop"""
+        if self._worker is None:
+            self._wake = asyncio.Event()
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the worker (unscored nodes stay pending for the next start)"""
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+    def notify(self):
+        """Signal that a pending node was created"""
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.interval)
+                # Let concurrent writes accumulate into one batch
+                await asyncio.sleep(self.max_wait)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+            try:
+                while await self.enrich_pending() >= self.batch_size:
+                    pass
+            except Exception as e:
+                logger.error(f"Error enriching memory emotions: {e}")
+
+    async def enrich_pending(self) -> int:
+        """
+        Score one batch of pending nodes
+
+        Returns:
+            Number of nodes claimed (0 when nothing is pending or the
+            request failed; failed nodes stay pending). Nodes Claude left
+            unscored keep their claim and are retried once it expires.
+        """
+        now = datetime.utcnow()
+        async with database.SessionLocal() as db:
+            rows = (await db.execute(
+                CLAIM_PENDING_SQL,
+                {
+                    "now": now,
+                    "lease_expired": now - timedelta(seconds=self.claim_lease),
+                    "limit": self.batch_size
+                }
+            )).fetchall()
+            await db.commit()
+        if not rows:
+            return 0
+
+        # Scored outside any transaction
+        try:
+            scores = await self.score([row[1] for row in rows])
+        except Exception as e:
+            logger.error(f"Error scoring memory emotions: {e}")
+            scores = None
+        if scores is None:
+            self.failed_batches += 1
+            await self._release([row[0] for row in rows])
+            return 0
+
+        scored = [(row[0], score) for row, score in zip(rows, scores) if score is not None]
+        self.nodes_unscored += len(rows) - len(scored)
+        if not scored:
+            self.failed_batches += 1
+            return 0
+
+        async with database.SessionLocal() as db:
+            result = await db.execute(
+                UPDATE_EMOTIONS_SQL,
+                {
+                    "ids": [node_id for node_id, _ in scored],
+                    "valences": [valence for _, (valence, _) in scored],
+                    "arousals": [arousal for _, (_, arousal) in scored]
+                }
+            )
+            updated = result.fetchall()
+            await db.commit()
+
+        self.batches += 1
+        self.nodes_enriched += len(updated)
+        self._write_through(updated)
+        return len(rows)
+
+    async def _release(self, node_ids: List):
+        """Give up a claim so the nodes are retried on the next pass"""
+        try:
+            async with database.SessionLocal() as db:
+                await db.execute(RELEASE_CLAIM_SQL, {"ids": node_ids})
+                await db.commit()
+        except Exception as e:
+            logger.error(f"Error releasing emotion claim: {e}")
+
+    async def score(self, contents: List[str]) -> Optional[List[Optional[Tuple[float, float]]]]:
+        """
+        Valence / arousal per text, from the cache or one batched request
+
+        Returns:
+            Scores in input order (None for a text left unscored), or None
+            if the request failed
+        """
+        keys = [content_hash(content) for content in contents]
+        found: Dict[str, Optional[Tuple[float, float]]] = {}
+        missing: Dict[str, str] = {}
+        for key, content in zip(keys, contents):
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                found[key] = self._cache[key]
+                self.cache_hits += 1
+            else:
+                missing.setdefault(key, content)
+
+        if missing:
+            results = await self.claude_client.analyze_emotions_batch(list(missing.values()))
+            if results is None:
+                return None
+            self.score_requests += 1
+            self.texts_scored += len(missing)
+            for key, emotion in zip(missing, results):
+                if emotion is None:
+                    found[key] = None
+                    continue
+                found[key] = (emotion['valence'], emotion['arousal'])
+                self._remember(key, found[key])
+
+        return [found[key] for key in keys]
+
+    def _remember(self, key: str, scores: Tuple[float, float]):
+        self._cache[key] = scores
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _write_through(self, updated: List[Tuple]):
+        if not updated:
+            return
+        if self.replica is not None:
+            self.replica.update_emotions({str(row[0]): (row[1], row[2]) for row in updated})
+        if self.gnn_processor is not None:
+            embeddings = decode_vectors([row[3] for row in updated], settings.VECTOR_DIMENSION)
+            for row, embedding in zip(updated, embeddings):
+                self.gnn_processor.register_memory_node(str(row[0]), embedding, row[1], row[2])
+
+    def get_metrics(self) -> Dict:
+        """Throughput, request count and cache effectiveness"""
+        lookups = self.cache_hits + self.texts_scored
+        return {
+            'batches': self.batches,
+            'nodes_enriched': self.nodes_enriched,
+            'nodes_unscored': self.nodes_unscored,
+            'score_requests': self.score_requests,
+            'texts_per_request': self.texts_scored / self.score_requests if self.score_requests else 0.0,
+            'cache_hits': self.cache_hits,
+            'cache_hit_rate': self.cache_hits / lookups if lookups else 0.0,
+            'cache_entries': len(self._cache),
+            'failed_batches': self.failed_batches
+        }
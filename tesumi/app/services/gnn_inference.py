@@ -0,0 +1,140 @@
+"""
+Inference-only builds of GraphSAGEMemory
+Folds the length-1 memory attention into a single linear layer, drops
+dropout, and optionally compiles or dynamically int8-quantizes the module
+"""
+
+import copy
+import logging
+from typing import Dict, Optional
+
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+from torch_geometric.data import Data
+
+logger = logging.getLogger(__name__)
+
+INFERENCE_VARIANTS = ("eager", "optimized", "compiled", "int8")
+
+
+def fold_memory_attention(attention: nn.MultiheadAttention) -> nn.Linear:
+    """
+    Replace self-attention over a length-1 sequence with an equivalent linear
+
+    With one key the softmax weight is exactly 1, so the output is
+    out_proj(v_proj(x)) = W_o (W_v x + b_v) + b_o, a single affine map.
+    """
+    embed_dim = attention.embed_dim
+    if attention.in_proj_weight is not None:
+        v_weight = attention.in_proj_weight[2 * embed_dim:]
+    else:
+        v_weight = attention.v_proj_weight
+    v_bias = (
+        attention.in_proj_bias[2 * embed_dim:]
+        if attention.in_proj_bias is not None
+        else torch.zeros(embed_dim)
+    )
+    out_weight = attention.out_proj.weight
+    out_bias = attention.out_proj.bias if attention.out_proj.bias is not None else torch.zeros(embed_dim)
+
+    folded = nn.Linear(embed_dim, embed_dim)
+    with torch.no_grad():
+        folded.weight.copy_(out_weight @ v_weight)
+        folded.bias.copy_(out_weight @ v_bias + out_bias)
+    return folded
+
+
+class InferenceGraphSAGEMemory(nn.Module):
+    """
+    Eval-only GraphSAGEMemory with the same outputs and interface
+    (forward / encode / conv_layer / memory_readout)
+    """
+
+    def __init__(self, model: nn.Module):
+        super().__init__()
+        self.input_dim = model.input_dim
+        self.hidden_dim = model.hidden_dim
+        self.num_layers = model.num_layers
+
+        self.convs = copy.deepcopy(model.convs)
+        self.gru = copy.deepcopy(model.memory_gru.gru)
+        self.memory_projection = fold_memory_attention(model.memory_attention)
+        self.activation_head = copy.deepcopy(model.activation_head)
+        self.emotion_head = copy.deepcopy(model.emotion_head)
+        self.eval()
+
+    def forward(self, data: Data, memory_states: Optional[torch.Tensor] = None):
+        node_embeddings = self.encode(data.x, data.edge_index)
+        return self.memory_readout(node_embeddings, memory_states)
+
+    def encode(self, x: torch.Tensor, edge_index: torch.Tensor) -> torch.Tensor:
+        for i in range(len(self.convs)):
+            x = self.conv_layer(i, x, edge_index)
+        return x
+
+    def conv_layer(self, i: int, x: torch.Tensor, edge_index: torch.Tensor) -> torch.Tensor:
+        x_new = F.relu(self.convs[i](x, edge_index))
+        if i > 0 and x.size(-1) == x_new.size(-1):
+            return x + x_new
+        return x_new
+
+    def memory_readout(
+        self,
+        node_embeddings: torch.Tensor,
+        memory_states: Optional[torch.Tensor] = None
+    ) -> Dict[str, torch.Tensor]:
+        if memory_states is None:
+            memory_states = torch.zeros(
+                node_embeddings.size(0), self.hidden_dim, device=node_embeddings.device
+            )
+        new_memory_states = self.gru(node_embeddings, memory_states)
+        combined_features = node_embeddings + self.memory_projection(new_memory_states)
+
+        return {
+            'node_embeddings': combined_features,
+            'activation_scores': torch.sigmoid(self.activation_head(combined_features)),
+            'emotion_predictions': torch.tanh(self.emotion_head(combined_features)),
+            'memory_states': new_memory_states
+        }
+
+
+def build_inference_model(model: nn.Module, variant: str, device: torch.device) -> nn.Module:
+    """
+    Build the inference module selected by GNN_INFERENCE_VARIANT
+
+    Args:
+        model: Trained GraphSAGEMemory
+        variant: "eager" (model as-is), "optimized" (folded attention, no
+            dropout), "compiled" (optimized + torch.compile) or "int8"
+            (optimized + dynamic int8 quantization of Linear/GRU, CPU only)
+        device: Device the model runs on
+
+    Returns:
+        Module with the GraphSAGEMemory inference interface
+    """
+    if variant not in INFERENCE_VARIANTS:
+        raise ValueError(f"Unknown GNN inference variant: {variant}")
+
+    if variant == "eager":
+        return model
+
+    optimized = InferenceGraphSAGEMemory(model).to(device)
+
+    if variant == "int8":
+        if device.type != "cpu":
+            logger.warning("int8 GNN inference is CPU-only; using optimized variant")
+            return optimized
+        # PyG SAGEConv uses its own Linear and stays fp32
+        return torch.ao.quantization.quantize_dynamic(
+            optimized.cpu(), {nn.Linear, nn.GRUCell}, dtype=torch.qint8
+        )
+
+    if variant == "compiled":
+        try:
+            optimized.encode = torch.compile(optimized.encode, dynamic=True)
+            optimized.memory_readout = torch.compile(optimized.memory_readout, dynamic=True)
+        except Exception as e:
+            logger.warning(f"torch.compile unavailable, using optimized variant: {e}")
+
+    return optimized
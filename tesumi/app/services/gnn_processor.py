@@ -10,10 +10,25 @@ from torch_geometric.nn import SAGEConv, GATConv, global_mean_pool
 from torch_geometric.data import Data, Batch
 import numpy as np
 from typing import List, Dict, Tuple, Optional
+import asyncio
+import heapq
 import logging
+import math
+import threading
 from datetime import datetime, timedelta
 
 from app.core.config import settings
+from app.services.ann_index import IVFIndex, normalize, top_k
+from app.services.memory_snapshot import (
+    acquire_writer_lock,
+    current_snapshot,
+    load_snapshot,
+    release_writer_lock,
+    write_snapshot
+)
+from app.services.memory_state_store import MemoryStateStore
+from app.services.incremental_inference import IncrementalInference
+from app.services.gnn_inference import build_inference_model
 
 logger = logging.getLogger(__name__)
 
@@ -86,23 +101,31 @@ class GraphSAGEMemory(nn.Module):
             emotion_predictions: Predicted valence/arousal
             new_memory_states: Updated memory states
         """
-        x, edge_index = data.x, data.edge_index
-        batch_size = x.size(0)
-        
-        # Graph convolutions with residual connections
-        for i, conv in enumerate(self.convs):
-            x_new = conv(x, edge_index)
-            x_new = F.relu(x_new)
-            x_new = self.dropout(x_new)
-            
-            # Residual connection (if dimensions match)
-            if i > 0 and x.size(-1) == x_new.size(-1):
-                x = x + x_new
-            else:
-                x = x_new
-        
-        node_embeddings = x
-        
+        node_embeddings = self.encode(data.x, data.edge_index)
+        return self.memory_readout(node_embeddings, memory_states)
+    
+    def encode(self, x: torch.Tensor, edge_index: torch.Tensor) -> torch.Tensor:
+        """Run all graph convolution layers"""
+        for i in range(len(self.convs)):
+            x = self.conv_layer(i, x, edge_index)
+        return x
+    
+    def conv_layer(self, i: int, x: torch.Tensor, edge_index: torch.Tensor) -> torch.Tensor:
+        """One graph convolution with residual connection (if dimensions match)"""
+        x_new = self.convs[i](x, edge_index)
+        x_new = F.relu(x_new)
+        x_new = self.dropout(x_new)
+        
+        if i > 0 and x.size(-1) == x_new.size(-1):
+            return x + x_new
+        return x_new
+    
+    def memory_readout(
+        self,
+        node_embeddings: torch.Tensor,
+        memory_states: Optional[torch.Tensor] = None
+    ) -> Dict[str, torch.Tensor]:
+        """Update node memory with the GRU and produce the output heads"""
         # Update internal memory using GRU
         if memory_states is not None:
             new_memory_states = self.memory_gru(node_embeddings, memory_states)
@@ -136,31 +159,100 @@ class ExternalMemory:
     """
     Key-Value external memory structure
     Stores and retrieves past memories based on queries
+    Keys are stored pre-normalized in an IVF index for approximate top-k reads
+    (its centroids are fitted in the background by GNNProcessor)
     """
     
-    def __init__(self, memory_size: int = 1000, key_dim: int = 128):
+    def __init__(
+        self,
+        memory_size: int = 1000,
+        key_dim: int = 128,
+        decay_factor: float = settings.MEMORY_DECAY_FACTOR
+    ):
         self.memory_size = memory_size
         self.key_dim = key_dim
+        self.decay_factor = decay_factor
+        
+        # Key index (owns the normalized key matrix)
+        self.index = IVFIndex(
+            capacity=memory_size,
+            dim=key_dim,
+            n_lists=settings.EXTERNAL_MEMORY_ANN_LISTS,
+            n_probe=settings.EXTERNAL_MEMORY_ANN_PROBES,
+            min_train_size=settings.EXTERNAL_MEMORY_ANN_MIN_TRAIN,
+            retrain_ratio=settings.EXTERNAL_MEMORY_ANN_RETRAIN_RATIO
+        )
         
         # Initialize memory matrices
-        self.keys = np.zeros((memory_size, key_dim))
+        self.keys = self.index.vectors
         self.values = np.zeros((memory_size, key_dim))
-        self.usage = np.zeros(memory_size)
         self.current_size = 0
         
+        # Lazily decayed usage: usage = base * decay^(clock - stamp).
+        # Eviction order only changes when a slot's usage is touched, so it
+        # is kept in a min-heap of log-usage scores with lazy invalidation.
+        self._usage_base = np.zeros(memory_size)
+        self._usage_stamp = np.zeros(memory_size, dtype=np.int64)
+        self._usage_score = np.full(memory_size, -np.inf)
+        self._usage_heap: List[Tuple[float, int]] = []
+        self._clock = 0
+        self._log_decay = math.log(decay_factor)
+        
+        # Bumped by writes, read-driven usage updates and decay steps, so
+        # snapshots notice every change to the persisted state
+        self.version = 0
+        
+        # Set when attached to a shared read-only snapshot
+        self.read_only = False
+    
+    @property
+    def usage(self) -> np.ndarray:
+        """Current (decayed) usage of every slot"""
+        return self._usage_base * self.decay_factor ** (self._clock - self._usage_stamp)
+    
+    def decay(self):
+        """Apply one decay step to all usage values in O(1)"""
+        self._clock += 1
+        self.version += 1
+    
+    def _set_usage(self, idx: int, value: float):
+        score = math.log(value) - self._clock * self._log_decay
+        self._usage_base[idx] = value
+        self._usage_stamp[idx] = self._clock
+        self._usage_score[idx] = score
+        self.version += 1
+        heapq.heappush(self._usage_heap, (score, idx))
+        
+        # Drop stale heap entries once they dominate
+        if len(self._usage_heap) > 2 * self.current_size + 64:
+            self._usage_heap = [
+                (score, idx) for idx, score in enumerate(self._usage_score[:self.current_size])
+            ]
+            heapq.heapify(self._usage_heap)
+    
+    def _least_used_slot(self) -> int:
+        while True:
+            score, idx = self._usage_heap[0]
+            if self._usage_score[idx] == score:
+                return idx
+            heapq.heappop(self._usage_heap)
+        
     def write(self, key: np.ndarray, value: np.ndarray):
         """Write a key-value pair to memory"""
+        if self.read_only:
+            raise RuntimeError("External memory is attached read-only")
+        
         if self.current_size < self.memory_size:
             # Add to next available slot
             idx = self.current_size
             self.current_size += 1
         else:
             # Replace least used memory
-            idx = np.argmin(self.usage)
+            idx = self._least_used_slot()
         
-        self.keys[idx] = key
+        self.index.set(idx, key)
         self.values[idx] = value
-        self.usage[idx] = 1.0
+        self._set_usage(idx, 1.0)
         
         return idx
     
@@ -179,21 +271,108 @@ class ExternalMemory:
         if self.current_size == 0:
             return np.zeros((k, self.key_dim)), np.zeros(k)
         
-        # Calculate similarities
-        similarities = np.dot(self.keys[:self.current_size], query)
-        similarities = similarities / (np.linalg.norm(self.keys[:self.current_size], axis=1) + 1e-8)
-        similarities = similarities / (np.linalg.norm(query) + 1e-8)
-        
         # Get top-k most similar
-        top_k_indices = np.argsort(similarities)[::-1][:k]
+        top_k_indices, retrieved_similarities = self.index.search(query, k)
+        
+        # Update usage (a read-only replica leaves usage to the writer)
+        if self.read_only:
+            return self.values[top_k_indices], retrieved_similarities
         
-        # Update usage
-        self.usage[top_k_indices] += 0.1
+        current_usage = self._usage_base[top_k_indices] * self.decay_factor ** (
+            self._clock - self._usage_stamp[top_k_indices]
+        )
+        for idx, value in zip(top_k_indices, current_usage):
+            self._set_usage(int(idx), float(value) + 0.1)
         
         retrieved_values = self.values[top_k_indices]
-        retrieved_similarities = similarities[top_k_indices]
         
         return retrieved_values, retrieved_similarities
+    
+    def exact_read(self, query: np.ndarray, k: int = 5) -> Tuple[np.ndarray, np.ndarray]:
+        """Exact full-scan top-k, without usage updates (for recall checks)"""
+        query = normalize(query)
+        similarities = self.keys[:self.current_size] @ query
+        top_k_indices = top_k(similarities, k)
+        return top_k_indices, similarities[top_k_indices]
+
+    
+    def snapshot_state(self) -> Tuple[Dict[str, np.ndarray], Dict]:
+        """Copy the memory state for a snapshot (arrays, scalar metadata)"""
+        size = self.current_size
+        arrays = {
+            'keys': np.array(self.keys),
+            'values': np.array(self.values),
+            'usage_base': np.array(self._usage_base),
+            'usage_stamp': np.array(self._usage_stamp),
+            'assignments': np.array(self.index.assignments),
+        }
+        if self.index.centroids is not None:
+            arrays['centroids'] = np.array(self.index.centroids)
+        
+        meta = {
+            'memory_size': self.memory_size,
+            'key_dim': self.key_dim,
+            'current_size': size,
+            'clock': self._clock,
+            'index_size': self.index.size,
+            'index_trained_size': self.index._trained_size,
+            'index_replacements': self.index.replacements,
+        }
+        return arrays, meta
+    
+    def restore(self, directory: str, read_only: bool = False) -> Optional[str]:
+        """
+        Attach to the latest snapshot in a directory as memory-mapped arrays
+        
+        Args:
+            directory: Snapshot directory
+            read_only: Share the snapshot pages read-only (no writes, no usage updates)
+            
+        Returns:
+            Name of the attached snapshot, or None if there is none (the
+            memory keeps its contents but still takes the requested mode)
+        """
+        # Set first: a follower without a snapshot must not take local
+        # writes that re-attaching to the writer's snapshot would discard
+        self.read_only = read_only
+        snapshot = load_snapshot(directory, read_only=read_only)
+        if snapshot is None:
+            return None
+        
+        name, arrays, meta = snapshot
+        if meta['memory_size'] != self.memory_size or meta['key_dim'] != self.key_dim:
+            logger.warning(
+                f"Ignoring external memory snapshot {name}: shape "
+                f"({meta['memory_size']}, {meta['key_dim']}) != ({self.memory_size}, {self.key_dim})"
+            )
+            return None
+        
+        self.index.attach(
+            arrays['keys'],
+            arrays['assignments'],
+            arrays.get('centroids'),
+            meta['index_size'],
+            meta['index_trained_size'],
+            meta.get('index_replacements', 0)
+        )
+        self.keys = self.index.vectors
+        
+        self.values = arrays['values']
+        self._usage_base = arrays['usage_base']
+        self._usage_stamp = arrays['usage_stamp']
+        self.current_size = meta['current_size']
+        self._clock = meta['clock']
+        
+        # Rebuild the eviction heap from the restored usage
+        with np.errstate(divide='ignore'):
+            self._usage_score = np.log(self._usage_base) - self._usage_stamp * self._log_decay
+        self._usage_heap = [
+            (score, idx) for idx, score in enumerate(self._usage_score[:self.current_size])
+        ]
+        heapq.heapify(self._usage_heap)
+        
+        logger.info(f"Attached external memory snapshot {name} ({self.current_size} entries)")
+        return name
 
 
 class GNNProcessor:
@@ -213,21 +392,192 @@ class GNNProcessor:
             dropout=settings.GNN_DROPOUT
         ).to(self.device)
         
-        # Initialize external memory
+        # Inference build of the model (see GNN_INFERENCE_VARIANT)
+        self.inference_model = build_inference_model(
+            self.model, settings.GNN_INFERENCE_VARIANT, self.device
+        )
+        
+        # Initialize external memory (keyed by sentence embeddings)
         self.external_memory = ExternalMemory(
             memory_size=settings.MAX_MEMORY_NODES,
-            key_dim=settings.GNN_HIDDEN_DIM
+            key_dim=settings.VECTOR_DIMENSION
+        )
+        
+        # Attach to the last external memory snapshot, if any. One process
+        # per directory (the flock holder) writes snapshots; the others
+        # follow it read-only and take over if it exits. Followers skip
+        # interaction writes: only the writer's interactions are kept.
+        self._snapshot_name = None
+        self._snapshot_version = None
+        self._snapshot_lock: Optional[int] = None
+        self._snapshot_task: Optional[asyncio.Task] = None
+        if settings.EXTERNAL_MEMORY_DIR:
+            try:
+                if not settings.EXTERNAL_MEMORY_READ_ONLY:
+                    self._snapshot_lock = acquire_writer_lock(settings.EXTERNAL_MEMORY_DIR)
+                self._snapshot_name = self.external_memory.restore(
+                    settings.EXTERNAL_MEMORY_DIR,
+                    read_only=self._snapshot_lock is None
+                )
+            except Exception as e:
+                logger.error(f"Error restoring external memory snapshot: {e}")
+        
+        # Memory states for each node (seeded from and persisted to DB)
+        self.state_store = MemoryStateStore(
+            capacity=settings.GNN_STATE_CAPACITY,
+            hidden_dim=settings.GNN_HIDDEN_DIM
+        )
+        
+        # Background refit of the external memory's IVF centroids
+        self._index_task: Optional[asyncio.Task] = None
+        
+        # Layer-wise representation cache for incremental inference
+        self.incremental = (
+            IncrementalInference(self.inference_model, cache_size=settings.GNN_INCREMENTAL_CACHE_SIZE)
+            if settings.GNN_INCREMENTAL_INFERENCE else None
         )
         
-        # Memory states for each node (will be loaded from DB)
-        self.node_memory_states = {}
+        # Serializes model, external memory and incremental cache access across executor threads
+        self._lock = threading.Lock()
+        
+        # Interactions not written because this process follows the snapshot writer
+        self.skipped_interaction_writes = 0
         
         logger.info(f"GNN Processor initialized on device: {self.device}")
     
+    def start(self):
+        """Start background persistence tasks"""
+        self.state_store.start()
+        if self._index_task is None:
+            self._index_task = asyncio.create_task(
+                self._index_train_loop(settings.EXTERNAL_MEMORY_ANN_TRAIN_INTERVAL)
+            )
+        if settings.EXTERNAL_MEMORY_DIR and self._snapshot_task is None:
+            self._snapshot_task = asyncio.create_task(
+                self._snapshot_loop(settings.EXTERNAL_MEMORY_SNAPSHOT_INTERVAL)
+            )
+    
+    async def stop(self):
+        """Stop background tasks, writing a final snapshot and pending states"""
+        if self._index_task is not None:
+            self._index_task.cancel()
+            try:
+                await self._index_task
+            except asyncio.CancelledError:
+                pass
+            self._index_task = None
+        
+        if self._snapshot_task is not None:
+            self._snapshot_task.cancel()
+            try:
+                await self._snapshot_task
+            except asyncio.CancelledError:
+                pass
+            self._snapshot_task = None
+            
+            try:
+                await self.snapshot_external_memory()
+            except Exception as e:
+                logger.error(f"Error writing external memory snapshot: {e}")
+        
+        if self._snapshot_lock is not None:
+            release_writer_lock(self._snapshot_lock)
+            self._snapshot_lock = None
+        
+        await self.state_store.stop()
+    
+    async def snapshot_external_memory(self) -> Optional[str]:
+        """Atomically snapshot external memory if it changed since the last one"""
+        memory = self.external_memory
+        if not settings.EXTERNAL_MEMORY_DIR or self._snapshot_lock is None or memory.read_only:
+            return None
+        
+        version = memory.version
+        if version == self._snapshot_version:
+            return None
+        
+        arrays, meta = await asyncio.to_thread(self._copy_external_memory)
+        name = await asyncio.to_thread(
+            write_snapshot, settings.EXTERNAL_MEMORY_DIR, arrays, meta
+        )
+        self._snapshot_name = name
+        self._snapshot_version = version
+        logger.info(f"Wrote external memory snapshot {name}")
+        return name
+    
+    def _copy_external_memory(self) -> Tuple[Dict[str, np.ndarray], Dict]:
+        with self._lock:
+            return self.external_memory.snapshot_state()
+    
+    async def _snapshot_loop(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if self._snapshot_lock is None and not settings.EXTERNAL_MEMORY_READ_ONLY:
+                    # Take over from a writer that exited
+                    self._snapshot_lock = await asyncio.to_thread(
+                        acquire_writer_lock, settings.EXTERNAL_MEMORY_DIR
+                    )
+                    if self._snapshot_lock is not None:
+                        with self._lock:
+                            self._snapshot_name = self.external_memory.restore(
+                                settings.EXTERNAL_MEMORY_DIR, read_only=False
+                            ) or self._snapshot_name
+                            self.external_memory.read_only = False
+                        logger.info("Took over as external memory snapshot writer")
+                
+                if self._snapshot_lock is None:
+                    # Follow the writer: re-attach when a newer snapshot appears
+                    latest = current_snapshot(settings.EXTERNAL_MEMORY_DIR)
+                    if latest is not None and latest != self._snapshot_name:
+                        with self._lock:
+                            self._snapshot_name = self.external_memory.restore(
+                                settings.EXTERNAL_MEMORY_DIR, read_only=True
+                            )
+                else:
+                    await self.snapshot_external_memory()
+            except Exception as e:
+                logger.error(f"Error in external memory snapshot task: {e}")
+    
+    async def _index_train_loop(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.train_external_index)
+            except Exception as e:
+                logger.error(f"Error training external memory index: {e}")
+    
+    def train_external_index(self) -> bool:
+        """
+        Refit the external memory's IVF centroids once enough slots were
+        added or replaced; k-means runs on a copy without holding the lock
+        
+        Returns:
+            Whether new centroids were installed
+        """
+        with self._lock:
+            memory = self.external_memory
+            if memory.read_only or not memory.index.needs_training:
+                return False
+            index = memory.index
+            data = index.prepare_training()
+        
+        fitted = index.fit(data)
+        
+        with self._lock:
+            if memory.read_only:
+                return False
+            return index.install(*fitted)
+    
     def create_graph_data(self, memory_nodes: List[Dict], memory_edges: List[Dict]) -> Data:
         """
         Create PyTorch Geometric Data object from memory nodes and edges
         
+        Node features are written straight into one preallocated float32 buffer
+        and node UUIDs are mapped to rows with array ops. Edges are rebuilt
+        on every call: a cache key covering the edge set would cost about as
+        much as the build itself.
+        
         Args:
             memory_nodes: List of memory node dictionaries
             memory_edges: List of memory edge dictionaries
@@ -240,47 +590,69 @@ class GNNProcessor:
             return Data(x=torch.empty(0, settings.VECTOR_DIMENSION + 2), 
                        edge_index=torch.empty(2, 0, dtype=torch.long))
         
-        # Create node feature matrix
-        node_features = []
-        node_id_to_idx = {}
-        
-        for i, node in enumerate(memory_nodes):
-            # Combine embedding with valence/arousal
-            embedding = np.array(node['embedding'])
-            valence = node.get('valence', 0.0)
-            arousal = node.get('arousal', 0.0)
-            
-            features = np.concatenate([embedding, [valence, arousal]])
-            node_features.append(features)
-            node_id_to_idx[str(node['id'])] = i
-        
-        x = torch.tensor(node_features, dtype=torch.float32)
-        
-        # Create edge index
-        edge_indices = [[], []]
-        edge_weights = []
-        
-        for edge in memory_edges:
-            source_id = str(edge['source_id'])
-            target_id = str(edge['target_id'])
-            
-            if source_id in node_id_to_idx and target_id in node_id_to_idx:
-                source_idx = node_id_to_idx[source_id]
-                target_idx = node_id_to_idx[target_id]
-                
-                edge_indices[0].append(source_idx)
-                edge_indices[1].append(target_idx)
-                edge_weights.append(edge['weight'])
-                
-                # Add reverse edge for undirected graph
-                edge_indices[0].append(target_idx)
-                edge_indices[1].append(source_idx)
-                edge_weights.append(edge['weight'])
-        
-        edge_index = torch.tensor(edge_indices, dtype=torch.long)
-        edge_attr = torch.tensor(edge_weights, dtype=torch.float32)
+        num_nodes = len(memory_nodes)
+        embedding_dim = len(memory_nodes[0]['embedding'])
+        
+        # Create node feature matrix: [embedding | valence | arousal]
+        x = np.empty((num_nodes, embedding_dim + 2), dtype=np.float32)
+        x[:, :embedding_dim] = np.asarray([node['embedding'] for node in memory_nodes], dtype=np.float32)
+        x[:, embedding_dim] = [node.get('valence', 0.0) for node in memory_nodes]
+        x[:, embedding_dim + 1] = [node.get('arousal', 0.0) for node in memory_nodes]
+        
+        node_ids = [str(node['id']) for node in memory_nodes]
+        edge_index, edge_attr = self._build_edge_tensors(
+            node_ids,
+            [str(edge['source_id']) for edge in memory_edges],
+            [str(edge['target_id']) for edge in memory_edges],
+            [edge['weight'] for edge in memory_edges]
+        )
         
-        return Data(x=x, edge_index=edge_index, edge_attr=edge_attr)
+        return Data(x=torch.from_numpy(x), edge_index=edge_index, edge_attr=edge_attr)
+    
+    @staticmethod
+    def _build_edge_tensors(
+        node_ids: List[str],
+        source_ids: List[str],
+        target_ids: List[str],
+        weights: List[float]
+    ) -> Tuple[torch.Tensor, torch.Tensor]:
+        """Map edge endpoints to node rows and build undirected edge tensors"""
+        if not source_ids:
+            return torch.empty(2, 0, dtype=torch.long), torch.empty(0, dtype=torch.float32)
+        
+        # Map UUIDs to rows via a sorted id array
+        ids = np.asarray(node_ids)
+        order = np.argsort(ids, kind="stable")
+        sorted_ids = ids[order]
+        
+        sources = np.asarray(source_ids)
+        targets = np.asarray(target_ids)
+        source_pos = np.minimum(np.searchsorted(sorted_ids, sources), len(ids) - 1)
+        target_pos = np.minimum(np.searchsorted(sorted_ids, targets), len(ids) - 1)
+        
+        # Keep only edges with both endpoints inside the subgraph
+        valid = (sorted_ids[source_pos] == sources) & (sorted_ids[target_pos] == targets)
+        source_idx = order[source_pos[valid]]
+        target_idx = order[target_pos[valid]]
+        edge_weights = np.asarray(weights, dtype=np.float32)[valid]
+        
+        # Collapse self-loops, parallel and reverse edges into one undirected
+        # edge per pair (first one wins), matching IncrementalInference's graph
+        low = np.minimum(source_idx, target_idx)
+        high = np.maximum(source_idx, target_idx)
+        _, first = np.unique(low * len(ids) + high, return_index=True)
+        first = np.sort(first[low[first] != high[first]])
+        source_idx, target_idx, edge_weights = source_idx[first], target_idx[first], edge_weights[first]
+        
+        # Interleave forward and reverse edges for undirected graph
+        edge_index = np.empty((2, 2 * len(source_idx)), dtype=np.int64)
+        edge_index[0, 0::2] = source_idx
+        edge_index[0, 1::2] = target_idx
+        edge_index[1, 0::2] = target_idx
+        edge_index[1, 1::2] = source_idx
+        edge_attr = np.repeat(edge_weights, 2)
+        
+        return torch.from_numpy(edge_index), torch.from_numpy(edge_attr)
     
     def activate_memories(
         self,
@@ -301,62 +673,229 @@ class GNNProcessor:
         Returns:
             List of activated memory nodes with scores
         """
+        return self.activate_memories_batch(
+            [(memory_nodes, memory_edges, query_embedding, top_k)]
+        )[0]
+    
+    def activate_memories_batch(
+        self,
+        requests: List[Tuple[List[Dict], List[Dict], np.ndarray, int]]
+    ) -> List[List[Dict]]:
+        """
+        Activate memories for several queries with a single GNN forward pass
+        
+        Each request's subgraph becomes one graph of a PyG Batch; the graphs
+        are disjoint, so per-node outputs match separate forward passes.
+        
+        Args:
+            requests: (memory_nodes, memory_edges, query_embedding, top_k) per query
+            
+        Returns:
+            Activated memory nodes with scores, one list per request
+        """
+        with self._lock:
+            return self._activate_memories_batch(requests)
+    
+    def _activate_memories_batch(
+        self,
+        requests: List[Tuple[List[Dict], List[Dict], np.ndarray, int]]
+    ) -> List[List[Dict]]:
+        results: List[List[Dict]] = [[] for _ in requests]
         try:
-            if not memory_nodes:
-                return []
+            active = [i for i, request in enumerate(requests) if request[0]]
+            if not active:
+                return results
             
             # Create graph data
-            graph_data = self.create_graph_data(memory_nodes, memory_edges)
-            graph_data = graph_data.to(self.device)
+            graphs = []
+            node_ids = []
+            initial_states = []
+            ptr = [0]
+            for i in active:
+                memory_nodes, memory_edges = requests[i][0], requests[i][1]
+                graph_data = self.create_graph_data(memory_nodes, memory_edges)
+                request_node_ids = [str(node['id']) for node in memory_nodes]
+                if self.incremental is not None:
+                    self.incremental.observe(
+                        request_node_ids,
+                        graph_data.x,
+                        ((str(edge['source_id']), str(edge['target_id'])) for edge in memory_edges)
+                    )
+                graphs.append(graph_data)
+                node_ids.extend(request_node_ids)
+                initial_states.extend(node.get('gru_state') for node in memory_nodes)
+                ptr.append(len(node_ids))
             
-            # Get current memory states
-            memory_states = self._get_memory_states([str(node['id']) for node in memory_nodes])
+            # Requests may share nodes: each node's state is read and written once
+            unique_ids, unique_initial, inverse = self._dedupe_node_ids(node_ids, initial_states)
+            memory_states = self._get_memory_states(unique_ids, unique_initial)
             
             # Forward pass through GNN
             with torch.no_grad():
-                self.model.eval()
-                output = self.model(graph_data, memory_states)
+                self.inference_model.eval()
+                if self.incremental is not None:
+                    # Representations depend only on the node, so run the GRU per unique node
+                    node_representations = self.incremental.encode(unique_ids, self.device)
+                    output = self.inference_model.memory_readout(node_representations, memory_states)
+                    new_states = output['memory_states']
+                    activation_scores = output['activation_scores'].index_select(0, inverse.to(self.device))
+                else:
+                    if memory_states is not None:
+                        memory_states = memory_states.index_select(0, inverse.to(self.device))
+                    graph_batch = Batch.from_data_list(graphs).to(self.device)
+                    output = self.inference_model(graph_batch, memory_states)
+                    # A node seen in several subgraphs gets the mean of its updates
+                    new_states = self._merge_duplicate_states(
+                        output['memory_states'], inverse, len(unique_ids)
+                    )
+                    activation_scores = output['activation_scores']
             
             # Update memory states
-            self._update_memory_states(
-                [str(node['id']) for node in memory_nodes],
-                output['memory_states']
-            )
+            self._update_memory_states(unique_ids, new_states)
             
-            # Calculate activation scores based on similarity to query
-            node_embeddings = output['node_embeddings'].cpu().numpy()
-            activation_scores = output['activation_scores'].cpu().numpy().flatten()
+            activation_scores = activation_scores.cpu().numpy().flatten()
             
-            # Compute similarity to query
-            similarities = np.dot(node_embeddings, query_embedding)
-            similarities = similarities / (np.linalg.norm(node_embeddings, axis=1) + 1e-8)
-            similarities = similarities / (np.linalg.norm(query_embedding) + 1e-8)
+            # Scatter outputs back to each request
+            for position, i in enumerate(active):
+                memory_nodes, _, query_embedding, top_k = requests[i]
+                start, end = ptr[position], ptr[position + 1]
+                try:
+                    results[i] = self._rank_activations(
+                        memory_nodes,
+                        graphs[position].x[:, :-2].numpy(),
+                        activation_scores[start:end],
+                        query_embedding,
+                        top_k
+                    )
+                except Exception as e:
+                    logger.error(f"Error in memory activation: {e}")
             
-            # Combine GNN activation with similarity
-            final_scores = 0.7 * similarities + 0.3 * activation_scores
-            
-            # Get top-k activated memories
-            top_indices = np.argsort(final_scores)[::-1][:top_k]
-            
-            activated_memories = []
-            for idx in top_indices:
-                if idx < len(memory_nodes):
-                    memory = memory_nodes[idx].copy()
-                    memory['activation_score'] = float(final_scores[idx])
-                    memory['similarity_score'] = float(similarities[idx])
-                    activated_memories.append(memory)
-            
-            # Query external memory for additional context
-            external_memories, _ = self.external_memory.read(
-                query_embedding, k=min(3, len(activated_memories))
-            )
-            
-            logger.info(f"Activated {len(activated_memories)} memories")
-            return activated_memories
+            return results
             
         except Exception as e:
             logger.error(f"Error in memory activation: {e}")
-            return []
+            return [[] for _ in requests]
+    
+    @staticmethod
+    def _dedupe_node_ids(
+        node_ids: List[str],
+        initial_states: List[Optional[List[float]]]
+    ) -> Tuple[List[str], List[Optional[List[float]]], torch.Tensor]:
+        """
+        Collapse repeated node IDs across a micro-batch
+        
+        Returns:
+            (unique IDs, their persisted states, row -> unique index map)
+        """
+        positions: Dict[str, int] = {}
+        unique_ids: List[str] = []
+        unique_initial: List[Optional[List[float]]] = []
+        inverse = []
+        for node_id, initial in zip(node_ids, initial_states):
+            position = positions.get(node_id)
+            if position is None:
+                position = positions[node_id] = len(unique_ids)
+                unique_ids.append(node_id)
+                unique_initial.append(initial)
+            elif unique_initial[position] is None:
+                unique_initial[position] = initial
+            inverse.append(position)
+        return unique_ids, unique_initial, torch.as_tensor(inverse, dtype=torch.long)
+    
+    @staticmethod
+    def _merge_duplicate_states(
+        states: torch.Tensor,
+        inverse: torch.Tensor,
+        num_unique: int
+    ) -> torch.Tensor:
+        """Average per-row states into one state per unique node"""
+        if num_unique == states.size(0):
+            return states
+        inverse = inverse.to(states.device)
+        merged = torch.zeros(num_unique, states.size(1), device=states.device, dtype=states.dtype)
+        merged.index_add_(0, inverse, states)
+        counts = torch.bincount(inverse, minlength=num_unique).clamp_(min=1)
+        return merged / counts.unsqueeze(1).to(states.dtype)
+    
+    def _rank_activations(
+        self,
+        memory_nodes: List[Dict],
+        content_embeddings: np.ndarray,
+        activation_scores: np.ndarray,
+        query_embedding: np.ndarray,
+        top_k: int
+    ) -> List[Dict]:
+        """Score one subgraph's GNN outputs against its query and pick the top-k"""
+        # Compute similarity to query (in sentence-embedding space; the GNN
+        # outputs are GNN_HIDDEN_DIM-dimensional and not comparable to it)
+        similarities = np.dot(content_embeddings, query_embedding)
+        similarities = similarities / (np.linalg.norm(content_embeddings, axis=1) + 1e-8)
+        similarities = similarities / (np.linalg.norm(query_embedding) + 1e-8)
+        
+        # Combine GNN activation with similarity
+        final_scores = 0.7 * similarities + 0.3 * activation_scores
+        
+        # Get top-k activated memories
+        top_indices = np.argsort(final_scores)[::-1][:top_k]
+        
+        activated_memories = []
+        for idx in top_indices:
+            if idx < len(memory_nodes):
+                memory = memory_nodes[idx].copy()
+                memory.pop('gru_state', None)
+                memory.pop('embedding', None)
+                memory['activation_score'] = float(final_scores[idx])
+                memory['similarity_score'] = float(similarities[idx])
+                activated_memories.append(memory)
+        
+        # Query external memory for additional context
+        external_memories, _ = self.external_memory.read(
+            query_embedding, k=min(3, len(activated_memories))
+        )
+        
+        logger.info(f"Activated {len(activated_memories)} memories")
+        return activated_memories
+    
+    def register_memory_node(
+        self,
+        node_id: str,
+        embedding: np.ndarray,
+        valence: float,
+        arousal: float
+    ):
+        """Write-through for a newly created memory node (incremental inference)"""
+        if self.incremental is None:
+            return
+        
+        features = np.empty(len(embedding) + 2, dtype=np.float32)
+        features[:-2] = embedding
+        features[-2:] = [valence, arousal]
+        with self._lock:
+            self.incremental.observe([str(node_id)], torch.from_numpy(features).unsqueeze(0), ())
+    
+    def register_memory_edges(self, edges: List[Tuple[str, str]]):
+        """Write-through for newly created memory edges (incremental inference)"""
+        if self.incremental is None or not edges:
+            return
+        
+        with self._lock:
+            self.incremental.add_edges((str(source), str(target)) for source, target in edges)
+    
+    def reset_memory_edges(self):
+        """Drop cached adjacency after memory edges were removed or rebuilt"""
+        if self.incremental is None:
+            return
+        
+        with self._lock:
+            self.incremental.clear_edges()
+    
+    def forget_memory_nodes(self, node_ids: List[str]):
+        """Drop per-node state for deleted memory nodes"""
+        node_ids = [str(node_id) for node_id in node_ids]
+        self.state_store.discard(node_ids)
+        if self.incremental is not None:
+            with self._lock:
+                self.incremental.remove_nodes(node_ids)
     
     def update_memory_with_interaction(
         self,
@@ -368,6 +907,10 @@ class GNNProcessor:
         """
         Update memory system with new interaction
         
+        A process following another process's external memory snapshots
+        (read-only) skips the write; external memory then holds only the
+        interactions seen by the snapshot writer.
+        
         Args:
             user_input: User's input message
             system_response: System's response
@@ -379,32 +922,32 @@ class GNNProcessor:
             interaction_key = embedding
             interaction_value = embedding  # Could be enhanced with more context
             
-            self.external_memory.write(interaction_key, interaction_value)
-            
-            # Apply memory decay to existing memories
-            self._apply_memory_decay()
+            with self._lock:
+                if self.external_memory.read_only:
+                    self.skipped_interaction_writes += 1
+                    logger.debug("Skipped external memory write (following the snapshot writer)")
+                    return
+                
+                self.external_memory.write(interaction_key, interaction_value)
+                
+                # Apply memory decay to existing memories
+                self._apply_memory_decay()
             
             logger.info("Memory updated with new interaction")
             
         except Exception as e:
             logger.error(f"Error updating memory: {e}")
     
-    def _get_memory_states(self, node_ids: List[str]) -> Optional[torch.Tensor]:
+    def _get_memory_states(
+        self,
+        node_ids: List[str],
+        initial_states: Optional[List[Optional[List[float]]]] = None
+    ) -> Optional[torch.Tensor]:
         """Get memory states for given node IDs"""
         try:
-            states = []
-            for node_id in node_ids:
-                if node_id in self.node_memory_states:
-                    states.append(self.node_memory_states[node_id])
-                else:
-                    # Initialize random state
-                    state = torch.randn(settings.GNN_HIDDEN_DIM)
-                    self.node_memory_states[node_id] = state
-                    states.append(state)
-            
-            if states:
-                return torch.stack(states).to(self.device)
-            return None
+            if not node_ids:
+                return None
+            return self.state_store.gather(node_ids, initial_states).to(self.device)
             
         except Exception as e:
             logger.error(f"Error getting memory states: {e}")
@@ -413,32 +956,27 @@ class GNNProcessor:
     def _update_memory_states(self, node_ids: List[str], new_states: torch.Tensor):
         """Update memory states for given node IDs"""
         try:
-            new_states_cpu = new_states.cpu()
-            for i, node_id in enumerate(node_ids):
-                if i < new_states_cpu.size(0):
-                    self.node_memory_states[node_id] = new_states_cpu[i]
+            self.state_store.scatter(node_ids, new_states)
                     
         except Exception as e:
             logger.error(f"Error updating memory states: {e}")
     
     def _apply_memory_decay(self):
         """Apply decay factor to memory usage"""
-        self.external_memory.usage *= settings.MEMORY_DECAY_FACTOR
-        
-        # Clean up very low usage memories
-        threshold = 0.01
-        low_usage_indices = np.where(self.external_memory.usage < threshold)[0]
-        if len(low_usage_indices) > 0:
-            # Reset low usage memories
-            for idx in low_usage_indices[:len(low_usage_indices)//2]:  # Reset half
-                self.external_memory.usage[idx] = 0.0
+        self.external_memory.decay()
     
     def get_memory_statistics(self) -> Dict:
         """Get statistics about memory usage"""
         return {
-            'total_nodes': len(self.node_memory_states),
+            'total_nodes': len(self.state_store),
+            'state_store_capacity': self.state_store.capacity,
+            'pending_state_writes': self.state_store.pending_count,
+            'incremental_inference': self.incremental.get_metrics() if self.incremental else None,
             'external_memory_usage': self.external_memory.current_size,
             'external_memory_capacity': self.external_memory.memory_size,
+            'external_memory_read_only': self.external_memory.read_only,
+            'skipped_interaction_writes': self.skipped_interaction_writes,
             'average_memory_usage': np.mean(self.external_memory.usage),
+            'inference_variant': settings.GNN_INFERENCE_VARIANT,
             'device': str(self.device)
         }
@@ -0,0 +1,244 @@
+"""
+Incremental GNN inference
+Caches per-layer node representations over the known memory graph and
+recomputes only the k-hop neighbourhood of nodes and edges that changed
+"""
+
+import logging
+from collections import OrderedDict, deque
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import torch
+
+logger = logging.getLogger(__name__)
+
+
+class IncrementalInference:
+    """
+    Layer-wise representation cache for GraphSAGEMemory convolutions
+
+    Representations are computed over the graph of every node the processor
+    knows (features from searched subgraphs and newly created memories, edges
+    from searches and similarity-edge creation), not only the induced
+    candidate subgraph of one query. h^l of a node depends on nodes within l
+    hops, so:
+      - a new or changed edge (u, v) invalidates layer l for nodes within
+        l - 1 hops of u or v;
+      - a new or changed node feature invalidates layer l for nodes within
+        l hops of that node.
+    A query then computes only the invalidated or never-seen rows per layer.
+
+    The known graph is a simple undirected graph (parallel and reverse edges
+    collapse, as in GNNProcessor._build_edge_tensors) and holds at most
+    cache_size nodes; the least recently used node is forgotten like a
+    deleted one and is re-observed with the next subgraph containing it.
+    """
+
+    def __init__(self, model, cache_size: int = 10000):
+        self.model = model
+        self.num_layers = len(model.convs)
+        self.cache_size = cache_size
+
+        # Known memory graph; _recency orders its nodes for eviction
+        self.features: Dict[str, torch.Tensor] = {}
+        self.neighbors: Dict[str, Set[str]] = {}
+        self._recency: "OrderedDict[str, None]" = OrderedDict()
+
+        # layers[l] holds h^(l+1) per node, in LRU order
+        self.layers: List["OrderedDict[str, torch.Tensor]"] = [
+            OrderedDict() for _ in range(self.num_layers)
+        ]
+
+        # Metrics
+        self.rows_computed = 0
+        self.rows_reused = 0
+        self.nodes_evicted = 0
+
+    def observe(
+        self,
+        node_ids: List[str],
+        features: torch.Tensor,
+        edges: Iterable[Tuple[str, str]]
+    ):
+        """Merge a subgraph into the known graph and invalidate what changed"""
+        features = features.detach().cpu()
+        changed_nodes = []
+        for i, node_id in enumerate(node_ids):
+            self._touch(node_id)
+            known = self.features.get(node_id)
+            if known is None or not torch.equal(known, features[i]):
+                self.features[node_id] = features[i].clone()
+                changed_nodes.append(node_id)
+
+        changed_edges = self._add_edges(edges)
+
+        self._invalidate(changed_nodes, offset=1)
+        self._invalidate(changed_edges, offset=0)
+        # The subgraph is encoded next, so its own nodes stay
+        self._evict_nodes(keep=set(node_ids))
+
+    def add_edges(self, edges: Iterable[Tuple[str, str]]):
+        """Write-through for newly created edges"""
+        self._invalidate(self._add_edges(edges), offset=0)
+        self._evict_nodes()
+
+    def remove_nodes(self, node_ids: Iterable[str]):
+        """Forget deleted nodes and invalidate everything they influenced"""
+        node_ids = [node_id for node_id in node_ids if node_id in self._recency]
+        self._invalidate(node_ids, offset=1)
+        for node_id in node_ids:
+            self._recency.pop(node_id, None)
+            self.features.pop(node_id, None)
+            for neighbor in self.neighbors.pop(node_id, ()):
+                self.neighbors.get(neighbor, set()).discard(node_id)
+            for layer in self.layers:
+                layer.pop(node_id, None)
+
+    def clear_edges(self):
+        """Forget the known adjacency and every cached layer (e.g. after an edge rebuild)"""
+        self.neighbors.clear()
+        for node_id in [node_id for node_id in self._recency if node_id not in self.features]:
+            del self._recency[node_id]
+        for layer in self.layers:
+            layer.clear()
+
+    def _touch(self, node_id: str):
+        self._recency[node_id] = None
+        self._recency.move_to_end(node_id)
+
+    def _evict_nodes(self, keep: Set[str] = frozenset()):
+        """Forget least recently used nodes beyond cache_size"""
+        overflow = len(self._recency) - self.cache_size
+        if overflow <= 0:
+            return
+        evicted = []
+        for node_id in self._recency:
+            if len(evicted) == overflow:
+                break
+            if node_id not in keep:
+                evicted.append(node_id)
+        self.remove_nodes(evicted)
+        self.nodes_evicted += len(evicted)
+
+    def _add_edges(self, edges: Iterable[Tuple[str, str]]) -> List[str]:
+        endpoints = []
+        for source_id, target_id in edges:
+            if source_id == target_id:
+                continue
+            self._touch(source_id)
+            self._touch(target_id)
+            source_neighbors = self.neighbors.setdefault(source_id, set())
+            if target_id in source_neighbors:
+                continue
+            source_neighbors.add(target_id)
+            self.neighbors.setdefault(target_id, set()).add(source_id)
+            endpoints.extend((source_id, target_id))
+        return endpoints
+
+    def _invalidate(self, seeds: List[str], offset: int):
+        """Drop cached h^l for nodes within (l - 1 + offset) hops of the seeds"""
+        if not seeds:
+            return
+
+        max_hops = self.num_layers - 1 + offset
+        distance = {node_id: 0 for node_id in seeds}
+        queue = deque(distance)
+        while queue:
+            node_id = queue.popleft()
+            hops = distance[node_id]
+            for layer_index in range(max(0, hops - offset), self.num_layers):
+                self.layers[layer_index].pop(node_id, None)
+            if hops < max_hops:
+                for neighbor in self.neighbors.get(node_id, ()):
+                    if neighbor not in distance:
+                        distance[neighbor] = hops + 1
+                        queue.append(neighbor)
+
+    def _known_neighbors(self, node_id: str) -> Set[str]:
+        return {n for n in self.neighbors.get(node_id, ()) if n in self.features}
+
+    def encode(self, node_ids: List[str], device: Optional[torch.device] = None) -> torch.Tensor:
+        """
+        Final-layer representations for the given nodes
+
+        Args:
+            node_ids: Nodes to encode (must have been observed)
+            device: Device to run the convolutions on
+
+        Returns:
+            Tensor (len(node_ids), hidden_dim)
+        """
+        # Walk down the layers to find which rows actually need computing
+        to_compute: List[Set[str]] = [set() for _ in range(self.num_layers)]
+        for node_id in node_ids:
+            self._touch(node_id)
+        needed = set(node_ids)
+        for layer_index in range(self.num_layers - 1, -1, -1):
+            cache = self.layers[layer_index]
+            missing = set()
+            for node_id in needed:
+                if node_id in cache:
+                    cache.move_to_end(node_id)
+                    self.rows_reused += 1
+                else:
+                    missing.add(node_id)
+            to_compute[layer_index] = missing
+
+            needed = set(missing)
+            for node_id in missing:
+                needed |= self._known_neighbors(node_id)
+
+        # Walk up the layers computing only the missing rows
+        for layer_index in range(self.num_layers):
+            targets = to_compute[layer_index]
+            if not targets:
+                continue
+            self._compute_layer(layer_index, targets, device)
+
+        final = self.layers[-1]
+        output = torch.stack([final[node_id] for node_id in node_ids])
+
+        self._evict()
+        self._evict_nodes()
+        return output.to(device) if device is not None else output
+
+    def _compute_layer(self, layer_index: int, targets: Set[str], device: Optional[torch.device]):
+        # Local graph: targets plus their known neighbours, edges pointing into targets
+        rows: Dict[str, int] = {}
+        for node_id in targets:
+            rows.setdefault(node_id, len(rows))
+        sources, destinations = [], []
+        for node_id in targets:
+            for neighbor in self._known_neighbors(node_id):
+                sources.append(rows.setdefault(neighbor, len(rows)))
+                destinations.append(rows[node_id])
+
+        previous = self.features if layer_index == 0 else self.layers[layer_index - 1]
+        ordered = sorted(rows, key=rows.get)
+        x = torch.stack([previous[node_id] for node_id in ordered])
+        edge_index = torch.tensor([sources, destinations], dtype=torch.long)
+        if device is not None:
+            x, edge_index = x.to(device), edge_index.to(device)
+
+        out = self.model.conv_layer(layer_index, x, edge_index).cpu()
+
+        cache = self.layers[layer_index]
+        for node_id in targets:
+            cache[node_id] = out[rows[node_id]].clone()
+        self.rows_computed += len(targets)
+
+    def _evict(self):
+        for cache in self.layers:
+            while len(cache) > self.cache_size:
+                cache.popitem(last=False)
+
+    def get_metrics(self) -> Dict:
+        total = self.rows_computed + self.rows_reused
+        return {
+            'known_nodes': len(self.features),
+            'nodes_evicted': self.nodes_evicted,
+            'cached_rows': [len(cache) for cache in self.layers],
+            'rows_computed': self.rows_computed,
+            'rows_reused': self.rows_reused,
+            'reuse_rate': self.rows_reused / total if total else 0.0
+        }
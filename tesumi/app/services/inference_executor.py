@@ -0,0 +1,141 @@
+"""
+Inference Executor
+Runs CPU-bound embedding and GNN work on a bounded thread pool so the
+FastAPI event loop stays responsive, with backpressure and wait-time metrics
+"""
+
+import asyncio
+import functools
+import logging
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+import torch
+
+logger = logging.getLogger(__name__)
+
+
+class ExecutorOverloadedError(Exception):
+    """Raised when the inference queue is full; routes map it to HTTP 503"""
+
+
+class _StageMetrics:
+    __slots__ = ("completed", "rejected", "wait_total", "wait_max", "run_total", "run_max")
+
+    def __init__(self):
+        self.completed = 0
+        self.rejected = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.run_total = 0.0
+        self.run_max = 0.0
+
+    def as_dict(self) -> Dict:
+        completed = self.completed or 1
+        return {
+            'completed': self.completed,
+            'rejected': self.rejected,
+            'average_wait_ms': self.wait_total / completed * 1000.0,
+            'max_wait_ms': self.wait_max * 1000.0,
+            'average_run_ms': self.run_total / completed * 1000.0,
+            'max_run_ms': self.run_max * 1000.0
+        }
+
+
+class InferenceExecutor:
+    """
+    Bounded thread pool for inference stages
+    At most `max_workers` calls run at once; once `max_queue_depth` calls are
+    queued or running, new calls fail fast with ExecutorOverloadedError.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 2,
+        max_queue_depth: int = 64,
+        torch_threads: Optional[int] = None
+    ):
+        if torch_threads:
+            torch.set_num_threads(torch_threads)
+
+        self.max_workers = max_workers
+        self.max_queue_depth = max_queue_depth
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="inference")
+
+        self._depth = 0
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _StageMetrics] = defaultdict(_StageMetrics)
+
+    @property
+    def queue_depth(self) -> int:
+        return self._depth
+
+    async def run(self, stage: str, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Run `fn(*args, **kwargs)` on the pool
+
+        Args:
+            stage: Stage name used for metrics (e.g. "embedding", "gnn_forward")
+            fn: Blocking callable
+
+        Returns:
+            The callable's result
+
+        Raises:
+            ExecutorOverloadedError: If the queue depth limit is reached
+        """
+        with self._lock:
+            if self._depth >= self.max_queue_depth:
+                self._metrics[stage].rejected += 1
+                raise ExecutorOverloadedError(
+                    f"Inference queue full ({self._depth}/{self.max_queue_depth})"
+                )
+            self._depth += 1
+
+        submitted = time.perf_counter()
+        call = functools.partial(self._timed, stage, submitted, fn, args, kwargs)
+        try:
+            future = self._pool.submit(call)
+        except BaseException:
+            self._release()
+            raise
+        # Released when the pool job finishes, not when the caller stops
+        # waiting, so a cancelled request still counts while it occupies the pool
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def _release(self, future=None):
+        with self._lock:
+            self._depth -= 1
+
+    def _timed(self, stage: str, submitted: float, fn: Callable, args, kwargs) -> Any:
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            finished = time.perf_counter()
+            wait, run = started - submitted, finished - started
+            with self._lock:
+                metrics = self._metrics[stage]
+                metrics.completed += 1
+                metrics.wait_total += wait
+                metrics.wait_max = max(metrics.wait_max, wait)
+                metrics.run_total += run
+                metrics.run_max = max(metrics.run_max, run)
+
+    def get_metrics(self) -> Dict:
+        """Queue depth and per-stage wait/run times"""
+        with self._lock:
+            return {
+                'queue_depth': self._depth,
+                'max_queue_depth': self.max_queue_depth,
+                'workers': self.max_workers,
+                'torch_threads': torch.get_num_threads(),
+                'stages': {stage: metrics.as_dict() for stage, metrics in self._metrics.items()}
+            }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True)
@@ -0,0 +1,178 @@
+"""
+Memory Access Tracker
+In-process accumulator for memory access counters (access_count,
+last_accessed, activation boost) with write-behind persistence, so the
+search path never takes row locks on memory_nodes
+"""
+
+import asyncio
+import logging
+import uuid
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import DateTime, Integer, column, func, literal, update, values
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import database
+from app.models.memory import MemoryNode
+
+logger = logging.getLogger(__name__)
+
+# Each access multiplies activation_strength by this factor (capped at 1.0),
+# so n accesses since the last flush apply ACTIVATION_BOOST ** n at once
+ACTIVATION_BOOST = 1.1
+
+
+class MemoryAccessTracker:
+    """
+    Write-behind access counters
+    Accesses are summed per node in memory and flushed periodically as one
+    UPDATE ... FROM (VALUES ...) per batch, in id order so concurrent
+    flushers from several processes lock rows in the same order.
+    """
+
+    def __init__(self, flush_interval: float = 5.0, batch_size: int = 1000):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+
+        # node id -> [accesses, last accessed]
+        self._pending: Dict[str, List] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+
+        # Metrics
+        self.accesses_recorded = 0
+        self.flushes = 0
+        self.rows_written = 0
+        self.failed_flushes = 0
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def has_pending(self, node_id: str) -> bool:
+        """Whether the node has accesses not yet written"""
+        return str(node_id) in self._pending
+
+    def record(self, node_ids: Iterable[str], accessed_at: Optional[datetime] = None):
+        """Count one access for each node"""
+        accessed_at = accessed_at or datetime.utcnow()
+        for node_id in node_ids:
+            entry = self._pending.get(str(node_id))
+            if entry is None:
+                self._pending[str(node_id)] = [1, accessed_at]
+            else:
+                entry[0] += 1
+                entry[1] = max(entry[1], accessed_at)
+            self.accesses_recorded += 1
+
+    def _requeue(self, pending: Dict[str, List]):
+        """Merge counters back after a failed flush"""
+        for node_id, (hits, accessed_at) in pending.items():
+            entry = self._pending.get(node_id)
+            if entry is None:
+                self._pending[node_id] = [hits, accessed_at]
+            else:
+                entry[0] += hits
+                entry[1] = max(entry[1], accessed_at)
+
+    async def flush(self, db: AsyncSession) -> int:
+        """
+        Persist accumulated counters
+
+        Args:
+            db: Database session
+
+        Returns:
+            Number of nodes written
+        """
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        table = MemoryNode.__table__
+        node_ids = sorted(pending)
+        written = 0
+        try:
+            for start in range(0, len(node_ids), self.batch_size):
+                batch = node_ids[start:start + self.batch_size]
+                accesses = values(
+                    column("id", UUID(as_uuid=True)),
+                    column("hits", Integer),
+                    column("last_accessed", DateTime),
+                    name="accesses"
+                ).data([(uuid.UUID(node_id), *pending[node_id]) for node_id in batch])
+
+                try:
+                    await db.execute(
+                        update(table)
+                        .where(table.c.id == accesses.c.id)
+                        .values(
+                            access_count=table.c.access_count + accesses.c.hits,
+                            last_accessed=func.greatest(table.c.last_accessed, accesses.c.last_accessed),
+                            activation_strength=func.least(
+                                table.c.activation_strength * func.power(literal(ACTIVATION_BOOST), accesses.c.hits),
+                                1.0
+                            )
+                        )
+                    )
+                    await db.commit()
+                    written += len(batch)
+                except Exception as e:
+                    logger.error(f"Error flushing memory access counters: {e}")
+                    await db.rollback()
+                    self.failed_flushes += 1
+                    break
+        finally:
+            # Also on cancellation (shutdown): unwritten counters go back to pending
+            if written < len(node_ids):
+                self._requeue({node_id: pending[node_id] for node_id in node_ids[written:]})
+
+        self.flushes += 1
+        self.rows_written += written
+        return written
+
+    def start(self):
+        """Start the periodic write-behind task"""
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._write_behind_loop())
+
+    async def stop(self):
+        """Stop the write-behind task and flush remaining counters"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+
+        await self.flush_pending()
+
+    async def _write_behind_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush_pending()
+
+    async def flush_pending(self):
+        """Flush accumulated counters now (own session)"""
+        if not self._pending or database.SessionLocal is None:
+            return
+
+        try:
+            async with database.SessionLocal() as db:
+                await self.flush(db)
+        except Exception as e:
+            logger.error(f"Error in memory access write-behind: {e}")
+
+    def get_metrics(self) -> Dict:
+        """Pending nodes and flush throughput"""
+        return {
+            'pending_nodes': self.pending_count,
+            'accesses_recorded': self.accesses_recorded,
+            'flushes': self.flushes,
+            'rows_written': self.rows_written,
+            'failed_flushes': self.failed_flushes,
+            'flush_interval': self.flush_interval
+        }
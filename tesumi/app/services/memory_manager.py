@@ -14,12 +14,27 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, or_, desc, func, text
 from sqlalchemy.orm import selectinload
 
+from app.core import database
 from app.core.database import get_db
 from app.models.memory import (
     MemoryNode, MemoryEdge, ConversationHistory,
     MemoryNodeCreate, MemoryNodeResponse
 )
 from app.services.gnn_processor import GNNProcessor
+from app.services.activation_batcher import ActivationBatcher
+from app.services.embedding_service import EmbeddingService
+from app.services.embedding_cache import EmbeddingCache
+from app.services.memory_subgraph import fetch_candidate_subgraph
+from app.services.memory_replica import MemoryGraphReplica
+from app.services.bulk_ingest import BulkIngestor
+from app.services.similarity_edges import SimilarityEdgeWorker
+from app.services.emotion_enricher import EmotionEnricher
+from app.services.conversation_recorder import ConversationRecorder
+from app.services.conversation_cache import ConversationCache
+from app.services.memory_access_tracker import MemoryAccessTracker
+from app.services.retention import RetentionRunner
+from app.services.memory_stats import MemoryStatistics
+from app.services.inference_executor import InferenceExecutor, ExecutorOverloadedError
 from app.services.claude_client import ClaudeClient
 from app.core.config import settings
 
@@ -36,13 +51,147 @@ class MemoryManager:
         self.embedding_model = SentenceTransformer(settings.EMBEDDING_MODEL)
         self.gnn_processor = GNNProcessor()
         self.claude_client = ClaudeClient()
+        self.executor = InferenceExecutor(
+            max_workers=settings.INFERENCE_WORKERS,
+            max_queue_depth=settings.INFERENCE_MAX_QUEUE_DEPTH,
+            torch_threads=settings.TORCH_NUM_THREADS
+        )
+        # Background work (bulk ingestion, similarity edges) gets its own
+        # pool, so it never counts against the online queue depth limit
+        self.background_executor = InferenceExecutor(
+            max_workers=settings.INFERENCE_BACKGROUND_WORKERS,
+            max_queue_depth=settings.INFERENCE_BACKGROUND_MAX_QUEUE_DEPTH
+        )
+        self.activation_batcher = ActivationBatcher(
+            self.gnn_processor,
+            self.executor,
+            max_batch_size=settings.GNN_BATCH_MAX_SIZE,
+            max_wait_ms=settings.GNN_BATCH_MAX_WAIT_MS
+        )
+        self.embedding_service = EmbeddingService(
+            self.embedding_model,
+            self.executor,
+            max_batch_size=settings.EMBEDDING_BATCH_MAX_SIZE,
+            max_wait_ms=settings.EMBEDDING_BATCH_MAX_WAIT_MS,
+            cache=EmbeddingCache(
+                settings.EMBEDDING_MODEL,
+                settings.VECTOR_DIMENSION,
+                capacity=settings.EMBEDDING_CACHE_SIZE,
+                path=settings.EMBEDDING_CACHE_PATH,
+                disk_max_entries=settings.EMBEDDING_CACHE_DISK_MAX_ENTRIES
+            )
+        )
+        self.replica = (
+            MemoryGraphReplica(dim=settings.VECTOR_DIMENSION, hidden_dim=settings.GNN_HIDDEN_DIM)
+            if settings.MEMORY_REPLICA_ENABLED else None
+        )
+        self.stats = MemoryStatistics(
+            refresh_interval=settings.MEMORY_STATS_REFRESH_INTERVAL,
+            max_staleness=settings.MEMORY_STATS_MAX_STALENESS
+        )
+        self.edge_worker = SimilarityEdgeWorker(
+            replica=self.replica,
+            gnn_processor=self.gnn_processor,
+            stats=self.stats,
+            executor=self.background_executor,
+            batch_size=settings.SIMILARITY_EDGE_BATCH_SIZE,
+            max_wait=settings.SIMILARITY_EDGE_MAX_WAIT
+        )
+        self.emotion_enricher = EmotionEnricher(
+            self.claude_client,
+            replica=self.replica,
+            gnn_processor=self.gnn_processor,
+            batch_size=settings.EMOTION_BATCH_SIZE,
+            max_wait=settings.EMOTION_BATCH_MAX_WAIT,
+            interval=settings.EMOTION_ENRICH_INTERVAL,
+            cache_size=settings.EMOTION_CACHE_SIZE,
+            claim_lease=settings.EMOTION_CLAIM_LEASE
+        )
+        self.access_tracker = MemoryAccessTracker(
+            flush_interval=settings.MEMORY_ACCESS_FLUSH_INTERVAL,
+            batch_size=settings.MEMORY_ACCESS_FLUSH_BATCH
+        )
+        self.retention = RetentionRunner(
+            gnn_processor=self.gnn_processor,
+            replica=self.replica,
+            access_tracker=self.access_tracker,
+            stats=self.stats,
+            chunk_size=settings.RETENTION_CHUNK_SIZE,
+            pause=settings.RETENTION_CHUNK_PAUSE,
+            claim_lease=settings.RETENTION_CLAIM_LEASE,
+            max_passes=settings.RETENTION_MAX_PASSES,
+            resume_interval=settings.RETENTION_RESUME_INTERVAL
+        )
+        self.conversation_cache = ConversationCache(
+            turns_per_session=settings.CONVERSATION_CACHE_TURNS,
+            max_sessions=settings.CONVERSATION_CACHE_SESSIONS,
+            ttl=settings.CONVERSATION_CACHE_TTL
+        )
+        self.conversation_recorder = ConversationRecorder(
+            self,
+            cache=self.conversation_cache,
+            batch_size=settings.CONVERSATION_RECORD_BATCH_SIZE,
+            max_wait=settings.CONVERSATION_RECORD_MAX_WAIT,
+            max_attempts=settings.CONVERSATION_RECORD_MAX_ATTEMPTS,
+            claim_lease=settings.CONVERSATION_MEMORY_CLAIM_LEASE,
+            recover_interval=settings.CONVERSATION_MEMORY_RECOVER_INTERVAL
+        )
+        self.bulk_ingestor = BulkIngestor(
+            self.embedding_service,
+            self.background_executor,
+            replica=self.replica,
+            gnn_processor=self.gnn_processor,
+            emotion_enricher=self.emotion_enricher,
+            stats=self.stats
+        )
         
         # Cache for frequent operations
-        self._embedding_cache = {}
         self._memory_cache = {}
         
         logger.info("Memory Manager initialized")
     
+    async def start(self):
+        """Start background workers"""
+        self.gnn_processor.start()
+        if settings.EMBEDDING_BATCHING_ENABLED:
+            self.embedding_service.start()
+        if settings.GNN_BATCHING_ENABLED:
+            self.activation_batcher.start()
+        if self.replica is not None:
+            try:
+                async with database.SessionLocal() as db:
+                    await self.replica.load(db)
+            except Exception as e:
+                logger.error(f"Error loading memory replica, using database search: {e}")
+            self.replica.start()
+        await self.stats.refresh()
+        self.stats.start()
+        self.edge_worker.start()
+        self.emotion_enricher.start()
+        self.emotion_enricher.notify()  # Pick up nodes left pending by a previous run
+        self.conversation_recorder.start()
+        self.access_tracker.start()
+        await self.retention.resume_interrupted()
+        self.retention.start()  # Also takes over jobs whose runner dies later
+    
+    async def shutdown(self):
+        """Stop background workers and flush pending writes"""
+        await self.retention.stop()  # Resumes from its checkpoint on the next start
+        await self.bulk_ingestor.stop()  # Resumes when the file is re-sent with its job_id
+        await self.conversation_recorder.stop()
+        await self.emotion_enricher.stop()
+        await self.edge_worker.stop()
+        if self.replica is not None:
+            await self.replica.stop()
+        await self.embedding_service.stop()
+        await self.activation_batcher.stop()
+        await self.gnn_processor.stop()
+        await self.access_tracker.stop()
+        await self.stats.stop()
+        self.executor.shutdown()
+        self.background_executor.shutdown()
+        self.embedding_service.close()
+    
     async def create_memory_node(
         self,
         db: AsyncSession,
@@ -61,20 +210,18 @@ class MemoryManager:
             memory_type: Type of memory (episodic, semantic, procedural)
             category: Optional category
             valence: Emotion valence (-1 to 1)
-            arousal: Emotion arousal (-1 to 1)
+            arousal: Emotion arousal (-1 to 1); when both are 0 the node is
+                stored with emotion_pending and scored in the background
             
         Returns:
             Created memory node
         """
         try:
             # Generate embedding
-            embedding = self.embedding_model.encode(content)
+            embedding = await self.embedding_service.encode(content)
             
-            # If emotion scores not provided, analyze them
-            if valence == 0.0 and arousal == 0.0:
-                emotion_scores = await self.claude_client.analyze_emotion(content)
-                valence = emotion_scores.get('valence', 0.0)
-                arousal = emotion_scores.get('arousal', 0.0)
+            # If emotion scores not provided, the enricher analyzes them later
+            emotion_pending = valence == 0.0 and arousal == 0.0
             
             # Create memory node
             memory_node = MemoryNode(
@@ -84,6 +231,8 @@ class MemoryManager:
                 category=category,
                 valence=valence,
                 arousal=arousal,
+                emotion_pending=emotion_pending,
+                edges_pending=True,
                 activation_strength=1.0,
                 access_count=0,
                 created_at=datetime.utcnow(),
@@ -94,8 +243,32 @@ class MemoryManager:
             await db.commit()
             await db.refresh(memory_node)
             
-            # Create connections to similar memories
-            await self._create_similarity_edges(db, memory_node, embedding)
+            self.gnn_processor.register_memory_node(
+                str(memory_node.id), embedding, valence, arousal
+            )
+            if self.replica is not None:
+                self.replica.add_nodes([{
+                    'id': str(memory_node.id),
+                    'content': content,
+                    'memory_type': memory_type,
+                    'category': category,
+                    'valence': valence,
+                    'arousal': arousal,
+                    'activation_strength': memory_node.activation_strength,
+                    'access_count': memory_node.access_count,
+                    'created_at': memory_node.created_at,
+                    'last_accessed': memory_node.last_accessed,
+                    'embedding': embedding
+                }])
+            
+            self.stats.nodes_added([
+                (memory_type, memory_node.activation_strength, memory_node.created_at)
+            ])
+            
+            # Connections to similar memories are built in the background
+            self.edge_worker.enqueue(memory_node.id)
+            if emotion_pending:
+                self.emotion_enricher.notify()
             
             logger.info(f"Created memory node: {memory_node.id}")
             return memory_node
@@ -128,16 +301,263 @@ class MemoryManager:
         """
         try:
             # Generate query embedding
-            query_embedding = self.embedding_model.encode(query)
-            
-            # Get candidate memories from vector search
-            vector_search_sql = text("""
-                SELECT id, content, memory_type, category, valence, arousal, 
-                       activation_strength, access_count, created_at, last_accessed,
-                       embedding <=> :query_embedding AS distance
-                FROM memory_nodes
-                WHERE activation_strength >= :min_activation
-                AND (:memory_type IS NULL OR memory_type = :memory_type)
-                ORDER BY embedding <=> :query_embedding
-                LIMIT :limit
-            \"\"\")\n            \n            result = await db.execute(\n                vector_search_sql,\n                {\n                    \"query_embedding\": query_embedding.tolist(),\n                    \"min_activation\": min_activation,\n                    \"memory_type\": memory_type,\n                    \"limit\": limit * 3  # Get more candidates for GNN processing\n                }\n            )\n            \n            candidate_memories = []\n            for row in result.fetchall():\n                candidate_memories.append({\n                    'id': str(row[0]),\n                    'content': row[1],\n                    'memory_type': row[2],\n                    'category': row[3],\n                    'valence': row[4],\n                    'arousal': row[5],\n                    'activation_strength': row[6],\n                    'access_count': row[7],\n                    'created_at': row[8],\n                    'last_accessed': row[9],\n                    'embedding': query_embedding.tolist(),  # Placeholder\n                    'vector_distance': row[10]\n                })\n            \n            if not candidate_memories:\n                return []\n            \n            # Get memory edges for GNN processing\n            memory_ids = [m['id'] for m in candidate_memories]\n            edges_result = await db.execute(\n                select(MemoryEdge).where(\n                    or_(\n                        MemoryEdge.source_id.in_(memory_ids),\n                        MemoryEdge.target_id.in_(memory_ids)\n                    )\n                )\n            )\n            \n            memory_edges = []\n            for edge in edges_result.scalars().all():\n                memory_edges.append({\n                    'id': str(edge.id),\n                    'source_id': str(edge.source_id),\n                    'target_id': str(edge.target_id),\n                    'edge_type': edge.edge_type,\n                    'weight': edge.weight\n                })\n            \n            # Use GNN processor to activate memories\n            activated_memories = self.gnn_processor.activate_memories(\n                memory_nodes=candidate_memories,\n                memory_edges=memory_edges,\n                query_embedding=query_embedding,\n                top_k=limit\n            )\n            \n            # Update access counts and last accessed time\n            await self._update_memory_access(db, [m['id'] for m in activated_memories])\n            \n            return activated_memories\n            \n        except Exception as e:\n            logger.error(f\"Error searching memories: {e}\")\n            return []\n    \n    async def get_conversation_context(\n        self,\n        db: AsyncSession,\n        session_id: str,\n        limit: int = 5\n    ) -> List[Dict]:\n        \"\"\"Get recent conversation history for context\"\"\"\n        try:\n            result = await db.execute(\n                select(ConversationHistory)\n                .where(ConversationHistory.session_id == session_id)\n                .order_by(desc(ConversationHistory.created_at))\n                .limit(limit)\n            )\n            \n            conversations = result.scalars().all()\n            return [\n                {\n                    'user_input': conv.user_input,\n                    'system_response': conv.system_response,\n                    'created_at': conv.created_at,\n                    'activated_memories': conv.activated_memories or []\n                }\n                for conv in reversed(conversations)  # Reverse to get chronological order\n            ]\n            \n        except Exception as e:\n            logger.error(f\"Error getting conversation context: {e}\")\n            return []\n    \n    async def store_conversation(\n        self,\n        db: AsyncSession,\n        session_id: str,\n        user_input: str,\n        system_response: str,\n        activated_memories: List[str] = None\n    ) -> ConversationHistory:\n        \"\"\"Store conversation history\"\"\"\n        try:\n            conversation = ConversationHistory(\n                session_id=session_id,\n                user_input=user_input,\n                system_response=system_response,\n                activated_memories=activated_memories or [],\n                created_at=datetime.utcnow()\n            )\n            \n            db.add(conversation)\n            await db.commit()\n            await db.refresh(conversation)\n            \n            # Create memory node from conversation if significant\n            await self._create_conversation_memory(\n                db, user_input, system_response, activated_memories\n            )\n            \n            return conversation\n            \n        except Exception as e:\n            await db.rollback()\n            logger.error(f\"Error storing conversation: {e}\")\n            raise\n    \n    async def get_memory_statistics(self, db: AsyncSession) -> Dict:\n        \"\"\"Get memory system statistics\"\"\"\n        try:\n            # Basic statistics\n            total_memories = await db.scalar(select(func.count(MemoryNode.id)))\n            total_edges = await db.scalar(select(func.count(MemoryEdge.id)))\n            \n            # Memory type distribution\n            memory_types = await db.execute(\n                select(MemoryNode.memory_type, func.count(MemoryNode.id))\n                .group_by(MemoryNode.memory_type)\n            )\n            \n            type_distribution = {row[0]: row[1] for row in memory_types.fetchall()}\n            \n            # Recent activity\n            recent_threshold = datetime.utcnow() - timedelta(hours=24)\n            recent_memories = await db.scalar(\n                select(func.count(MemoryNode.id))\n                .where(MemoryNode.created_at >= recent_threshold)\n            )\n            \n            # Average activation strength\n            avg_activation = await db.scalar(\n                select(func.avg(MemoryNode.activation_strength))\n            )\n            \n            # GNN processor statistics\n            gnn_stats = self.gnn_processor.get_memory_statistics()\n            \n            return {\n                'total_memories': total_memories,\n                'total_edges': total_edges,\n                'memory_types': type_distribution,\n                'recent_memories_24h': recent_memories,\n                'average_activation': float(avg_activation or 0),\n                'gnn_statistics': gnn_stats,\n                'embedding_model': settings.EMBEDDING_MODEL,\n                'vector_dimension': settings.VECTOR_DIMENSION\n            }\n            \n        except Exception as e:\n            logger.error(f\"Error getting memory statistics: {e}\")\n            return {}\n    \n    async def _create_similarity_edges(\n        self, \n        db: AsyncSession, \n        new_node: MemoryNode, \n        embedding: np.ndarray,\n        similarity_threshold: float = 0.7,\n        max_connections: int = 5\n    ):\n        \"\"\"Create similarity edges to existing memories\"\"\"\n        try:\n            # Find similar memories using vector search\n            similar_search_sql = text(\"\"\"\n                SELECT id, embedding <=> :embedding AS similarity\n                FROM memory_nodes\n                WHERE id != :node_id\n                AND embedding <=> :embedding < :threshold\n                ORDER BY embedding <=> :embedding\n                LIMIT :max_connections\n            \"\"\")\n            \n            result = await db.execute(\n                similar_search_sql,\n                {\n                    \"embedding\": embedding.tolist(),\n                    \"node_id\": str(new_node.id),\n                    \"threshold\": 1.0 - similarity_threshold,  # pgvector uses distance, not similarity\n                    \"max_connections\": max_connections\n                }\n            )\n            \n            # Create edges to similar memories\n            for row in result.fetchall():\n                similar_id = row[0]\n                distance = row[1]\n                similarity = 1.0 - distance  # Convert distance to similarity\n                \n                if similarity >= similarity_threshold:\n                    edge = MemoryEdge(\n                        source_id=new_node.id,\n                        target_id=similar_id,\n                        edge_type=\"similarity\",\n                        weight=similarity,\n                        created_at=datetime.utcnow()\n                    )\n                    db.add(edge)\n            \n            await db.commit()\n            \n        except Exception as e:\n            logger.error(f\"Error creating similarity edges: {e}\")\n            await db.rollback()\n    \n    async def _create_conversation_memory(\n        self,\n        db: AsyncSession,\n        user_input: str,\n        system_response: str,\n        activated_memories: List[str] = None\n    ):\n        \"\"\"Create memory node from significant conversations\"\"\"\n        try:\n            # Determine if conversation is significant enough to store as memory\n            combined_text = f\"ユーザー: {user_input}\\nシステム: {system_response}\"\n            \n            # Simple heuristic: store if conversation is long enough or contains certain keywords\n            significant_keywords = [\"重要\", \"覚えて\", \"記録\", \"記憶\", \"忘れない\"]\n            is_significant = (\n                len(combined_text) > 100 or  # Long conversation\n                any(keyword in combined_text for keyword in significant_keywords) or  # Contains keywords\n                len(activated_memories or []) > 2  # Many memories were activated\n            )\n            \n            if is_significant:\n                # Analyze emotion of the conversation\n                emotion_scores = await self.claude_client.analyze_emotion(combined_text)\n                \n                await self.create_memory_node(\n                    db=db,\n                    content=combined_text,\n                    memory_type=\"episodic\",\n                    category=\"conversation\",\n                    valence=emotion_scores.get('valence', 0.0),\n                    arousal=emotion_scores.get('arousal', 0.0)\n                )\n                \n                logger.info(\"Created memory node from significant conversation\")\n            \n        except Exception as e:\n            logger.error(f\"Error creating conversation memory: {e}\")\n    \n    async def _update_memory_access(\n        self,\n        db: AsyncSession,\n        memory_ids: List[str]\n    ):\n        \"\"\"Update access count and last accessed time for memories\"\"\"\n        try:\n            if not memory_ids:\n                return\n            \n            update_sql = text(\"\"\"\n                UPDATE memory_nodes \n                SET access_count = access_count + 1,\n                    last_accessed = :now,\n                    activation_strength = LEAST(activation_strength * 1.1, 1.0)\n                WHERE id = ANY(:memory_ids)\n            \"\"\")\n            \n            await db.execute(\n                update_sql,\n                {\n                    \"now\": datetime.utcnow(),\n                    \"memory_ids\": memory_ids\n                }\n            )\n            \n            await db.commit()\n            \n        except Exception as e:\n            logger.error(f\"Error updating memory access: {e}\")\n            await db.rollback()\n    \n    def get_embedding(self, text: str) -> np.ndarray:\n        \"\"\"Get embedding for text with caching\"\"\"\n        if text in self._embedding_cache:\n            return self._embedding_cache[text]\n        \n        embedding = self.embedding_model.encode(text)\n        \n        # Cache recent embeddings (limit cache size)\n        if len(self._embedding_cache) > 1000:\n            # Remove oldest entries (simple FIFO)\n            oldest_key = next(iter(self._embedding_cache))\n            del self._embedding_cache[oldest_key]\n        \n        self._embedding_cache[text] = embedding\n        return embedding\n    \n    async def cleanup_old_memories(\n        self,\n        db: AsyncSession,\n        days_threshold: int = 365,\n        min_activation: float = 0.01\n    ):\n        \"\"\"Clean up old and unused memories\"\"\"\n        try:\n            cutoff_date = datetime.utcnow() - timedelta(days=days_threshold)\n            \n            # Find old memories with low activation\n            old_memories = await db.execute(\n                select(MemoryNode.id)\n                .where(\n                    and_(\n                        MemoryNode.created_at < cutoff_date,\n                        MemoryNode.activation_strength < min_activation,\n                        MemoryNode.access_count < 2\n                    )\n                )\n            )\n            \n            memory_ids_to_delete = [str(row[0]) for row in old_memories.fetchall()]\n            \n            if memory_ids_to_delete:\n                # Delete associated edges first\n                await db.execute(\n                    select(MemoryEdge).where(\n                        or_(\n                            MemoryEdge.source_id.in_(memory_ids_to_delete),\n                            MemoryEdge.target_id.in_(memory_ids_to_delete)\n                        )\n                    ).delete()\n                )\n                \n                # Delete memory nodes\n                await db.execute(\n                    select(MemoryNode).where(\n                        MemoryNode.id.in_(memory_ids_to_delete)\n                    ).delete()\n                )\n                \n                await db.commit()\n                logger.info(f\"Cleaned up {len(memory_ids_to_delete)} old memories\")\n            \n        except Exception as e:\n            logger.error(f\"Error cleaning up old memories: {e}\")\n            await db.rollback()
+            query_embedding = await self.embedding_service.encode(query)
+            
+            # Candidates, stored embeddings and induced edges: from the
+            # in-process replica when loaded, else in one DB round-trip
+            if self.replica is not None and self.replica.loaded:
+                candidate_memories, memory_edges = await self.executor.run(
+                    "candidates",
+                    self.replica.fetch_candidate_subgraph,
+                    query_embedding,
+                    limit * 3,  # Get more candidates for GNN processing
+                    memory_type,
+                    min_activation,
+                    settings.MEMORY_REPLICA_SUBGRAPH_HOPS
+                )
+            else:
+                candidate_memories, memory_edges = await fetch_candidate_subgraph(
+                    db,
+                    query_embedding,
+                    limit=limit * 3,  # Get more candidates for GNN processing
+                    memory_type=memory_type,
+                    min_activation=min_activation
+                )
+            
+            if not candidate_memories:
+                return []
+            
+            # Use GNN processor to activate memories
+            activated_memories = await self.activation_batcher.activate(
+                memory_nodes=candidate_memories,
+                memory_edges=memory_edges,
+                query_embedding=query_embedding,
+                top_k=limit
+            )
+            
+            # Update access counts and last accessed time
+            await self._update_memory_access(db, [m['id'] for m in activated_memories])
+            
+            return activated_memories
+            
+        except ExecutorOverloadedError:
+            raise
+        except Exception as e:
+            logger.error(f"Error searching memories: {e}")
+            return []
+    
+    async def retrieve_chat_context(
+        self,
+        query: str,
+        session_id: str,
+        memory_limit: int = 10,
+        history_limit: int = 5,
+        min_activation: float = 0.1
+    ) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Memory search and conversation history for a chat turn
+        
+        Both run concurrently, each on its own database session.
+        
+        Returns:
+            (activated memories, conversation context)
+        """
+        async def search():
+            async with database.SessionLocal() as db:
+                return await self.search_memories(
+                    db=db, query=query, limit=memory_limit, min_activation=min_activation
+                )
+        
+        async def history():
+            cached = self.conversation_cache.get(session_id, history_limit)
+            if cached is not None:
+                return cached
+            async with database.SessionLocal() as db:
+                return await self._load_conversation_context(db, session_id, history_limit)
+        
+        activated_memories, conversation_context = await asyncio.gather(search(), history())
+        return activated_memories, conversation_context
+    
+    async def get_conversation_context(
+        self,
+        db: AsyncSession,
+        session_id: str,
+        limit: int = 5
+    ) -> List[Dict]:
+        """Get recent conversation history for context (including turns not yet persisted)"""
+        cached = self.conversation_cache.get(session_id, limit)
+        if cached is not None:
+            return cached
+        return await self._load_conversation_context(db, session_id, limit)
+    
+    async def _load_conversation_context(
+        self,
+        db: AsyncSession,
+        session_id: str,
+        limit: int
+    ) -> List[Dict]:
+        """
+        Conversation history from the database (cache miss)
+        
+        Refills the session's cache, except for reads larger than its buffer
+        (e.g. a session's full history): those query exactly `limit` turns.
+        """
+        try:
+            # Fetch a full buffer so following turns are served from the cache
+            oversized = limit > self.conversation_cache.turns_per_session
+            fetch_limit = limit if oversized else self.conversation_cache.turns_per_session
+            result = await db.execute(
+                select(ConversationHistory)
+                .where(ConversationHistory.session_id == session_id)
+                .order_by(desc(ConversationHistory.created_at))
+                .limit(fetch_limit)
+            )
+            
+            conversations = result.scalars().all()
+            history = [
+                {
+                    'user_input': conv.user_input,
+                    'system_response': conv.system_response,
+                    'created_at': conv.created_at,
+                    'activated_memories': conv.activated_memories or []
+                }
+                for conv in reversed(conversations)  # Reverse to get chronological order
+            ]
+            turns = self.conversation_cache.load(
+                session_id,
+                history + self.conversation_recorder.pending(session_id),
+                complete=len(conversations) < fetch_limit,
+                fill=not oversized
+            )
+            return turns[-limit:] if limit else []
+            
+        except Exception as e:
+            logger.error(f"Error getting conversation context: {e}")
+            return []
+    
+    async def get_memory_statistics(self) -> Dict:
+        """
+        Get memory system statistics
+        
+        Counts come from MemoryStatistics (rollup + in-process deltas) and
+        never scan the memory tables; 'statistics_as_of' and
+        'statistics_staleness_seconds' give their age.
+        """
+        try:
+            counts = self.stats.snapshot()
+            
+            # GNN processor statistics
+            gnn_stats = self.gnn_processor.get_memory_statistics()
+            
+            return {
+                'total_memories': counts['total_memories'],
+                'total_edges': counts['total_edges'],
+                'memory_types': counts['memory_types'],
+                'recent_memories_24h': counts['recent_memories_24h'],
+                'average_activation': counts['average_activation'],
+                'statistics_as_of': counts['as_of'],
+                'statistics_staleness_seconds': counts['staleness_seconds'],
+                'statistics_stale': counts['stale'],
+                'gnn_statistics': gnn_stats,
+                'activation_batching': self.activation_batcher.get_metrics(),
+                'embedding_batching': self.embedding_service.get_metrics(),
+                'inference_executor': self.executor.get_metrics(),
+                'background_executor': self.background_executor.get_metrics(),
+                'memory_replica': self.replica.get_metrics() if self.replica is not None else None,
+                'similarity_edges': self.edge_worker.get_metrics(),
+                'emotion_enrichment': self.emotion_enricher.get_metrics(),
+                'conversation_recorder': self.conversation_recorder.get_metrics(),
+                'conversation_cache': self.conversation_cache.get_metrics(),
+                'memory_access': self.access_tracker.get_metrics(),
+                'retention': self.retention.get_metrics(),
+                'statistics_refresh': self.stats.get_metrics(),
+                'emotion_scoring': self.claude_client.get_emotion_metrics(),
+                'embedding_model': settings.EMBEDDING_MODEL,
+                'vector_dimension': settings.VECTOR_DIMENSION
+            }
+            
+        except Exception as e:
+            logger.error(f"Error getting memory statistics: {e}")
+            return {}
+    
+    async def _create_conversation_memory(
+        self,
+        db: AsyncSession,
+        user_input: str,
+        system_response: str,
+        activated_memories: List[str] = None
+    ) -> bool:
+        """
+        Create memory node from significant conversations
+        
+        Returns:
+            False if creating the memory failed (True also when the
+            conversation was not significant enough to store)
+        """
+        try:
+            # Determine if conversation is significant enough to store as memory
+            combined_text = f"ユーザー: {user_input}\nシステム: {system_response}"
+            
+            # Simple heuristic: store if conversation is long enough or contains certain keywords
+            significant_keywords = ["重要", "覚えて", "記録", "記憶", "忘れない"]
+            is_significant = (
+                len(combined_text) > 100 or  # Long conversation
+                any(keyword in combined_text for keyword in significant_keywords) or  # Contains keywords
+                len(activated_memories or []) > 2  # Many memories were activated
+            )
+            
+            if is_significant:
+                # Emotion of the conversation is analyzed in the background
+                await self.create_memory_node(
+                    db=db,
+                    content=combined_text,
+                    memory_type="episodic",
+                    category="conversation"
+                )
+                
+                logger.info("Created memory node from significant conversation")
+            
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error creating conversation memory: {e}")
+            return False
+    
+    async def _update_memory_access(
+        self,
+        db: AsyncSession,
+        memory_ids: List[str]
+    ):
+        """Update access count and last accessed time for memories (written behind)"""
+        try:
+            if not memory_ids:
+                return
+            
+            self.access_tracker.record(memory_ids)
+            
+            if self.replica is not None:
+                self.replica.touch(memory_ids)
+            
+        except Exception as e:
+            logger.error(f"Error updating memory access: {e}")
+    
+    def get_embedding(self, text: str) -> np.ndarray:
+        """Get embedding for text with caching (blocking; async callers use embedding_service)"""
+        return self.embedding_service.encode_sync([text])[0]
+    
+    async def cleanup_old_memories(
+        self,
+        days_threshold: int = 365,
+        min_activation: float = 0.01
+    ) -> Dict:
+        """
+        Start a background job deleting old and unused memories
+        
+        Args:
+            days_threshold: Age threshold in days
+            min_activation: Memories below this activation (and accessed fewer than twice) are deleted
+            
+        Returns:
+            Status of the job (the running one if a job is already in progress)
+        """
+        return await self.retention.start_job(days_threshold, min_activation)
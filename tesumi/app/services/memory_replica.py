@@ -0,0 +1,841 @@
+"""
+Memory Graph Replica
+Process-resident copy of memory_nodes embeddings and the memory_edges
+adjacency (CSR) so vector candidate selection and subgraph extraction run
+without database round-trips. Postgres stays the durable store: the replica
+is loaded at startup, updated write-through by MemoryManager and reconciled
+against the database periodically.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import bindparam, text
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import database
+from app.core.config import settings
+from app.services.memory_subgraph import decode_vectors
+
+logger = logging.getLogger(__name__)
+
+NODE_COLUMNS = """
+    SELECT id, content, memory_type, category, valence, arousal,
+           activation_strength, access_count, created_at, last_accessed,
+           gru_state, vector_send(embedding)
+    FROM memory_nodes
+"""
+
+EDGE_COLUMNS = """
+    SELECT id, source_id, target_id, edge_type, weight, created_at
+    FROM memory_edges
+"""
+
+NODES_SQL = text(NODE_COLUMNS)
+
+NODES_BY_ID_SQL = text(NODE_COLUMNS + "WHERE id = ANY(:ids)").bindparams(
+    bindparam("ids", type_=ARRAY(UUID(as_uuid=True)))
+)
+
+EDGES_SQL = text(EDGE_COLUMNS + "WHERE CAST(:since AS TIMESTAMP) IS NULL OR created_at >= :since")
+
+EDGES_BY_ID_SQL = text(EDGE_COLUMNS + "WHERE id = ANY(:ids)").bindparams(
+    bindparam("ids", type_=ARRAY(UUID(as_uuid=True)))
+)
+
+NODE_STATE_SQL = text("""
+    SELECT id, valence, arousal, activation_strength, access_count, last_accessed, gru_state, updated_at
+    FROM memory_nodes
+    WHERE updated_at >= :since
+""")
+
+NODE_IDS_SQL = text("SELECT id FROM memory_nodes")
+EDGE_IDS_SQL = text("SELECT id FROM memory_edges")
+
+COUNTS_SQL = text("""
+    SELECT (SELECT count(*) FROM memory_nodes), (SELECT count(*) FROM memory_edges)
+""")
+
+# Rows fetched per partition while streaming the tables
+LOAD_PARTITION_SIZE = 2000
+
+# Watermarked reads start this far back, so rows committed late by
+# transactions that began before the previous pass are not missed
+WATERMARK_OVERLAP = timedelta(minutes=2)
+
+# Write-through edges are merged into the CSR arrays once this many are pending
+PENDING_EDGE_LIMIT = 4096
+
+# Tombstoned node rows / edge slots are reclaimed during reconciliation once
+# they make up this fraction of the arrays (and at least COMPACT_MIN_DEAD)
+COMPACT_DEAD_FRACTION = 0.25
+COMPACT_MIN_DEAD = 1024
+
+# Sources per block of nearest_neighbors: block rows x nodes stays under this
+# many float32 similarities (16 MB)
+NEIGHBOR_BLOCK_ELEMENTS = 4_000_000
+
+
+class MemoryGraphReplica:
+    """
+    In-memory memory graph
+    Node columns live in growable arrays indexed by row; edges are kept as
+    outgoing and incoming CSR arrays plus a small pending list for edges
+    written since the last merge. Every edge has a slot; deleted edges and
+    nodes are tombstoned (and deleted edges dropped at the next merge), so
+    reconciliation applies deltas and never needs a full reload. Once
+    tombstones pile up, reconciliation compacts rows and slots in place.
+    """
+
+    def __init__(self, dim: int = 384, hidden_dim: int = 128):
+        self.dim = dim
+        self.hidden_dim = hidden_dim
+        self.loaded = False
+
+        self._lock = threading.Lock()
+        self._reconcile_task: Optional[asyncio.Task] = None
+        self._reset()
+
+        # Metrics
+        self.full_loads = 0
+        self.reconciliations = 0
+        self.compactions = 0
+        self.last_reconciled: Optional[datetime] = None
+        self.queries = 0
+
+    def _reset(self, capacity: int = 1024):
+        self.ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._capacity = capacity
+
+        self._embeddings = np.zeros((capacity, self.dim), dtype=np.float32)
+        self._norms = np.zeros(capacity, dtype=np.float32)
+        self._gru_states = np.zeros((capacity, self.hidden_dim), dtype=np.float32)
+        self._has_state = np.zeros(capacity, dtype=bool)
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._valence = np.zeros(capacity, dtype=np.float64)
+        self._arousal = np.zeros(capacity, dtype=np.float64)
+        self._activation = np.zeros(capacity, dtype=np.float64)
+        self._access_count = np.zeros(capacity, dtype=np.int64)
+        self._memory_type = np.empty(capacity, dtype=object)
+        self._category = np.empty(capacity, dtype=object)
+        self._content = np.empty(capacity, dtype=object)
+        self._created_at = np.empty(capacity, dtype=object)
+        self._last_accessed = np.empty(capacity, dtype=object)
+
+        # Edges: CSR over rows [0, csr_rows) plus pending write-through edges
+        self._edge_types: List[str] = []
+        self._edge_type_codes: Dict[str, int] = {}
+        self._edge_slots: Dict[str, int] = {}  # Live edge id -> slot
+        self._edge_alive = np.zeros(capacity, dtype=bool)
+        self._next_slot = 0
+        self._row_edges: Dict[int, List[str]] = defaultdict(list)
+        self._csr_rows = 0
+        self._out_ptr = np.zeros(1, dtype=np.int64)
+        self._out_idx = np.zeros(0, dtype=np.int64)
+        self._out_weight = np.zeros(0, dtype=np.float64)
+        self._out_type = np.zeros(0, dtype=np.int16)
+        self._out_slot = np.zeros(0, dtype=np.int64)
+        self._in_ptr = np.zeros(1, dtype=np.int64)
+        self._in_idx = np.zeros(0, dtype=np.int64)
+        self._in_slot = np.zeros(0, dtype=np.int64)
+        self._pending_out: Dict[int, List[Tuple[int, float, int, int]]] = defaultdict(list)
+        self._pending_in: Dict[int, List[Tuple[int, int]]] = defaultdict(list)
+        self._pending_count = 0
+
+        self._watermark: Optional[datetime] = None
+        self._state_watermark: Optional[datetime] = None
+
+    @property
+    def num_nodes(self) -> int:
+        return int(self._alive[:len(self.ids)].sum())
+
+    @property
+    def num_edges(self) -> int:
+        return len(self._edge_slots)
+
+    def partition_known(self, node_ids: Sequence[str]) -> Tuple[List[str], List[str]]:
+        """Split node ids into (in the replica, not in the replica)"""
+        with self._lock:
+            known, unknown = [], []
+            for node_id in node_ids:
+                (known if str(node_id) in self._rows else unknown).append(str(node_id))
+            return known, unknown
+
+    # ------------------------------------------------------------------
+    # Write-through
+    # ------------------------------------------------------------------
+
+    def add_nodes(self, nodes: Sequence[Dict]):
+        """
+        Add memory nodes (idempotent by id)
+
+        Args:
+            nodes: Dicts with the memory_nodes columns; 'embedding' is a
+                vector and 'gru_state' an optional list of floats
+        """
+        with self._lock:
+            self._add_nodes(nodes)
+
+    def _add_nodes(self, nodes: Sequence[Dict]):
+        nodes = [node for node in nodes if str(node['id']) not in self._rows]
+        if not nodes:
+            return
+
+        start = len(self.ids)
+        self._ensure_capacity(start + len(nodes))
+        rows = slice(start, start + len(nodes))
+
+        embeddings = np.asarray([node['embedding'] for node in nodes], dtype=np.float32)
+        self._embeddings[rows] = embeddings
+        self._norms[rows] = np.linalg.norm(embeddings, axis=1)
+        self._alive[rows] = True
+        self._valence[rows] = [node.get('valence') or 0.0 for node in nodes]
+        self._arousal[rows] = [node.get('arousal') or 0.0 for node in nodes]
+        self._activation[rows] = [node.get('activation_strength', 1.0) for node in nodes]
+        self._access_count[rows] = [node.get('access_count') or 0 for node in nodes]
+
+        for offset, node in enumerate(nodes):
+            row = start + offset
+            node_id = str(node['id'])
+            self.ids.append(node_id)
+            self._rows[node_id] = row
+            self._memory_type[row] = node.get('memory_type')
+            self._category[row] = node.get('category')
+            self._content[row] = node.get('content')
+            self._created_at[row] = node.get('created_at')
+            self._last_accessed[row] = node.get('last_accessed')
+            gru_state = node.get('gru_state')
+            if gru_state is not None and len(gru_state) == self.hidden_dim:
+                self._gru_states[row] = gru_state
+                self._has_state[row] = True
+
+    def _ensure_capacity(self, size: int):
+        if size <= self._capacity:
+            return
+
+        capacity = max(size, self._capacity * 2)
+        for name in (
+            '_embeddings', '_norms', '_gru_states', '_has_state', '_alive', '_valence',
+            '_arousal', '_activation', '_access_count', '_memory_type', '_category',
+            '_content', '_created_at', '_last_accessed'
+        ):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype) if old.dtype != object \
+                else np.empty(capacity, dtype=object)
+            new[:self._capacity] = old
+            setattr(self, name, new)
+        self._capacity = capacity
+
+    def add_edges(self, edges: Iterable[Dict]):
+        """
+        Add memory edges (idempotent by edge id)
+
+        Args:
+            edges: Dicts with id, source_id, target_id, edge_type and weight
+        """
+        with self._lock:
+            self._add_edges(edges)
+            if self._pending_count >= PENDING_EDGE_LIMIT:
+                self._merge_pending_edges()
+
+    def _add_edges(self, edges: Iterable[Dict]):
+        for edge in edges:
+            edge_id = str(edge['id'])
+            source = self._rows.get(str(edge['source_id']))
+            target = self._rows.get(str(edge['target_id']))
+            if edge_id in self._edge_slots or source is None or target is None:
+                continue
+
+            slot = self._next_slot
+            self._next_slot += 1
+            if slot >= len(self._edge_alive):
+                self._edge_alive = np.concatenate([self._edge_alive, np.zeros(len(self._edge_alive), dtype=bool)])
+            self._edge_alive[slot] = True
+            self._edge_slots[edge_id] = slot
+            self._row_edges[source].append(edge_id)
+            self._row_edges[target].append(edge_id)
+            type_code = self._edge_type_code(edge['edge_type'])
+            self._pending_out[source].append((target, float(edge['weight']), type_code, slot))
+            self._pending_in[target].append((source, slot))
+            self._pending_count += 1
+
+    def _remove_edges(self, edge_ids: Iterable[str]):
+        for edge_id in edge_ids:
+            slot = self._edge_slots.pop(edge_id, None)
+            if slot is not None:
+                self._edge_alive[slot] = False
+
+    def _edge_type_code(self, edge_type: str) -> int:
+        code = self._edge_type_codes.get(edge_type)
+        if code is None:
+            code = len(self._edge_types)
+            self._edge_types.append(edge_type)
+            self._edge_type_codes[edge_type] = code
+        return code
+
+    def _merge_pending_edges(self):
+        """Fold pending edges into fresh CSR arrays, dropping deleted edges"""
+        num_rows = len(self.ids)
+        sources = [np.repeat(np.arange(self._csr_rows), np.diff(self._out_ptr))]
+        targets = [self._out_idx]
+        weights = [self._out_weight]
+        types = [self._out_type]
+        slots = [self._out_slot]
+        for source, out_edges in self._pending_out.items():
+            sources.append(np.full(len(out_edges), source, dtype=np.int64))
+            targets.append(np.array([edge[0] for edge in out_edges], dtype=np.int64))
+            weights.append(np.array([edge[1] for edge in out_edges], dtype=np.float64))
+            types.append(np.array([edge[2] for edge in out_edges], dtype=np.int16))
+            slots.append(np.array([edge[3] for edge in out_edges], dtype=np.int64))
+
+        slots = np.concatenate(slots)
+        live = self._edge_alive[slots]
+        self._build_csr(
+            np.concatenate(sources)[live],
+            np.concatenate(targets)[live],
+            np.concatenate(weights)[live],
+            np.concatenate(types)[live],
+            slots[live],
+            num_rows
+        )
+        self._pending_out.clear()
+        self._pending_in.clear()
+        self._pending_count = 0
+
+    def _build_csr(
+        self,
+        sources: np.ndarray,
+        targets: np.ndarray,
+        weights: np.ndarray,
+        types: np.ndarray,
+        slots: np.ndarray,
+        num_rows: int
+    ):
+        order = np.argsort(sources, kind='stable')
+        self._out_idx = targets[order]
+        self._out_weight = weights[order]
+        self._out_type = types[order]
+        self._out_slot = slots[order]
+        self._out_ptr = np.zeros(num_rows + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=num_rows), out=self._out_ptr[1:])
+
+        order = np.argsort(targets, kind='stable')
+        self._in_idx = sources[order]
+        self._in_slot = slots[order]
+        self._in_ptr = np.zeros(num_rows + 1, dtype=np.int64)
+        np.cumsum(np.bincount(targets, minlength=num_rows), out=self._in_ptr[1:])
+
+        self._csr_rows = num_rows
+
+    def _needs_compaction(self) -> bool:
+        dead_rows = len(self.ids) - len(self._rows)
+        dead_slots = self._next_slot - len(self._edge_slots)
+        return any(
+            dead >= COMPACT_MIN_DEAD and dead >= COMPACT_DEAD_FRACTION * total
+            for dead, total in ((dead_rows, len(self.ids)), (dead_slots, self._next_slot))
+        )
+
+    def _compact(self):
+        """Drop tombstoned rows and edge slots, renumbering the live ones"""
+        self._merge_pending_edges()  # Every live edge is in the CSR arrays now
+
+        num_rows = len(self.ids)
+        live_rows = np.flatnonzero(self._alive[:num_rows])
+        new_rows = np.full(num_rows, -1, dtype=np.int64)
+        new_rows[live_rows] = np.arange(len(live_rows))
+
+        capacity = max(1024, len(live_rows))
+        for name in (
+            '_embeddings', '_norms', '_gru_states', '_has_state', '_alive', '_valence',
+            '_arousal', '_activation', '_access_count', '_memory_type', '_category',
+            '_content', '_created_at', '_last_accessed'
+        ):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype) if old.dtype != object \
+                else np.empty(capacity, dtype=object)
+            new[:len(live_rows)] = old[live_rows]
+            setattr(self, name, new)
+        self._capacity = capacity
+        self.ids = [self.ids[row] for row in live_rows.tolist()]
+        self._rows = {node_id: row for row, node_id in enumerate(self.ids)}
+
+        # Edges of deleted nodes were tombstoned with them, so both
+        # endpoints of every CSR edge are live rows
+        num_edges = len(self._out_slot)
+        new_slots = np.full(self._next_slot, -1, dtype=np.int64)
+        new_slots[self._out_slot] = np.arange(num_edges)
+        self._edge_slots = {edge_id: int(new_slots[slot]) for edge_id, slot in self._edge_slots.items()}
+        self._edge_alive = np.zeros(max(1024, 2 * num_edges), dtype=bool)
+        self._edge_alive[:num_edges] = True
+        self._next_slot = num_edges
+        self._row_edges = defaultdict(list, {
+            int(new_rows[row]): [edge_id for edge_id in edge_ids if edge_id in self._edge_slots]
+            for row, edge_ids in self._row_edges.items()
+            if new_rows[row] >= 0
+        })
+
+        sources = np.repeat(np.arange(self._csr_rows), np.diff(self._out_ptr))
+        self._build_csr(
+            new_rows[sources],
+            new_rows[self._out_idx],
+            self._out_weight,
+            self._out_type,
+            new_slots[self._out_slot],
+            len(live_rows)
+        )
+        self.compactions += 1
+        logger.info(f"Memory replica compacted to {len(live_rows)} nodes / {num_edges} edges")
+
+    def remove_nodes(self, node_ids: Iterable[str]):
+        """Tombstone deleted nodes; their edges are ignored from now on"""
+        with self._lock:
+            self._remove_nodes(node_ids)
+
+    def _remove_nodes(self, node_ids: Iterable[str]):
+        for node_id in node_ids:
+            row = self._rows.pop(str(node_id), None)
+            if row is not None:
+                self._alive[row] = False
+                self._remove_edges(self._row_edges.pop(row, ()))
+
+    def touch(self, node_ids: Iterable[str]):
+        """Mirror _update_memory_access for activated memories"""
+        with self._lock:
+            rows = [self._rows[node_id] for node_id in node_ids if node_id in self._rows]
+            if not rows:
+                return
+            now = datetime.utcnow()
+            self._access_count[rows] += 1
+            self._activation[rows] = np.minimum(self._activation[rows] * 1.1, 1.0)
+            for row in rows:
+                self._last_accessed[row] = now
+
+    def update_emotions(self, scores: Dict[str, Tuple[float, float]]):
+        """Mirror deferred emotion enrichment ({node id: (valence, arousal)})"""
+        with self._lock:
+            for node_id, (valence, arousal) in scores.items():
+                row = self._rows.get(str(node_id))
+                if row is not None:
+                    self._valence[row] = valence
+                    self._arousal[row] = arousal
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def _out_edges(self, row: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        if row < self._csr_rows:
+            start, end = self._out_ptr[row], self._out_ptr[row + 1]
+            targets, weights = self._out_idx[start:end], self._out_weight[start:end]
+            types, slots = self._out_type[start:end], self._out_slot[start:end]
+        else:
+            targets, weights = np.zeros(0, np.int64), np.zeros(0)
+            types, slots = np.zeros(0, np.int16), np.zeros(0, np.int64)
+
+        pending = self._pending_out.get(row)
+        if pending:
+            targets = np.concatenate([targets, [edge[0] for edge in pending]]).astype(np.int64)
+            weights = np.concatenate([weights, [edge[1] for edge in pending]])
+            types = np.concatenate([types, [edge[2] for edge in pending]]).astype(np.int16)
+            slots = np.concatenate([slots, [edge[3] for edge in pending]]).astype(np.int64)
+        live = self._edge_alive[slots]
+        return targets[live], weights[live], types[live]
+
+    def _neighbors(self, row: int) -> np.ndarray:
+        neighbors = [self._out_edges(row)[0]]
+        if row < self._csr_rows:
+            start, end = self._in_ptr[row], self._in_ptr[row + 1]
+            neighbors.append(self._in_idx[start:end][self._edge_alive[self._in_slot[start:end]]])
+        pending = self._pending_in.get(row)
+        if pending:
+            neighbors.append(np.asarray(
+                [source for source, slot in pending if self._edge_alive[slot]], dtype=np.int64
+            ))
+        neighbors = np.concatenate(neighbors).astype(np.int64)
+        return neighbors[self._alive[neighbors]]
+
+    def candidates(
+        self,
+        query_embedding: np.ndarray,
+        limit: int,
+        memory_type: Optional[str] = None,
+        min_activation: float = 0.1
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Cosine-distance top-`limit` rows, same filters as the pgvector query
+
+        Returns:
+            (rows, distances) ordered by ascending distance
+        """
+        n = len(self.ids)
+        query = np.asarray(query_embedding, dtype=np.float32)
+        similarities = self._embeddings[:n] @ query
+        similarities /= self._norms[:n] * np.linalg.norm(query) + 1e-8
+
+        mask = self._alive[:n] & (self._activation[:n] >= min_activation)
+        if memory_type is not None:
+            mask &= self._memory_type[:n] == memory_type
+        similarities[~mask] = -np.inf
+
+        eligible = int(mask.sum())
+        limit = min(limit, eligible)
+        if limit == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+
+        top = np.argpartition(-similarities, limit - 1)[:limit]
+        top = top[np.argsort(-similarities[top], kind='stable')]
+        return top, 1.0 - similarities[top].astype(np.float64)
+
+    def nearest_neighbors(
+        self,
+        node_ids: Sequence[str],
+        max_connections: int,
+        similarity_threshold: float
+    ) -> List[Tuple[str, str, float]]:
+        """
+        Similarity-edge candidates for known nodes, by blocked matrix products
+
+        Mirrors the LATERAL kNN query: the `max_connections` nearest other
+        live nodes of each source, kept when their cosine similarity exceeds
+        `similarity_threshold`. Blocking (see NEIGHBOR_BLOCK_ELEMENTS) bounds
+        the temporaries, and the lock is released between blocks so
+        searches are not held up; blocking, so callers run it on the
+        background executor.
+
+        Returns:
+            (source_id, target_id, similarity) triples
+        """
+        node_ids = [str(node_id) for node_id in node_ids]
+        edges = []
+        start = 0
+        while start < len(node_ids):
+            with self._lock:
+                n = len(self.ids)
+                k = min(max_connections, n - 1)
+                if k <= 0:
+                    return []
+                block = node_ids[start:start + max(1, NEIGHBOR_BLOCK_ELEMENTS // n)]
+                start += len(block)
+                sources = [self._rows[node_id] for node_id in block if node_id in self._rows]
+                if not sources:
+                    continue
+
+                similarities = self._embeddings[sources] @ self._embeddings[:n].T
+                similarities /= self._norms[sources, None] + 1e-8
+                similarities /= self._norms[None, :n] + 1e-8
+                similarities[:, ~self._alive[:n]] = -np.inf
+                similarities[np.arange(len(sources)), sources] = -np.inf
+
+                top = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+                for i, source in enumerate(sources):
+                    for target in top[i]:
+                        similarity = float(similarities[i, target])
+                        if similarity > similarity_threshold:
+                            edges.append((self.ids[source], self.ids[target], similarity))
+        return edges
+
+    def fetch_candidate_subgraph(
+        self,
+        query_embedding: np.ndarray,
+        limit: int,
+        memory_type: Optional[str] = None,
+        min_activation: float = 0.1,
+        hops: int = 0
+    ) -> Tuple[List[Dict], List[Dict]]:
+        """
+        In-memory counterpart of memory_subgraph.fetch_candidate_subgraph
+
+        Args:
+            query_embedding: Query vector
+            limit: Number of candidates
+            memory_type: Optional memory type filter
+            min_activation: Minimum activation strength
+            hops: Neighbour hops added around the candidates (0 = induced
+                subgraph of the candidates only)
+
+        Returns:
+            (memory_nodes, memory_edges) in the same shape as the SQL fetch
+        """
+        with self._lock:
+            self.queries += 1
+            rows, distances = self.candidates(query_embedding, limit, memory_type, min_activation)
+            rows = rows.tolist()
+            distances = distances.tolist()
+
+            # k-hop expansion over the undirected adjacency
+            selected = set(rows)
+            frontier = rows
+            for _ in range(hops):
+                expansion = []
+                for row in frontier:
+                    for neighbor in self._neighbors(row).tolist():
+                        if neighbor not in selected:
+                            selected.add(neighbor)
+                            expansion.append(neighbor)
+                if expansion:
+                    query = np.asarray(query_embedding, dtype=np.float32)
+                    similarities = self._embeddings[expansion] @ query
+                    similarities /= self._norms[expansion] * np.linalg.norm(query) + 1e-8
+                    rows.extend(expansion)
+                    distances.extend((1.0 - similarities.astype(np.float64)).tolist())
+                frontier = expansion
+
+            memory_nodes = [self._node_dict(row, distance) for row, distance in zip(rows, distances)]
+
+            memory_edges = []
+            for row in rows:
+                targets, weights, types = self._out_edges(row)
+                for target, weight, type_code in zip(targets.tolist(), weights.tolist(), types.tolist()):
+                    if target in selected:
+                        memory_edges.append({
+                            'source_id': self.ids[row],
+                            'target_id': self.ids[target],
+                            'edge_type': self._edge_types[type_code],
+                            'weight': weight
+                        })
+
+        return memory_nodes, memory_edges
+
+    def _node_dict(self, row: int, distance: float) -> Dict:
+        return {
+            'id': self.ids[row],
+            'content': self._content[row],
+            'memory_type': self._memory_type[row],
+            'category': self._category[row],
+            'valence': float(self._valence[row]),
+            'arousal': float(self._arousal[row]),
+            'activation_strength': float(self._activation[row]),
+            'access_count': int(self._access_count[row]),
+            'created_at': self._created_at[row],
+            'last_accessed': self._last_accessed[row],
+            'embedding': self._embeddings[row].copy(),
+            'vector_distance': distance,
+            'gru_state': self._gru_states[row].tolist() if self._has_state[row] else None
+        }
+
+    # ------------------------------------------------------------------
+    # Loading and reconciliation
+    # ------------------------------------------------------------------
+
+    async def _fetch_nodes(self, db: AsyncSession, sql, params: Dict) -> List[Dict]:
+        nodes = []
+        result = await db.stream(sql, params)
+        async for partition in result.partitions(LOAD_PARTITION_SIZE):
+            embeddings = decode_vectors([row[11] for row in partition], self.dim)
+            for i, row in enumerate(partition):
+                nodes.append({
+                    'id': str(row[0]),
+                    'content': row[1],
+                    'memory_type': row[2],
+                    'category': row[3],
+                    'valence': row[4],
+                    'arousal': row[5],
+                    'activation_strength': row[6],
+                    'access_count': row[7],
+                    'created_at': row[8],
+                    'last_accessed': row[9],
+                    'gru_state': row[10],
+                    'embedding': embeddings[i]
+                })
+        return nodes
+
+    async def _fetch_edges(self, db: AsyncSession, sql, params: Dict) -> List[Dict]:
+        edges = []
+        result = await db.stream(sql, params)
+        async for partition in result.partitions(LOAD_PARTITION_SIZE * 5):
+            for row in partition:
+                edges.append({
+                    'id': str(row[0]),
+                    'source_id': str(row[1]),
+                    'target_id': str(row[2]),
+                    'edge_type': row[3],
+                    'weight': row[4],
+                    'created_at': row[5]
+                })
+        return edges
+
+    async def load(self, db: AsyncSession):
+        """Full load of memory_nodes and memory_edges"""
+        started = time.perf_counter()
+        started_at = datetime.utcnow()
+        nodes = await self._fetch_nodes(db, NODES_SQL, {})
+        edges = await self._fetch_edges(db, EDGES_SQL, {"since": None})
+
+        with self._lock:
+            self._reset(capacity=max(1024, len(nodes)))
+            self._add_nodes(nodes)
+            self._add_edges(edges)
+            self._merge_pending_edges()
+            # Set even without edges, so reconcile never re-reads the whole table
+            self._watermark = self._latest(edge['created_at'] for edge in edges) or started_at
+            self._state_watermark = started_at
+            self.loaded = True
+            self.full_loads += 1
+
+        logger.info(
+            f"Memory replica loaded {len(nodes)} nodes / {len(edges)} edges "
+            f"in {time.perf_counter() - started:.2f}s"
+        )
+
+    async def reconcile(self, db: AsyncSession):
+        """
+        Catch up with changes made outside this process, applying deltas only
+
+        Nodes updated since the state watermark have their scalars
+        (emotions, activation, access counts, GRU states) refreshed, or are
+        added when unknown (inserts set updated_at, so a historical
+        created_at does not hide a node). Edges created since the edge
+        watermark are merged. When row counts still disagree, the id sets
+        are diffed: missing rows are fetched by id and deleted ones
+        tombstoned, and tombstones are compacted away once they pile up.
+        """
+        started_at = datetime.utcnow()
+        edges = await self._fetch_edges(db, EDGES_SQL, {"since": self._overlap(self._watermark)})
+        state_rows = (await db.execute(
+            NODE_STATE_SQL, {"since": self._overlap(self._state_watermark) or datetime.min}
+        )).fetchall()
+
+        with self._lock:
+            self._refresh_state(state_rows)
+            missing_nodes = {str(row[0]) for row in state_rows if str(row[0]) not in self._rows}
+        self._state_watermark = started_at
+
+        self._apply_delta(await self._fetch_nodes_by_id(db, missing_nodes), edges)
+        self._watermark = self._latest([self._watermark, started_at] + [edge['created_at'] for edge in edges])
+
+        node_count, edge_count = (await db.execute(COUNTS_SQL)).one()
+        if node_count != self.num_nodes:
+            await self._diff_nodes(db)
+        if edge_count != self.num_edges:
+            await self._diff_edges(db)
+
+        with self._lock:
+            if self._needs_compaction():
+                self._compact()
+
+        self.reconciliations += 1
+        self.last_reconciled = datetime.utcnow()
+        if node_count != self.num_nodes or edge_count != self.num_edges:
+            # Rows committed during this pass (or edges whose endpoints are
+            # not loaded yet); the next pass applies them
+            logger.debug(
+                f"Memory replica delta pending ({self.num_nodes}/{node_count} nodes, "
+                f"{self.num_edges}/{edge_count} edges)"
+            )
+
+    def _refresh_state(self, state_rows):
+        for node_id, valence, arousal, activation, access_count, last_accessed, gru_state, _ in state_rows:
+            row = self._rows.get(str(node_id))
+            if row is None:
+                continue
+            self._valence[row] = valence or 0.0
+            self._arousal[row] = arousal or 0.0
+            self._activation[row] = activation if activation is not None else 1.0
+            self._access_count[row] = access_count or 0
+            self._last_accessed[row] = last_accessed
+            if gru_state is not None and len(gru_state) == self.hidden_dim:
+                self._gru_states[row] = gru_state
+                self._has_state[row] = True
+
+    async def _fetch_nodes_by_id(self, db: AsyncSession, node_ids: Iterable[str]) -> List[Dict]:
+        node_ids = [uuid.UUID(node_id) for node_id in node_ids]
+        if not node_ids:
+            return []
+        return await self._fetch_nodes(db, NODES_BY_ID_SQL, {"ids": node_ids})
+
+    def _apply_delta(
+        self,
+        nodes: List[Dict],
+        edges: List[Dict],
+        removed_nodes: Sequence[str] = (),
+        removed_edges: Sequence[str] = ()
+    ):
+        if not (nodes or edges or removed_nodes or removed_edges):
+            return
+        with self._lock:
+            self._add_nodes(nodes)
+            self._remove_nodes(removed_nodes)
+            self._remove_edges(removed_edges)
+            self._add_edges(edges)
+            if self._pending_count >= PENDING_EDGE_LIMIT:
+                self._merge_pending_edges()
+
+    async def _diff_nodes(self, db: AsyncSession):
+        """Tombstone deleted nodes and fetch nodes the watermarks missed"""
+        # Only rows known before the id scan: their inserts are committed, so
+        # a missing id means a deletion, not a write-through racing the scan
+        with self._lock:
+            known = set(self._rows)
+        live = {str(node_id) for node_id in (await db.execute(NODE_IDS_SQL)).scalars()}
+        nodes = await self._fetch_nodes_by_id(db, live - known)
+        self._apply_delta(nodes, [], removed_nodes=list(known - live))
+
+    async def _diff_edges(self, db: AsyncSession):
+        """Tombstone deleted edges (e.g. a rebuild elsewhere) and fetch missed ones"""
+        with self._lock:
+            known = set(self._edge_slots)
+        live = {str(edge_id) for edge_id in (await db.execute(EDGE_IDS_SQL)).scalars()}
+        missing = [uuid.UUID(edge_id) for edge_id in live - known]
+        edges = await self._fetch_edges(db, EDGES_BY_ID_SQL, {"ids": missing}) if missing else []
+        self._apply_delta([], edges, removed_edges=list(known - live))
+
+    @staticmethod
+    def _overlap(watermark: Optional[datetime]) -> Optional[datetime]:
+        return watermark - WATERMARK_OVERLAP if watermark is not None else None
+
+    @staticmethod
+    def _latest(timestamps: Iterable[Optional[datetime]]) -> Optional[datetime]:
+        timestamps = [timestamp for timestamp in timestamps if timestamp is not None]
+        return max(timestamps) if timestamps else None
+
+    def start(self, interval: Optional[float] = None):
+        """Start the periodic reconciliation task"""
+        if self._reconcile_task is None:
+            self._reconcile_task = asyncio.create_task(
+                self._reconcile_loop(interval or settings.MEMORY_REPLICA_RECONCILE_INTERVAL)
+            )
+
+    async def stop(self):
+        """Stop the reconciliation task"""
+        if self._reconcile_task is not None:
+            self._reconcile_task.cancel()
+            try:
+                await self._reconcile_task
+            except asyncio.CancelledError:
+                pass
+            self._reconcile_task = None
+
+    async def _reconcile_loop(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                async with database.SessionLocal() as db:
+                    if self.loaded:
+                        await self.reconcile(db)
+                    else:
+                        await self.load(db)
+            except Exception as e:
+                logger.error(f"Error reconciling memory replica: {e}")
+
+    def get_metrics(self) -> Dict:
+        """Replica size and sync status"""
+        return {
+            'loaded': self.loaded,
+            'nodes': self.num_nodes,
+            'edges': self.num_edges,
+            'pending_edges': self._pending_count,
+            'full_loads': self.full_loads,
+            'reconciliations': self.reconciliations,
+            'compactions': self.compactions,
+            'last_reconciled': self.last_reconciled.isoformat() if self.last_reconciled else None,
+            'queries': self.queries
+        }
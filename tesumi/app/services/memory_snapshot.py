@@ -0,0 +1,171 @@
+"""
+Snapshot storage for external memory
+Writes array snapshots atomically and attaches to them as np.memmap
+"""
+
+import fcntl
+import json
+import logging
+import os
+import shutil
+import time
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CURRENT_FILE = "CURRENT"
+META_FILE = "meta.json"
+LOCK_FILE = "WRITER.lock"
+
+
+def acquire_writer_lock(directory: str) -> Optional[int]:
+    """
+    Try to become the single snapshot writer of a directory
+
+    Takes a non-blocking flock on the directory's lock file; the kernel
+    releases it when the holder exits, so a follower can take over from a
+    crashed writer. Temporary directories left behind by earlier writers
+    are removed once the lock is held (no one else writes then).
+
+    Returns:
+        The lock file descriptor (keep it open while writing), or None if
+        another process is the writer
+    """
+    os.makedirs(directory, exist_ok=True)
+    fd = os.open(os.path.join(directory, LOCK_FILE), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        return None
+
+    for entry in os.listdir(directory):
+        if _is_temp(entry):
+            shutil.rmtree(os.path.join(directory, entry), ignore_errors=True)
+    return fd
+
+
+def release_writer_lock(fd: int):
+    """Give up the writer role taken with acquire_writer_lock"""
+    try:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    finally:
+        os.close(fd)
+
+
+def current_snapshot(directory: str) -> Optional[str]:
+    """Name of the latest complete snapshot in a directory, if any"""
+    try:
+        with open(os.path.join(directory, CURRENT_FILE)) as f:
+            name = f.read().strip()
+    except FileNotFoundError:
+        return None
+    return name if os.path.isdir(os.path.join(directory, name)) else None
+
+
+def write_snapshot(directory: str, arrays: Dict[str, np.ndarray], meta: Dict) -> str:
+    """
+    Write a snapshot and atomically make it current
+
+    The snapshot is written to a temporary directory, fsynced and renamed;
+    the CURRENT pointer is then swapped with os.replace, so readers only ever
+    see complete snapshots. Older snapshots are removed afterwards. Callers
+    must hold the directory's writer lock (acquire_writer_lock).
+
+    Args:
+        directory: Snapshot root directory
+        arrays: Named arrays to store (one .npy file each)
+        meta: JSON-serializable scalar state
+
+    Returns:
+        Name of the new snapshot
+    """
+    os.makedirs(directory, exist_ok=True)
+    name = f"snapshot-{time.time_ns()}"
+    tmp_path = os.path.join(directory, f".{name}.{os.getpid()}.tmp")
+    os.makedirs(tmp_path)
+
+    for key, array in arrays.items():
+        path = os.path.join(tmp_path, f"{key}.npy")
+        with open(path, "wb") as f:
+            np.save(f, array)
+            f.flush()
+            os.fsync(f.fileno())
+
+    with open(os.path.join(tmp_path, META_FILE), "w") as f:
+        json.dump(meta, f)
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.rename(tmp_path, os.path.join(directory, name))
+
+    pointer_tmp = os.path.join(directory, f".{CURRENT_FILE}.{os.getpid()}.tmp")
+    with open(pointer_tmp, "w") as f:
+        f.write(name)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(pointer_tmp, os.path.join(directory, CURRENT_FILE))
+    _fsync_dir(directory)
+
+    _remove_stale(directory, keep=name)
+    return name
+
+
+def load_snapshot(
+    directory: str,
+    read_only: bool = False
+) -> Optional[Tuple[str, Dict[str, np.ndarray], Dict]]:
+    """
+    Attach to the current snapshot without reading it into memory
+
+    Arrays are returned as np.memmap views: read-only ("r") so several worker
+    processes share the same page cache, or copy-on-write ("c") so a writer
+    can mutate its view without touching the files on disk.
+
+    Returns:
+        (snapshot name, arrays, meta), or None if no snapshot exists
+    """
+    name = current_snapshot(directory)
+    if name is None:
+        return None
+
+    path = os.path.join(directory, name)
+    with open(os.path.join(path, META_FILE)) as f:
+        meta = json.load(f)
+
+    mmap_mode = "r" if read_only else "c"
+    arrays = {
+        filename[:-len(".npy")]: np.load(os.path.join(path, filename), mmap_mode=mmap_mode)
+        for filename in os.listdir(path)
+        if filename.endswith(".npy")
+    }
+    return name, arrays, meta
+
+
+def _remove_stale(directory: str, keep: str):
+    """Remove old snapshots and this process's half-written ones (open memmaps stay valid on POSIX)"""
+    own_suffix = f".{os.getpid()}.tmp"
+    for entry in os.listdir(directory):
+        if entry == keep:
+            continue
+        if entry.startswith("snapshot-") or (_is_temp(entry) and entry.endswith(own_suffix)):
+            shutil.rmtree(os.path.join(directory, entry), ignore_errors=True)
+
+
+def _is_temp(entry: str) -> bool:
+    return entry.startswith(".snapshot-") and entry.endswith(".tmp")
+
+
+def _fsync_dir(directory: str):
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
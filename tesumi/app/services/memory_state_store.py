@@ -0,0 +1,265 @@
+"""
+Memory State Store
+Bounded, array-backed storage for per-node GRU hidden states
+with LRU eviction and write-behind persistence to memory_nodes.gru_state
+"""
+
+import asyncio
+import logging
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+
+import torch
+from sqlalchemy import bindparam, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import database
+from app.core.config import settings
+from app.models.memory import MemoryNode
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryStateStore:
+    """
+    Compact store for GRU memory states
+    States live in one preallocated (capacity, hidden_dim) tensor; an id -> row
+    index in LRU order decides which row is reused when the store is full.
+    Updated states are marked dirty and flushed to the database in batches.
+    """
+
+    def __init__(self, capacity: int = 10000, hidden_dim: int = 128):
+        self.capacity = capacity
+        self.hidden_dim = hidden_dim
+
+        # Contiguous state buffer and id -> row index (LRU order, oldest first)
+        self.states = torch.zeros(capacity, hidden_dim)
+        self._rows: "OrderedDict[str, int]" = OrderedDict()
+        self._free_rows = list(range(capacity - 1, -1, -1))
+
+        # Write-behind bookkeeping
+        self._dirty = set()
+        self._evicted: Dict[str, List[float]] = {}
+        # States taken by a flush that has not committed yet
+        self._in_flight: Dict[str, List[float]] = {}
+
+        self._lock = threading.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, node_id: str) -> bool:
+        return node_id in self._rows
+
+    def gather(
+        self,
+        node_ids: Sequence[str],
+        initial_states: Optional[Sequence[Optional[Sequence[float]]]] = None
+    ) -> torch.Tensor:
+        """
+        Get memory states for the given nodes as one (n, hidden_dim) tensor
+
+        Args:
+            node_ids: Node IDs in subgraph order
+            initial_states: Persisted states used for nodes not yet in the store
+
+        Returns:
+            Tensor of memory states, one row per node ID
+        """
+        with self._lock:
+            rows = self._assign_rows(node_ids, initial_states)
+            return self.states.index_select(0, rows)
+
+    def scatter(self, node_ids: Sequence[str], new_states: torch.Tensor):
+        """Write updated memory states back and mark them for persistence"""
+        new_states = new_states.detach().to(self.states.device, self.states.dtype)
+        with self._lock:
+            rows = self._assign_rows(node_ids[:new_states.size(0)], None)
+            self.states[rows] = new_states[:rows.numel()]
+            self._dirty.update(node_ids[:rows.numel()])
+
+    def _assign_rows(
+        self,
+        node_ids: Sequence[str],
+        initial_states: Optional[Sequence[Optional[Sequence[float]]]]
+    ) -> torch.Tensor:
+        """Look up (or allocate) rows for node IDs; caller holds the lock"""
+        if len(set(node_ids)) > self.capacity:
+            raise ValueError(
+                f"Subgraph of {len(node_ids)} nodes exceeds state store capacity {self.capacity}"
+            )
+
+        # Touch resident nodes first so eviction never reclaims a row in use
+        for node_id in node_ids:
+            if node_id in self._rows:
+                self._rows.move_to_end(node_id)
+
+        rows = []
+        for i, node_id in enumerate(node_ids):
+            row = self._rows.get(node_id)
+            if row is None:
+                row = self._allocate_row()
+                self._rows[node_id] = row
+
+                # An evicted or in-flight state is newer than the persisted one
+                unflushed = self._evicted.pop(node_id, None)
+                if unflushed is not None:
+                    self._dirty.add(node_id)
+                else:
+                    unflushed = self._in_flight.get(node_id)
+                initial = initial_states[i] if initial_states is not None else None
+                if unflushed is not None:
+                    self.states[row] = torch.as_tensor(unflushed, dtype=self.states.dtype)
+                elif initial is not None and len(initial) == self.hidden_dim:
+                    self.states[row] = torch.as_tensor(initial, dtype=self.states.dtype)
+                else:
+                    # Initialize random state
+                    self.states[row] = torch.randn(self.hidden_dim)
+            rows.append(row)
+
+        return torch.as_tensor(rows, dtype=torch.long)
+
+    def _allocate_row(self) -> int:
+        """Take a free row, evicting the least recently used node if needed"""
+        if self._free_rows:
+            return self._free_rows.pop()
+
+        node_id, row = self._rows.popitem(last=False)
+        if node_id in self._dirty:
+            # Keep unflushed state until the next write-behind pass
+            self._dirty.discard(node_id)
+            self._evicted[node_id] = self.states[row].tolist()
+        return row
+
+    def discard(self, node_ids: Sequence[str]):
+        """Drop states for deleted nodes without persisting them"""
+        with self._lock:
+            for node_id in node_ids:
+                row = self._rows.pop(node_id, None)
+                if row is not None:
+                    self._free_rows.append(row)
+                self._dirty.discard(node_id)
+                self._evicted.pop(node_id, None)
+                self._in_flight.pop(node_id, None)
+
+    def _drain(self, limit: int) -> Dict[str, List[float]]:
+        """Take up to `limit` pending states for persistence"""
+        with self._lock:
+            pending = {}
+            while self._evicted and len(pending) < limit:
+                node_id, state = self._evicted.popitem()
+                pending[node_id] = state
+            while self._dirty and len(pending) < limit:
+                node_id = self._dirty.pop()
+                pending[node_id] = self.states[self._rows[node_id]].tolist()
+            self._in_flight.update(pending)
+            return pending
+
+    def _settle(self, pending: Dict[str, List[float]]):
+        """Forget in-flight states once their flush has committed"""
+        with self._lock:
+            for node_id, state in pending.items():
+                if self._in_flight.get(node_id) is state:
+                    del self._in_flight[node_id]
+
+    def _requeue(self, pending: Dict[str, List[float]]):
+        """Return states to the pending set after a failed flush"""
+        with self._lock:
+            for node_id, state in pending.items():
+                if self._in_flight.get(node_id) is state:
+                    del self._in_flight[node_id]
+                if node_id not in self._dirty and node_id not in self._evicted:
+                    if node_id in self._rows:
+                        self._dirty.add(node_id)
+                    else:
+                        self._evicted[node_id] = state
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._dirty) + len(self._evicted)
+
+    async def flush(self, db: AsyncSession, batch_size: Optional[int] = None) -> int:
+        """
+        Persist pending memory states to memory_nodes.gru_state
+
+        Args:
+            db: Database session
+            batch_size: Maximum number of states per UPDATE batch
+
+        Returns:
+            Number of states written
+        """
+        batch_size = batch_size or settings.GNN_STATE_FLUSH_BATCH
+        written = 0
+
+        update_sql = (
+            update(MemoryNode.__table__)
+            .where(MemoryNode.__table__.c.id == bindparam("node_id"))
+            .values(gru_state=bindparam("state"))
+        )
+
+        while True:
+            pending = self._drain(batch_size)
+            if not pending:
+                break
+
+            try:
+                await db.execute(
+                    update_sql,
+                    [
+                        {"node_id": uuid.UUID(node_id), "state": state}
+                        for node_id, state in pending.items()
+                    ]
+                )
+                await db.commit()
+                written += len(pending)
+                self._settle(pending)
+            except asyncio.CancelledError:
+                self._requeue(pending)
+                raise
+            except Exception as e:
+                logger.error(f"Error flushing memory states: {e}")
+                await db.rollback()
+                self._requeue(pending)
+                break
+
+        return written
+
+    def start(self, interval: Optional[float] = None):
+        """Start the periodic write-behind task"""
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(
+                self._write_behind_loop(interval or settings.GNN_STATE_FLUSH_INTERVAL)
+            )
+
+    async def stop(self):
+        """Stop the write-behind task and flush remaining states"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+
+        await self._flush_once()
+
+    async def _write_behind_loop(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            await self._flush_once()
+
+    async def _flush_once(self):
+        if not self.pending_count or database.SessionLocal is None:
+            return
+
+        try:
+            async with database.SessionLocal() as db:
+                written = await self.flush(db)
+            if written:
+                logger.info(f"Persisted {written} memory states")
+        except Exception as e:
+            logger.error(f"Error in memory state write-behind: {e}")
@@ -0,0 +1,273 @@
+"""
+Memory Statistics
+Serves memory/edge counts, type distribution, 24h activity and average
+activation from memory in constant time. One process (the holder of an
+advisory lock) refreshes the memory_stats_rollup materialized view; every
+process reads it back periodically (one row per memory type) and applies
+its own writes as deltas until a refresh covers them. The edge count is
+the planner's live-tuple estimate, so nothing scans memory_edges.
+"""
+
+import asyncio
+import logging
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from app.core import database
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_VIEW = "memory_stats_rollup"
+
+# Created by database.SCHEMA_UPGRADES with a unique index, which allows
+# CONCURRENTLY: reads of the view are never blocked by a refresh
+REFRESH_ROLLUP_SQL = text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {ROLLUP_VIEW}")
+READ_ROLLUP_SQL = text(
+    f"SELECT memory_type, memories, recent_24h, activation_sum, refreshed_at FROM {ROLLUP_VIEW}"
+)
+CLOCK_SQL = text("SELECT clock_timestamp() AT TIME ZONE 'utc'")
+
+# Maintained by the statistics collector on every commit; reltuples (set
+# by VACUUM / ANALYZE) covers a reset of the collector
+ESTIMATE_EDGES_SQL = text("""
+    SELECT coalesce(nullif(s.n_live_tup, 0), greatest(c.reltuples, 0))::bigint
+    FROM pg_class c LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid
+    WHERE c.oid = 'memory_edges'::regclass
+""")
+
+# Session-level lock held by the refreshing process on its own connection;
+# released when that connection closes, so another process takes over
+REFRESH_LOCK_KEY = 0x7465_7375_6d69_0001
+TRY_REFRESH_LOCK_SQL = text("SELECT pg_try_advisory_lock(:key)")
+
+NodeStats = Tuple[Optional[str], float, Optional[datetime]]  # (memory_type, activation_strength, created_at)
+
+
+class StatsCounts:
+    """Additive memory counters (a rollup, or the deltas applied on top of it)"""
+
+    def __init__(self):
+        self.memories: Counter = Counter()
+        self.recent_24h = 0
+        self.activation_sum = 0.0
+        self.edges = 0
+
+    def merge(self, other: "StatsCounts"):
+        self.memories.update(other.memories)
+        self.recent_24h += other.recent_24h
+        self.activation_sum += other.activation_sum
+        self.edges += other.edges
+
+
+class MemoryStatistics:
+    """
+    Incrementally maintained memory statistics
+
+    The rollup covers every process's writes as of its last refresh; deltas
+    cover this process's writes since then (24h activity does not age out
+    between refreshes). Deltas are kept in generations, each dropped once a
+    rollup refreshed after it ended has been read. Responses carry the
+    rollup's age, and are marked stale once it exceeds max_staleness.
+    """
+
+    def __init__(self, refresh_interval: float = 30.0, max_staleness: float = 120.0):
+        self.refresh_interval = refresh_interval
+        self.max_staleness = max_staleness
+
+        self._rollup = StatsCounts()
+        self._delta = StatsCounts()
+        self._uncovered: List[Tuple[datetime, StatsCounts]] = []  # (ended at (DB clock), deltas)
+        self._refreshed_at: Optional[datetime] = None
+        self._refreshed_monotonic: Optional[float] = None
+
+        self._leader = None  # Connection holding the refresh lock
+        self._refresh_task: Optional[asyncio.Task] = None
+
+        # Metrics
+        self.refreshes = 0
+        self.failed_refreshes = 0
+        self.last_refresh_seconds = 0.0
+
+    def nodes_added(self, nodes: Iterable[NodeStats]):
+        """Count newly committed nodes"""
+        self._apply_nodes(nodes, 1)
+
+    def nodes_removed(self, nodes: Iterable[NodeStats]):
+        """Count deleted nodes"""
+        self._apply_nodes(nodes, -1)
+
+    def _apply_nodes(self, nodes: Iterable[NodeStats], sign: int):
+        recent_threshold = datetime.utcnow() - timedelta(hours=24)
+        for memory_type, activation, created_at in nodes:
+            self._delta.memories[memory_type or "unknown"] += sign
+            self._delta.activation_sum += sign * activation
+            if created_at is not None and created_at >= recent_threshold:
+                self._delta.recent_24h += sign
+
+    def edges_added(self, count: int):
+        self._delta.edges += count
+
+    def edges_removed(self, count: int):
+        self._delta.edges -= count
+
+    async def refresh(self) -> bool:
+        """
+        Refresh the rollup view if this process holds the refresh lock,
+        then reload it
+
+        Returns:
+            Whether the refresh succeeded
+        """
+        # Deltas recorded from here on are not covered by the rollup read below
+        pending, self._delta = self._delta, StatsCounts()
+        started = time.perf_counter()
+        try:
+            async with database.SessionLocal() as db:
+                # Taken before the view refresh: a refresh at or after this
+                # time covers every write in `pending`
+                ended_at = await db.scalar(CLOCK_SQL)
+                if await self._lead():
+                    await self._refresh_view()
+                rows = (await db.execute(READ_ROLLUP_SQL)).fetchall()
+                edges = await db.scalar(ESTIMATE_EDGES_SQL)
+                # Age of the rollup is measured after the refresh above
+                read_at = await db.scalar(CLOCK_SQL)
+                await db.commit()
+        except Exception as e:
+            logger.error(f"Error refreshing memory statistics: {e}")
+            pending.merge(self._delta)
+            self._delta = pending
+            self.failed_refreshes += 1
+            return False
+
+        rollup = StatsCounts()
+        refreshed_at = None
+        for memory_type, memories, recent_24h, activation_sum, row_refreshed_at in rows:
+            rollup.memories[memory_type] = memories
+            rollup.recent_24h += recent_24h
+            rollup.activation_sum += float(activation_sum)
+            refreshed_at = row_refreshed_at
+        rollup.edges = edges or 0
+
+        # The edge estimate is live, so edge deltas are never carried over
+        pending.edges = 0
+        self._delta.edges = 0
+        if any(pending.memories.values()) or pending.recent_24h or pending.activation_sum:
+            self._uncovered.append((ended_at, pending))
+        if refreshed_at is not None:
+            self._uncovered = [
+                (generation_end, counts) for generation_end, counts in self._uncovered
+                if generation_end > refreshed_at
+            ]
+            self._refreshed_at = refreshed_at
+            age = max((read_at - refreshed_at).total_seconds(), 0.0)
+            self._refreshed_monotonic = time.monotonic() - age
+
+        self._rollup = rollup
+        self.refreshes += 1
+        self.last_refresh_seconds = time.perf_counter() - started
+        return True
+
+    async def _lead(self) -> bool:
+        """Hold the refresh lock on a dedicated connection; False while another process holds it"""
+        if self._leader is not None:
+            return True
+        connection = await database.engine.connect()
+        try:
+            acquired = await connection.scalar(TRY_REFRESH_LOCK_SQL, {"key": REFRESH_LOCK_KEY})
+            await connection.commit()
+        except BaseException:
+            await connection.invalidate()
+            raise
+        if not acquired:
+            await connection.close()
+            return False
+        self._leader = connection
+        logger.info("Memory statistics rollup refreshed by this process")
+        return True
+
+    async def _refresh_view(self):
+        try:
+            await self._leader.execute(REFRESH_ROLLUP_SQL)
+            await self._leader.commit()
+        except BaseException:
+            await self._resign()
+            raise
+
+    async def _resign(self):
+        """Drop the refresh lock (closing the session ends it) so another process can take over"""
+        if self._leader is not None:
+            leader, self._leader = self._leader, None
+            try:
+                await leader.invalidate()
+            except Exception as e:
+                logger.error(f"Error releasing the memory statistics refresh lock: {e}")
+
+    def start(self):
+        """Start the periodic refresh task"""
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        """Stop the refresh task and hand the refresh lock over"""
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+        await self._resign()
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            await self.refresh()
+
+    @property
+    def staleness(self) -> Optional[float]:
+        """Seconds since the last successful refresh (None before the first)"""
+        if self._refreshed_monotonic is None:
+            return None
+        return time.monotonic() - self._refreshed_monotonic
+
+    def snapshot(self) -> Dict:
+        """Current statistics (no database access)"""
+        counts = StatsCounts()
+        counts.merge(self._rollup)
+        for _, generation in self._uncovered:
+            counts.merge(generation)
+        counts.merge(self._delta)
+
+        total_memories = sum(counts.memories.values())
+        staleness = self.staleness
+
+        return {
+            'total_memories': total_memories,
+            'total_edges': counts.edges,
+            'memory_types': {
+                memory_type: count for memory_type, count in counts.memories.items() if count > 0
+            },
+            'recent_memories_24h': max(counts.recent_24h, 0),
+            'average_activation': counts.activation_sum / total_memories if total_memories else 0.0,
+            'as_of': self._refreshed_at,
+            'staleness_seconds': staleness,
+            'stale': staleness is None or staleness > self.max_staleness
+        }
+
+    def get_metrics(self) -> Dict:
+        """Refresh health"""
+        return {
+            'refreshes': self.refreshes,
+            'failed_refreshes': self.failed_refreshes,
+            'last_refresh_seconds': self.last_refresh_seconds,
+            'staleness_seconds': self.staleness,
+            'refreshing_process': self._leader is not None,
+            'uncovered_generations': len(self._uncovered),
+            'refresh_interval': self.refresh_interval,
+            'max_staleness': self.max_staleness
+        }
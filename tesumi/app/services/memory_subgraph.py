@@ -0,0 +1,139 @@
+"""
+Candidate subgraph fetch
+One SQL round-trip returning the vector-search candidates, their stored
+embeddings in pgvector binary form and the edges induced among them
+"""
+
+import logging
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from pgvector.sqlalchemy import Vector
+from sqlalchemy import bindparam, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.vector_index import required_ef_search
+
+logger = logging.getLogger(__name__)
+
+# Each induced edge is aggregated once, on its source row; vector_send()
+# returns pgvector's binary wire format so no text parsing is needed
+CANDIDATE_SUBGRAPH_SQL = text("""
+    WITH candidates AS MATERIALIZED (
+        SELECT id, content, memory_type, category, valence, arousal,
+               activation_strength, access_count, created_at, last_accessed,
+               embedding, embedding <=> :query_embedding AS distance, gru_state
+        FROM memory_nodes
+        WHERE activation_strength >= :min_activation
+        AND (CAST(:memory_type AS VARCHAR) IS NULL OR memory_type = :memory_type)
+        ORDER BY embedding <=> :query_embedding
+        LIMIT :limit
+    )
+    SELECT c.id, c.content, c.memory_type, c.category, c.valence, c.arousal,
+           c.activation_strength, c.access_count, c.created_at, c.last_accessed,
+           c.distance, c.gru_state, vector_send(c.embedding) AS embedding,
+           induced.target_ids, induced.weights, induced.edge_types
+    FROM candidates c
+    LEFT JOIN LATERAL (
+        SELECT array_agg(e.target_id) AS target_ids,
+               array_agg(e.weight) AS weights,
+               array_agg(e.edge_type) AS edge_types
+        FROM memory_edges e
+        JOIN candidates t ON t.id = e.target_id
+        WHERE e.source_id = c.id
+    ) induced ON true
+    ORDER BY c.distance
+""").bindparams(bindparam("query_embedding", type_=Vector(settings.VECTOR_DIMENSION)))
+
+
+def decode_vectors(blobs: Sequence[bytes], dim: int) -> np.ndarray:
+    """
+    Decode pgvector binary values into one float32 matrix
+
+    The binary format is a big-endian uint16 dimension, a uint16 reserved
+    field, then `dim` big-endian float32 values.
+
+    Args:
+        blobs: vector_send() outputs, all of dimension `dim`
+        dim: Vector dimension
+
+    Returns:
+        Array (len(blobs), dim) of float32
+    """
+    record = np.dtype([('dim', '>u2'), ('unused', '>u2'), ('values', '>f4', (dim,))])
+    records = np.frombuffer(b"".join(blobs), dtype=record)
+    if len(records) and (records['dim'] != dim).any():
+        raise ValueError(f"Expected {dim}-dimensional vectors")
+    return records['values'].astype(np.float32)
+
+
+async def fetch_candidate_subgraph(
+    db: AsyncSession,
+    query_embedding: np.ndarray,
+    limit: int,
+    memory_type: Optional[str] = None,
+    min_activation: float = 0.1
+) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Fetch the candidate memories for a query with their induced subgraph
+
+    Args:
+        db: Database session
+        query_embedding: Query vector
+        limit: Number of candidates
+        memory_type: Optional memory type filter
+        min_activation: Minimum activation strength
+
+    Returns:
+        (memory_nodes, memory_edges); each node's 'embedding' is a row view
+        of one decoded float32 matrix
+    """
+    ef_search = required_ef_search(limit)
+    if ef_search:
+        await db.execute(text(f"SET LOCAL hnsw.ef_search = {ef_search}"))
+
+    result = await db.execute(
+        CANDIDATE_SUBGRAPH_SQL,
+        {
+            "query_embedding": query_embedding,
+            "min_activation": min_activation,
+            "memory_type": memory_type,
+            "limit": limit
+        }
+    )
+    rows = result.fetchall()
+    if not rows:
+        return [], []
+
+    embeddings = decode_vectors([row[12] for row in rows], settings.VECTOR_DIMENSION)
+
+    memory_nodes = []
+    memory_edges = []
+    for i, row in enumerate(rows):
+        node_id = str(row[0])
+        memory_nodes.append({
+            'id': node_id,
+            'content': row[1],
+            'memory_type': row[2],
+            'category': row[3],
+            'valence': row[4],
+            'arousal': row[5],
+            'activation_strength': row[6],
+            'access_count': row[7],
+            'created_at': row[8],
+            'last_accessed': row[9],
+            'embedding': embeddings[i],
+            'vector_distance': row[10],
+            'gru_state': row[11]
+        })
+        if row[13]:
+            for target_id, weight, edge_type in zip(row[13], row[14], row[15]):
+                memory_edges.append({
+                    'source_id': node_id,
+                    'target_id': str(target_id),
+                    'edge_type': edge_type,
+                    'weight': weight
+                })
+
+    return memory_nodes, memory_edges
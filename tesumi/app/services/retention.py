@@ -0,0 +1,372 @@
+"""
+Memory Retention
+Deletes old, unused memories in bounded chunks: keyset pagination over
+memory_nodes.id, one short transaction per chunk (edges first, then nodes,
+then the job checkpoint) and a pause between chunks for online traffic.
+A job is run by the one process holding its lease, across all processes.
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import bindparam, select, text
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import database
+from app.models.memory import RetentionJob
+
+logger = logging.getLogger(__name__)
+
+# Candidates are locked for the chunk's transaction; SKIP LOCKED leaves rows
+# another transaction is updating (e.g. an access counter flush) for the
+# job's next pass
+CANDIDATE_CHUNK_SQL = text("""
+    SELECT id FROM memory_nodes
+    WHERE created_at < :cutoff
+    AND activation_strength < :min_activation
+    AND access_count < 2
+    AND (CAST(:after AS uuid) IS NULL OR id > :after)
+    ORDER BY id
+    LIMIT :limit
+    FOR UPDATE SKIP LOCKED
+""")
+
+DELETE_EDGES_SQL = text("""
+    DELETE FROM memory_edges
+    WHERE source_id = ANY(:node_ids) OR target_id = ANY(:node_ids)
+""").bindparams(bindparam("node_ids", type_=ARRAY(UUID(as_uuid=True))))
+
+DELETE_NODES_SQL = text("""
+    DELETE FROM memory_nodes WHERE id = ANY(:node_ids)
+    RETURNING memory_type, activation_strength, created_at
+""").bindparams(bindparam("node_ids", type_=ARRAY(UUID(as_uuid=True))))
+
+# The running job (at most one, by a partial unique index) is claimed with a
+# lease like EmotionEnricher's batches; a process that stops renewing it
+# (crash, shutdown) hands it over once the lease expires
+CLAIM_JOB_SQL = text("""
+    UPDATE memory_retention_jobs SET claimed_at = :now
+    WHERE id IN (
+        SELECT id FROM memory_retention_jobs
+        WHERE status = 'running'
+        AND (claimed_at IS NULL OR claimed_at < :lease_expired)
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id, last_id
+""")
+
+RELEASE_JOB_SQL = text("""
+    UPDATE memory_retention_jobs SET claimed_at = NULL
+    WHERE id = :job_id AND claimed_at = :claimed_at
+""")
+
+
+class RetentionRunner:
+    """
+    Background retention job
+    One job runs at a time across all processes; its checkpoint and lease
+    are committed with every chunk, and a job interrupted by a shutdown or
+    crash is resumed by the next process that claims it (every process
+    checks for an expired lease periodically). Rows skipped in a pass are
+    revisited by further passes, up to max_passes.
+    """
+
+    def __init__(
+        self,
+        gnn_processor=None,
+        replica=None,
+        access_tracker=None,
+        stats=None,
+        chunk_size: int = 500,
+        pause: float = 0.2,
+        claim_lease: float = 300.0,
+        max_passes: int = 3,
+        resume_interval: float = 60.0
+    ):
+        self.gnn_processor = gnn_processor
+        self.replica = replica
+        self.access_tracker = access_tracker
+        self.stats = stats
+        self.chunk_size = chunk_size
+        self.pause = pause
+        self.claim_lease = claim_lease
+        self.max_passes = max_passes
+        self.resume_interval = resume_interval
+
+        self._task: Optional[asyncio.Task] = None
+        self._watcher: Optional[asyncio.Task] = None
+        self._claimed_at: Optional[datetime] = None
+        self.current_job_id: Optional[str] = None
+
+        # Metrics (this process)
+        self.chunks_committed = 0
+        self.nodes_deleted = 0
+        self.throttled_seconds = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start_job(self, days_threshold: int, min_activation: float) -> Dict:
+        """
+        Start a retention job in the background
+
+        Returns:
+            Status of the new job, or of the job already running (in this
+            or another process; an abandoned one is resumed here)
+        """
+        if self.running:
+            return await self.job_status(self.current_job_id)
+        if await self._claim_interrupted():
+            return await self.job_status(self.current_job_id)
+
+        now = datetime.utcnow()
+        try:
+            async with database.SessionLocal() as db:
+                job = RetentionJob(
+                    id=str(uuid.uuid4()),
+                    status="running",
+                    cutoff=now - timedelta(days=days_threshold),
+                    min_activation=min_activation,
+                    passes=0,
+                    nodes_deleted=0,
+                    edges_deleted=0,
+                    claimed_at=now,
+                    created_at=now,
+                    updated_at=now
+                )
+                db.add(job)
+                await db.commit()
+        except IntegrityError:
+            # Another process holds the running job
+            async with database.SessionLocal() as db:
+                running = (await db.execute(
+                    select(RetentionJob).where(RetentionJob.status == "running")
+                )).scalars().first()
+                return self.job_status_dict(running) if running is not None else None
+
+        self._launch(job.id, now)
+        return self.job_status_dict(job)
+
+    def start(self):
+        """Periodically take over a job whose runner stopped renewing its lease"""
+        if self._watcher is None:
+            self._watcher = asyncio.create_task(self._watch())
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(self.resume_interval)
+            await self.resume_interrupted()
+
+    async def resume_interrupted(self):
+        """Resume a job left running by a stopped or crashed process"""
+        if self.running:
+            return
+        try:
+            await self._claim_interrupted()
+        except Exception as e:
+            logger.error(f"Error resuming retention job: {e}")
+
+    async def _claim_interrupted(self) -> bool:
+        """Claim the running job if its lease expired (or was released); True if claimed"""
+        now = datetime.utcnow()
+        async with database.SessionLocal() as db:
+            row = (await db.execute(
+                CLAIM_JOB_SQL,
+                {"now": now, "lease_expired": now - timedelta(seconds=self.claim_lease)}
+            )).first()
+            await db.commit()
+        if row is None:
+            return False
+        logger.info(f"Resuming retention job {row[0]} after {row[1]}")
+        self._launch(row[0], now)
+        return True
+
+    def _launch(self, job_id: str, claimed_at: datetime):
+        self.current_job_id = job_id
+        self._claimed_at = claimed_at
+        self._task = asyncio.create_task(self._run(job_id))
+
+    async def stop(self):
+        """Stop the running job and release it; it resumes from its checkpoint on the next claim"""
+        if self._watcher is not None:
+            self._watcher.cancel()
+            try:
+                await self._watcher
+            except asyncio.CancelledError:
+                pass
+            self._watcher = None
+
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+            try:
+                async with database.SessionLocal() as db:
+                    await db.execute(
+                        RELEASE_JOB_SQL, {"job_id": self.current_job_id, "claimed_at": self._claimed_at}
+                    )
+                    await db.commit()
+            except Exception as e:
+                logger.error(f"Error releasing retention job {self.current_job_id}: {e}")
+        self._task = None
+
+    async def _run(self, job_id: str):
+        # Accesses still held in memory must count before anything is judged unused
+        if self.access_tracker is not None:
+            await self.access_tracker.flush_pending()
+
+        try:
+            while True:
+                started = time.perf_counter()
+                deleted = await self._delete_chunk(job_id)
+                if deleted is None:
+                    break
+
+                # Throttle: sleep at least as long as the chunk held its locks
+                delay = max(self.pause, time.perf_counter() - started)
+                self.throttled_seconds += delay
+                await asyncio.sleep(delay)
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Retention job {job_id} failed: {e}")
+            await self._fail_job(job_id, str(e))
+
+    async def _delete_chunk(self, job_id: str) -> Optional[List[str]]:
+        """
+        Delete one chunk and advance the checkpoint in the same transaction
+
+        Returns:
+            Deleted node ids, or None when the job has finished or its
+            lease was taken over by another process
+        """
+        async with database.SessionLocal() as db:
+            job = await db.get(RetentionJob, job_id, with_for_update=True)
+            if job.status != "running" or job.claimed_at != self._claimed_at:
+                logger.warning(f"Retention job {job_id} lost its lease; stopping")
+                return None
+            claimed_at = job.claimed_at = datetime.utcnow()
+
+            rows = (await db.execute(
+                CANDIDATE_CHUNK_SQL,
+                {
+                    "cutoff": job.cutoff,
+                    "min_activation": job.min_activation,
+                    "after": job.last_id,
+                    "limit": self.chunk_size
+                }
+            )).scalars().all()
+
+            job.updated_at = datetime.utcnow()
+            if not rows:
+                job.passes += 1
+                if job.last_id is not None and job.passes < self.max_passes:
+                    # The pass found candidates; sweep again for the rows it
+                    # skipped (locked, or with unflushed accesses)
+                    job.last_id = None
+                    await db.commit()
+                    self._claimed_at = claimed_at
+                    logger.info(f"Retention job {job_id} starting pass {job.passes + 1}")
+                    return []
+                job.status = "completed"
+                await db.commit()
+                logger.info(f"Retention job {job_id} completed")
+                return None
+
+            node_ids = [
+                node_id for node_id in rows
+                if self.access_tracker is None or not self.access_tracker.has_pending(node_id)
+            ]
+            edges_deleted, deleted_nodes = 0, []
+            if node_ids:
+                edges_deleted = (await db.execute(DELETE_EDGES_SQL, {"node_ids": node_ids})).rowcount
+                deleted_nodes = (await db.execute(DELETE_NODES_SQL, {"node_ids": node_ids})).fetchall()
+                job.edges_deleted += edges_deleted
+                job.nodes_deleted += len(deleted_nodes)
+            job.last_id = rows[-1]
+            await db.commit()
+            self._claimed_at = claimed_at
+
+        if self.stats is not None:
+            self.stats.edges_removed(edges_deleted)
+            self.stats.nodes_removed(deleted_nodes)
+
+        deleted = [str(node_id) for node_id in node_ids]
+        self.chunks_committed += 1
+        self.nodes_deleted += len(deleted)
+        self._write_through(deleted)
+        return deleted
+
+    def _write_through(self, node_ids: List[str]):
+        if not node_ids:
+            return
+        if self.gnn_processor is not None:
+            self.gnn_processor.forget_memory_nodes(node_ids)
+        if self.replica is not None:
+            self.replica.remove_nodes(node_ids)
+
+    async def _fail_job(self, job_id: str, error: str):
+        try:
+            async with database.SessionLocal() as db:
+                job = await db.get(RetentionJob, job_id)
+                if job is not None:
+                    job.status = "failed"
+                    job.error = error[:2000]
+                    job.updated_at = datetime.utcnow()
+                    await db.commit()
+        except Exception as e:
+            logger.error(f"Error recording failed retention job {job_id}: {e}")
+
+    def get_metrics(self) -> Dict:
+        """Current job and deletion throughput"""
+        return {
+            'running': self.running,
+            'current_job_id': self.current_job_id,
+            'chunks_committed': self.chunks_committed,
+            'nodes_deleted': self.nodes_deleted,
+            'throttled_seconds': self.throttled_seconds,
+            'chunk_size': self.chunk_size
+        }
+
+    async def job_status(self, job_id: Optional[str] = None) -> Optional[Dict]:
+        """Status of a job (default: the most recent one)"""
+        async with database.SessionLocal() as db:
+            return await get_retention_job(db, job_id)
+
+    @staticmethod
+    def job_status_dict(job: RetentionJob) -> Dict:
+        return {
+            'job_id': job.id,
+            'status': job.status,
+            'cutoff': job.cutoff,
+            'min_activation': job.min_activation,
+            'nodes_deleted': job.nodes_deleted,
+            'edges_deleted': job.edges_deleted,
+            'checkpoint': str(job.last_id) if job.last_id else None,
+            'passes': job.passes,
+            'error': job.error,
+            'created_at': job.created_at,
+            'updated_at': job.updated_at
+        }
+
+
+async def get_retention_job(db: AsyncSession, job_id: Optional[str] = None) -> Optional[Dict]:
+    """Status of a retention job (default: the most recent one)"""
+    if job_id is not None:
+        job = await db.get(RetentionJob, job_id)
+    else:
+        job = (await db.execute(
+            select(RetentionJob).order_by(RetentionJob.created_at.desc()).limit(1)
+        )).scalars().first()
+    return RetentionRunner.job_status_dict(job) if job is not None else None
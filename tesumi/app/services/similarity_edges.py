@@ -0,0 +1,494 @@
+"""
+Set-based similarity edge construction
+One kNN pass links a whole set of nodes to their nearest neighbours and
+inserts every edge at once; SimilarityEdgeWorker runs it off the request path
+"""
+
+import asyncio
+import logging
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Float, bindparam, text
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import database
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Existing (source, target) similarity pairs are skipped by the unique
+# ix_memory_edges_pair index, so re-running a set (e.g. when resuming an
+# ingestion batch) or linking it from two transactions never duplicates edges
+SIMILARITY_EDGES_SQL = text("""
+    INSERT INTO memory_edges (id, source_id, target_id, edge_type, weight, created_at)
+    SELECT gen_random_uuid(), n.id, neighbor.id, 'similarity', 1 - neighbor.distance, :now
+    FROM memory_nodes n
+    CROSS JOIN LATERAL (
+        SELECT m.id, m.embedding <=> n.embedding AS distance
+        FROM memory_nodes m
+        WHERE m.id <> n.id
+        ORDER BY m.embedding <=> n.embedding
+        LIMIT :max_connections
+    ) neighbor
+    WHERE n.id = ANY(:node_ids)
+    AND neighbor.distance < :max_distance
+    ON CONFLICT (source_id, target_id, edge_type) DO NOTHING
+    RETURNING id, source_id, target_id, edge_type, weight
+""").bindparams(bindparam("node_ids", type_=ARRAY(UUID(as_uuid=True))))
+
+
+async def insert_similarity_edges(
+    db: AsyncSession,
+    node_ids: Sequence[str],
+    similarity_threshold: float,
+    max_connections: int
+) -> List[Dict]:
+    """
+    Create similarity edges from each node to its nearest neighbours
+
+    Runs inside the caller's transaction; the caller commits.
+
+    Args:
+        db: Database session
+        node_ids: Source nodes
+        similarity_threshold: Minimum cosine similarity of an edge
+        max_connections: Nearest neighbours considered per node
+
+    Returns:
+        Created edges as dicts (id, source_id, target_id, edge_type, weight)
+    """
+    if not node_ids:
+        return []
+
+    result = await db.execute(
+        SIMILARITY_EDGES_SQL,
+        {
+            "node_ids": [uuid.UUID(str(node_id)) for node_id in node_ids],
+            "max_connections": max_connections,
+            "max_distance": 1.0 - similarity_threshold,  # pgvector uses distance, not similarity
+            "now": datetime.utcnow()
+        }
+    )
+    return [
+        {
+            'id': str(row[0]),
+            'source_id': str(row[1]),
+            'target_id': str(row[2]),
+            'edge_type': row[3],
+            'weight': row[4]
+        }
+        for row in result.fetchall()
+    ]
+
+
+INSERT_EDGES_SQL = text("""
+    INSERT INTO memory_edges (id, source_id, target_id, edge_type, weight, created_at)
+    SELECT e.id, e.source_id, e.target_id, 'similarity', e.weight, :now
+    FROM unnest(:ids, :source_ids, :target_ids, :weights) AS e(id, source_id, target_id, weight)
+    JOIN memory_nodes s ON s.id = e.source_id
+    JOIN memory_nodes t ON t.id = e.target_id
+    ON CONFLICT (source_id, target_id, edge_type) DO NOTHING
+    RETURNING id, source_id, target_id, edge_type, weight
+""").bindparams(
+    bindparam("ids", type_=ARRAY(UUID(as_uuid=True))),
+    bindparam("source_ids", type_=ARRAY(UUID(as_uuid=True))),
+    bindparam("target_ids", type_=ARRAY(UUID(as_uuid=True))),
+    bindparam("weights", type_=ARRAY(Float))
+)
+
+DELETE_SIMILARITY_EDGES_SQL = text("""
+    DELETE FROM memory_edges
+    WHERE edge_type = 'similarity' AND source_id = ANY(:node_ids)
+""").bindparams(bindparam("node_ids", type_=ARRAY(UUID(as_uuid=True))))
+
+CLEAR_EDGES_PENDING_SQL = text("""
+    UPDATE memory_nodes SET edges_pending = false WHERE id = ANY(:node_ids) AND edges_pending
+""").bindparams(bindparam("node_ids", type_=ARRAY(UUID(as_uuid=True))))
+
+# Paged by (created_at, id) so recovery after a large bulk load stays bounded
+PENDING_LINK_SQL = text("""
+    SELECT id, created_at FROM memory_nodes
+    WHERE edges_pending
+    AND (CAST(:after_created AS timestamp) IS NULL OR (created_at, id) > (:after_created, :after_id))
+    ORDER BY created_at, id
+    LIMIT :limit
+""")
+
+# Session-level lock held by the rebuilding process on its own connection,
+# so only one process rebuilds at a time (released when it finishes or dies)
+REBUILD_LOCK_KEY = 0x7465_7375_6d69_0002
+TRY_REBUILD_LOCK_SQL = text("SELECT pg_try_advisory_lock(:key)")
+REBUILD_UNLOCK_SQL = text("SELECT pg_advisory_unlock(:key)")
+
+# Queued after the last node by stop(): the worker links its batch and exits
+_STOP = object()
+
+NODE_PAGE_SQL = text("""
+    SELECT id FROM memory_nodes
+    WHERE CAST(:after AS uuid) IS NULL OR id > :after
+    ORDER BY id
+    LIMIT :limit
+""")
+
+
+async def insert_edges(db: AsyncSession, edges: Sequence[Tuple[str, str, float]]) -> List[Dict]:
+    """
+    Insert precomputed (source, target, weight) similarity edges in one statement
+
+    Pairs that already exist (by the unique pair index) or whose endpoints
+    were deleted are skipped.
+    """
+    if not edges:
+        return []
+
+    result = await db.execute(
+        INSERT_EDGES_SQL,
+        {
+            "ids": [uuid.uuid4() for _ in edges],
+            "source_ids": [uuid.UUID(str(source)) for source, _, _ in edges],
+            "target_ids": [uuid.UUID(str(target)) for _, target, _ in edges],
+            "weights": [float(weight) for _, _, weight in edges],
+            "now": datetime.utcnow()
+        }
+    )
+    return [
+        {
+            'id': str(row[0]),
+            'source_id': str(row[1]),
+            'target_id': str(row[2]),
+            'edge_type': row[3],
+            'weight': row[4]
+        }
+        for row in result.fetchall()
+    ]
+
+
+class SimilarityEdgeWorker:
+    """
+    Background builder of similarity edges
+    New node ids are queued by the write path; the worker drains them in
+    batches and links each batch with one kNN pass (against the in-process
+    replica when it is loaded, on the background executor, else one LATERAL
+    query) and one insert. Nodes are stored with edges_pending, cleared in
+    the insert's transaction, so a failed batch is retried and a restart
+    picks up unlinked nodes.
+    """
+
+    def __init__(
+        self,
+        replica=None,
+        gnn_processor=None,
+        stats=None,
+        executor=None,
+        batch_size: int = 256,
+        max_wait: float = 1.0,
+        retry_delay: float = 30.0
+    ):
+        self.replica = replica
+        self.gnn_processor = gnn_processor
+        self.stats = stats
+        self.executor = executor
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.retry_delay = retry_delay
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._rebuild_task: Optional[asyncio.Task] = None
+
+        # Metrics
+        self.batches = 0
+        self.nodes_linked = 0
+        self.edges_created = 0
+        self.failed_batches = 0
+        self.recovered = 0
+        self.rebuild_status: Dict = {'status': "idle"}
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def start(self):
+        """Start the worker on the running event loop"""
+        if self._worker is None:
+            if self._queue is None:
+                self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the worker after linking the nodes still queued"""
+        if self._rebuild_task is not None and not self._rebuild_task.done():
+            self._rebuild_task.cancel()
+            try:
+                await self._rebuild_task
+            except asyncio.CancelledError:
+                pass
+        self._rebuild_task = None
+
+        if self._worker is not None:
+            # Not cancelled: a batch taken off the queue would be dropped
+            self._queue.put_nowait(_STOP)
+            await self._worker
+            self._worker = None
+
+        pending = []
+        while self._queue is not None and not self._queue.empty():
+            node_id = self._queue.get_nowait()
+            if node_id is not _STOP:
+                pending.append(node_id)
+        if pending:
+            await self._link(pending)
+
+    def enqueue(self, node_id: str):
+        """Queue a new node for linking"""
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        self._queue.put_nowait(str(node_id))
+
+    async def _run(self):
+        await self._recover()
+
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            node_id = await self._queue.get()
+            if node_id is _STOP:
+                break
+            batch = [node_id]
+            deadline = loop.time() + self.max_wait
+
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    node_id = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if node_id is _STOP:
+                    stopping = True
+                    break
+                batch.append(node_id)
+
+            await self._link(batch)
+
+    async def _recover(self):
+        """Link nodes left with edges_pending by a failed batch or an earlier process, one page at a time"""
+        after_created, after_id = None, None
+        while True:
+            try:
+                async with database.SessionLocal() as db:
+                    rows = (await db.execute(
+                        PENDING_LINK_SQL,
+                        {"after_created": after_created, "after_id": after_id, "limit": self.batch_size}
+                    )).fetchall()
+            except Exception as e:
+                logger.error(f"Error loading nodes pending similarity edges: {e}")
+                return
+            if not rows:
+                return
+
+            # A failed page keeps edges_pending and is retried by _link
+            await self._link([str(row[0]) for row in rows])
+            self.recovered += len(rows)
+            after_id, after_created = rows[-1]
+            if len(rows) < self.batch_size:
+                return
+
+    def _retry_later(self, node_ids: List[str]):
+        if self._worker is None:
+            return  # Stopping: the nodes keep edges_pending for the next start
+        asyncio.get_running_loop().call_later(self.retry_delay, self._requeue, node_ids)
+
+    def _requeue(self, node_ids: List[str]):
+        for node_id in node_ids:
+            self.enqueue(node_id)
+
+    async def _link(self, node_ids: List[str]):
+        node_ids = list(dict.fromkeys(node_ids))
+        try:
+            async with database.SessionLocal() as db:
+                # Clearing first locks the rows, so a bulk ingestion linking pass skips them
+                await db.execute(CLEAR_EDGES_PENDING_SQL, {"node_ids": [uuid.UUID(node_id) for node_id in node_ids]})
+                edges = await self.link_nodes(
+                    db,
+                    node_ids,
+                    settings.SIMILARITY_EDGE_THRESHOLD,
+                    settings.SIMILARITY_EDGE_MAX_CONNECTIONS
+                )
+                await db.commit()
+        except Exception as e:
+            logger.error(f"Error creating similarity edges for {len(node_ids)} nodes: {e}")
+            self.failed_batches += 1
+            self._retry_later(node_ids)
+            return
+
+        self.batches += 1
+        self.nodes_linked += len(node_ids)
+        self.edges_created += len(edges)
+        self._write_through(edges)
+
+    async def link_nodes(
+        self,
+        db: AsyncSession,
+        node_ids: List[str],
+        similarity_threshold: float,
+        max_connections: int
+    ) -> List[Dict]:
+        """
+        Create the similarity edges of a set of nodes (caller commits)
+
+        Nodes the replica does not hold yet (created by another process and
+        not reconciled) are linked with the LATERAL query instead, so every
+        node whose edges_pending is cleared gets its kNN pass.
+        """
+        if self.replica is None or not self.replica.loaded:
+            return await insert_similarity_edges(db, node_ids, similarity_threshold, max_connections)
+
+        known, unknown = self.replica.partition_known(node_ids)
+        created = await insert_similarity_edges(db, unknown, similarity_threshold, max_connections)
+        if not known:
+            return created
+
+        if self.executor is not None:
+            edges = await self.executor.run(
+                "similarity_edges",
+                self.replica.nearest_neighbors,
+                known,
+                max_connections,
+                similarity_threshold
+            )
+        else:
+            edges = self.replica.nearest_neighbors(known, max_connections, similarity_threshold)
+        return created + await insert_edges(db, edges)
+
+    def _write_through(self, edges: List[Dict]):
+        if not edges:
+            return
+        if self.stats is not None:
+            self.stats.edges_added(len(edges))
+        if self.replica is not None:
+            self.replica.add_edges(edges)
+        if self.gnn_processor is not None:
+            self.gnn_processor.register_memory_edges(
+                [(edge['source_id'], edge['target_id']) for edge in edges]
+            )
+
+    def start_rebuild(
+        self,
+        similarity_threshold: Optional[float] = None,
+        max_connections: Optional[int] = None
+    ) -> Dict:
+        """
+        Rebuild every similarity edge in the background
+
+        Used after SIMILARITY_EDGE_THRESHOLD or SIMILARITY_EDGE_MAX_CONNECTIONS
+        change. Nodes are processed in id order, one chunk per transaction
+        (delete the chunk's outgoing similarity edges, then relink it). Only
+        one process rebuilds at a time (advisory lock); a rebuild started
+        while another process runs one ends with status "skipped".
+
+        Returns:
+            Rebuild status
+        """
+        if self._rebuild_task is not None and not self._rebuild_task.done():
+            return self.rebuild_status
+
+        self._rebuild_task = asyncio.create_task(self._rebuild(
+            settings.SIMILARITY_EDGE_THRESHOLD if similarity_threshold is None else similarity_threshold,
+            settings.SIMILARITY_EDGE_MAX_CONNECTIONS if max_connections is None else max_connections
+        ))
+        return self.rebuild_status
+
+    async def _rebuild(self, similarity_threshold: float, max_connections: int):
+        lock = await database.engine.connect()
+        try:
+            acquired = await lock.scalar(TRY_REBUILD_LOCK_SQL, {"key": REBUILD_LOCK_KEY})
+            await lock.commit()
+            if not acquired:
+                self.rebuild_status = {
+                    'status': "skipped",
+                    'error': "A similarity edge rebuild is running in another process",
+                    'finished_at': datetime.utcnow()
+                }
+                return
+            try:
+                await self._rebuild_locked(similarity_threshold, max_connections)
+            finally:
+                await lock.scalar(REBUILD_UNLOCK_SQL, {"key": REBUILD_LOCK_KEY})
+                await lock.commit()
+        finally:
+            await lock.close()
+
+    async def _rebuild_locked(self, similarity_threshold: float, max_connections: int):
+        self.rebuild_status = {
+            'status': "running",
+            'similarity_threshold': similarity_threshold,
+            'max_connections': max_connections,
+            'nodes_processed': 0,
+            'edges_created': 0,
+            'started_at': datetime.utcnow(),
+            'finished_at': None,
+            'error': None
+        }
+        logger.info(
+            f"Rebuilding similarity edges (threshold={similarity_threshold}, "
+            f"max_connections={max_connections})"
+        )
+
+        try:
+            after = None
+            while True:
+                async with database.SessionLocal() as db:
+                    page = (await db.execute(
+                        NODE_PAGE_SQL, {"after": after, "limit": self.batch_size}
+                    )).scalars().all()
+                    if not page:
+                        break
+
+                    await db.execute(CLEAR_EDGES_PENDING_SQL, {"node_ids": page})
+                    removed = await db.execute(DELETE_SIMILARITY_EDGES_SQL, {"node_ids": page})
+                    edges = await self.link_nodes(
+                        db, [str(node_id) for node_id in page], similarity_threshold, max_connections
+                    )
+                    await db.commit()
+
+                if self.stats is not None:
+                    self.stats.edges_removed(removed.rowcount)
+                    self.stats.edges_added(len(edges))
+
+                after = page[-1]
+                self.rebuild_status['nodes_processed'] += len(page)
+                self.rebuild_status['edges_created'] += len(edges)
+
+            # Removed edges cannot be written through; resync the caches
+            if self.gnn_processor is not None:
+                self.gnn_processor.reset_memory_edges()
+            if self.replica is not None and self.replica.loaded:
+                async with database.SessionLocal() as db:
+                    await self.replica.load(db)
+
+            self.rebuild_status['status'] = "completed"
+            logger.info(f"Similarity edge rebuild completed: {self.rebuild_status}")
+
+        except Exception as e:
+            logger.error(f"Error rebuilding similarity edges: {e}")
+            self.rebuild_status['status'] = "failed"
+            self.rebuild_status['error'] = str(e)
+        finally:
+            self.rebuild_status['finished_at'] = datetime.utcnow()
+
+    def get_metrics(self) -> Dict:
+        """Queue depth, throughput and rebuild status"""
+        return {
+            'pending_nodes': self.pending,
+            'batches': self.batches,
+            'nodes_linked': self.nodes_linked,
+            'edges_created': self.edges_created,
+            'failed_batches': self.failed_batches,
+            'recovered': self.recovered,
+            'rebuild': self.rebuild_status
+        }
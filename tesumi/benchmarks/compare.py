@@ -0,0 +1,52 @@
+"""
+Compare two benchmark suite results
+
+Usage (from the tesumi directory):
+    python -m benchmarks.compare baseline.json candidate.json [--threshold 10]
+
+Exits 1 when any stage's p95 latency regressed by more than --threshold percent.
+"""
+
+import argparse
+import json
+import sys
+
+METRICS = ("p50_ms", "p95_ms", "p99_ms", "throughput_per_s", "peak_rss_mb")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Allowed p95 regression in percent")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    print(f"baseline:  {baseline['meta']['git_revision'][:12]}  {baseline['meta']['timestamp']}")
+    print(f"candidate: {candidate['meta']['git_revision'][:12]}  {candidate['meta']['timestamp']}")
+    print(f"{'stage':<24}{'metric':<18}{'baseline':>12}{'candidate':>12}{'change':>10}")
+
+    regressions = []
+    for stage, before in baseline['stages'].items():
+        after = candidate['stages'].get(stage)
+        if after is None:
+            print(f"{stage:<24}(missing from candidate)")
+            continue
+        for metric in METRICS:
+            old, new = before[metric], after[metric]
+            change = (new - old) / old * 100 if old else 0.0
+            print(f"{stage:<24}{metric:<18}{old:>12.3f}{new:>12.3f}{change:>+9.1f}%")
+            if metric == "p95_ms" and change > args.threshold:
+                regressions.append(stage)
+
+    if regressions:
+        print(f"p95 regressions over {args.threshold}%: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
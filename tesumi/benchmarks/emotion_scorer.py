@@ -0,0 +1,116 @@
+"""
+Local emotion scorer vs. Claude on a held-out set
+
+Reports, per confidence threshold, the share of texts the local scorer
+would answer without a Claude call and its disagreement (mean absolute
+error) with the reference scores on that share.
+
+Usage (from the tesumi directory):
+    # Reference scores from the file (one {"content", "valence", "arousal"} per line)
+    python -m benchmarks.emotion_scorer --input heldout.ndjson
+
+    # Label unlabeled lines with Claude (CLAUDE_API_KEY) and keep the labels
+    python -m benchmarks.emotion_scorer --input texts.ndjson --save-labels heldout.ndjson
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+import numpy as np
+
+from app.services.claude_client import ClaudeClient
+from app.services.emotion_scorer import LexiconEmotionScorer
+
+THRESHOLDS = (0.0, 0.2, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9)
+
+
+def is_labeled(record) -> bool:
+    return record.get('valence') is not None and record.get('arousal') is not None
+
+
+async def label_with_claude(records, batch_size: int, attempts: int = 3):
+    """Label records without scores; entries Claude's reply leaves unparsed are retried"""
+    client = ClaudeClient()
+    if client.client is None:
+        raise SystemExit("Unlabeled lines need CLAUDE_API_KEY")
+    for attempt in range(attempts):
+        unlabeled = [record for record in records if not is_labeled(record)]
+        if not unlabeled:
+            return
+        for start in range(0, len(unlabeled), batch_size):
+            batch = unlabeled[start:start + batch_size]
+            emotions = await client._request_emotions_batch([record['content'] for record in batch])
+            if emotions is None:
+                raise SystemExit("Claude request failed")
+            for record, emotion in zip(batch, emotions):
+                if emotion is not None:
+                    record.update(emotion)
+            print(f"pass {attempt + 1}: labeled {min(start + batch_size, len(unlabeled))}/{len(unlabeled)}", flush=True)
+
+
+def format_mae(value) -> str:
+    return f"{value:>13.3f}" if value is not None else f"{'-':>13}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", required=True, help="NDJSON with content (+ valence/arousal)")
+    parser.add_argument("--save-labels", default=None, help="Write the labeled set here")
+    parser.add_argument("--batch-size", type=int, default=20, help="Texts per Claude labeling request")
+    parser.add_argument("--output", default=None, help="Write the report as JSON")
+    args = parser.parse_args()
+
+    with open(args.input, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    if not all(is_labeled(record) for record in records):
+        asyncio.run(label_with_claude(records, args.batch_size))
+    if args.save_labels:
+        with open(args.save_labels, "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    # Texts Claude never returned parsable scores for have no reference
+    unlabeled = sum(1 for record in records if not is_labeled(record))
+    records = [record for record in records if is_labeled(record)]
+
+    scorer = LexiconEmotionScorer()
+    texts = [record['content'] for record in records]
+    started = time.perf_counter()
+    local = scorer.score_many(texts)
+    elapsed = time.perf_counter() - started
+
+    confidence = np.array([scores['confidence'] for scores in local])
+    valence_error = np.abs([scores['valence'] - record['valence'] for scores, record in zip(local, records)])
+    arousal_error = np.abs([scores['arousal'] - record['arousal'] for scores, record in zip(local, records)])
+
+    report = {
+        'texts': len(records),
+        'unlabeled_texts': unlabeled,
+        'local_ms_per_text': elapsed / max(len(records), 1) * 1000.0,
+        'thresholds': []
+    }
+    print(f"{len(records)} texts ({unlabeled} unlabeled, skipped), local scorer {report['local_ms_per_text']:.3f} ms/text")
+    print(f"{'threshold':>10}{'avoided':>10}{'valence_mae':>13}{'arousal_mae':>13}")
+    for threshold in THRESHOLDS:
+        accepted = confidence >= threshold
+        row = {
+            'threshold': threshold,
+            'llm_avoided_share': float(accepted.mean()) if len(records) else 0.0,
+            'valence_mae': float(valence_error[accepted].mean()) if accepted.any() else None,
+            'arousal_mae': float(arousal_error[accepted].mean()) if accepted.any() else None
+        }
+        report['thresholds'].append(row)
+        print(
+            f"{threshold:>10.2f}{row['llm_avoided_share']:>10.1%}"
+            f"{format_mae(row['valence_mae'])}{format_mae(row['arousal_mae'])}"
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
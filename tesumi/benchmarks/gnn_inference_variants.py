@@ -0,0 +1,91 @@
+"""
+Parity and latency benchmark for GraphSAGEMemory inference variants
+
+Checks every variant against the eager model's outputs, then times a forward
+pass across graph sizes.
+
+Usage (from the tesumi directory):
+    python -m benchmarks.gnn_inference_variants --sizes 30 150 1000 5000
+"""
+
+import argparse
+import time
+
+import numpy as np
+import torch
+from torch_geometric.data import Data
+
+from app.core.config import settings
+from app.services.gnn_inference import INFERENCE_VARIANTS, build_inference_model
+from app.services.gnn_processor import GraphSAGEMemory
+
+# Max abs difference allowed against eager outputs, per variant
+TOLERANCES = {"eager": 0.0, "optimized": 1e-5, "compiled": 1e-4, "int8": 5e-2}
+
+
+def random_graph(num_nodes: int, avg_degree: int, generator: torch.Generator) -> Data:
+    num_edges = num_nodes * avg_degree // 2
+    x = torch.randn(num_nodes, settings.VECTOR_DIMENSION + 2, generator=generator)
+    edges = torch.randint(0, num_nodes, (2, num_edges), generator=generator)
+    edge_index = torch.cat([edges, edges.flip(0)], dim=1)
+    return Data(x=x, edge_index=edge_index)
+
+
+def run(model, data, states):
+    with torch.no_grad():
+        return model(data, states)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[30, 150, 1000, 5000])
+    parser.add_argument("--degree", type=int, default=6)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--variants", nargs="+", default=list(INFERENCE_VARIANTS))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    torch.manual_seed(args.seed)
+    generator = torch.Generator().manual_seed(args.seed)
+    device = torch.device("cpu")
+
+    model = GraphSAGEMemory(
+        input_dim=settings.VECTOR_DIMENSION,
+        hidden_dim=settings.GNN_HIDDEN_DIM,
+        num_layers=settings.GNN_NUM_LAYERS,
+        dropout=settings.GNN_DROPOUT
+    ).eval()
+    variants = {name: build_inference_model(model, name, device) for name in args.variants}
+
+    failures = 0
+    print(f"{'nodes':>7} " + " ".join(f"{name:>18}" for name in variants))
+    for size in args.sizes:
+        data = random_graph(size, args.degree, generator)
+        states = torch.randn(size, settings.GNN_HIDDEN_DIM, generator=generator)
+        reference = run(model, data, states)
+
+        cells = []
+        for name, variant in variants.items():
+            output = run(variant, data, states)
+            error = max(
+                (output[key] - reference[key]).abs().max().item()
+                for key in ("node_embeddings", "activation_scores", "emotion_predictions", "memory_states")
+            )
+            if error > TOLERANCES[name]:
+                failures += 1
+                print(f"PARITY FAIL {name} nodes={size}: max abs diff {error:.2e}")
+
+            timings = []
+            for _ in range(args.repeats):
+                start = time.perf_counter()
+                run(variant, data, states)
+                timings.append((time.perf_counter() - start) * 1000)
+            cells.append(f"{np.median(timings):8.3f}ms ({error:.0e})")
+        print(f"{size:>7} " + " ".join(f"{cell:>18}" for cell in cells))
+
+    print("parity: " + ("OK" if failures == 0 else f"{failures} failures"))
+    raise SystemExit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""
+Benchmark suite for the Tesumi memory activation path
+
+Stages: graph build, GNN forward, activate_memories, external-memory
+read/write, replica subgraph fetch and end-to-end search. End-to-end
+search runs against an in-memory stand-in of the memory tables by default,
+or against a local Postgres (seeded with the synthetic graph, then cleaned
+up) when --database-url is given. Results are written as JSON for comparison
+between commits (see benchmarks/compare.py).
+
+Usage (from the tesumi directory):
+    python -m benchmarks.suite --nodes 10000 --degree 8 --output bench.json
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import resource
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime
+from typing import Callable, Dict, List
+
+import numpy as np
+import torch
+
+from app.core.config import settings
+from app.services.activation_batcher import ActivationBatcher
+from app.services.gnn_processor import ExternalMemory, GNNProcessor
+from app.services.inference_executor import InferenceExecutor
+from app.services.memory_replica import MemoryGraphReplica
+from benchmarks.synthetic import SyntheticMemoryGraph
+
+
+def peak_rss_mb() -> float:
+    """Process high-water mark RSS (ru_maxrss is KiB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def summarize(durations: List[float], wall_seconds: float) -> Dict:
+    latencies = np.array(durations) * 1000
+    return {
+        'count': len(durations),
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p95_ms': float(np.percentile(latencies, 95)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+        'mean_ms': float(latencies.mean()),
+        'throughput_per_s': len(durations) / wall_seconds if wall_seconds > 0 else 0.0,
+        'peak_rss_mb': peak_rss_mb()
+    }
+
+
+def time_each(items: List, fn: Callable) -> Dict:
+    durations = []
+    wall_start = time.perf_counter()
+    for item in items:
+        start = time.perf_counter()
+        fn(item)
+        durations.append(time.perf_counter() - start)
+    return summarize(durations, time.perf_counter() - wall_start)
+
+
+async def time_concurrent(items: List, fn: Callable, concurrency: int) -> Dict:
+    durations = []
+    queue = list(items)
+
+    async def worker():
+        while queue:
+            item = queue.pop()
+            start = time.perf_counter()
+            await fn(item)
+            durations.append(time.perf_counter() - start)
+
+    wall_start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(durations, time.perf_counter() - wall_start)
+
+
+async def in_memory_search(graph: SyntheticMemoryGraph, gnn: GNNProcessor, queries: np.ndarray, args) -> Dict:
+    """search_memories against the in-memory stand-in (no text encoder)"""
+    executor = InferenceExecutor(
+        max_workers=settings.INFERENCE_WORKERS,
+        max_queue_depth=max(settings.INFERENCE_MAX_QUEUE_DEPTH, args.concurrency * 2),
+        torch_threads=settings.TORCH_NUM_THREADS
+    )
+    batcher = ActivationBatcher(
+        gnn, executor,
+        max_batch_size=settings.GNN_BATCH_MAX_SIZE,
+        max_wait_ms=settings.GNN_BATCH_MAX_WAIT_MS
+    )
+    if settings.GNN_BATCHING_ENABLED:
+        batcher.start()
+
+    async def search(query: np.ndarray):
+        nodes, edges = await executor.run("candidates", graph.subgraph, query, args.limit * 3)
+        return await batcher.activate(nodes, edges, query, args.limit)
+
+    try:
+        result = await time_concurrent(list(queries), search, args.concurrency)
+    finally:
+        await batcher.stop()
+        executor.shutdown()
+    result['concurrency'] = args.concurrency
+    result['batching'] = batcher.get_metrics()
+    result['executor'] = executor.get_metrics()
+    return result
+
+
+async def postgres_search(graph: SyntheticMemoryGraph, args) -> Dict:
+    """MemoryManager.search_memories against a local Postgres seeded with the graph"""
+    from sqlalchemy import delete, insert, or_
+
+    from app.core import database
+    from app.models.memory import MemoryEdge, MemoryNode
+    from app.services.memory_manager import MemoryManager
+
+    settings.DATABASE_URL = args.database_url
+    await database.init_db()
+    node_ids = [uuid.UUID(node_id) for node_id in graph.ids]
+    manager = MemoryManager()
+    await manager.start()
+
+    try:
+        async with database.SessionLocal() as db:
+            for start in range(0, graph.num_nodes, 1000):
+                rows = [graph.node(i) for i in range(start, min(start + 1000, graph.num_nodes))]
+                await db.execute(insert(MemoryNode), [{**row, 'id': uuid.UUID(row['id'])} for row in rows])
+            edges = [
+                {**edge, 'id': uuid.UUID(edge['id']),
+                 'source_id': uuid.UUID(edge['source_id']), 'target_id': uuid.UUID(edge['target_id'])}
+                for edge in (graph.edge(i) for i in range(len(graph.edges)))
+            ]
+            for start in range(0, len(edges), 5000):
+                await db.execute(insert(MemoryEdge), edges[start:start + 5000])
+            await db.commit()
+
+        queries = [f"synthetic memory {i}" for i in np.random.default_rng(args.seed).integers(0, graph.num_nodes, args.queries)]
+
+        async def search(query: str):
+            async with database.SessionLocal() as db:
+                await manager.search_memories(db=db, query=query, limit=args.limit)
+
+        result = await time_concurrent(queries, search, args.concurrency)
+        result['concurrency'] = args.concurrency
+        return result
+
+    finally:
+        await manager.shutdown()
+        async with database.SessionLocal() as db:
+            for start in range(0, len(node_ids), 1000):
+                chunk = node_ids[start:start + 1000]
+                await db.execute(delete(MemoryEdge).where(or_(
+                    MemoryEdge.source_id.in_(chunk), MemoryEdge.target_id.in_(chunk)
+                )))
+                await db.execute(delete(MemoryNode).where(MemoryNode.id.in_(chunk)))
+            await db.commit()
+        await database.close_db()
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, default=10000)
+    parser.add_argument("--degree", type=int, default=8, help="Average node degree")
+    parser.add_argument("--dim", type=int, default=settings.VECTOR_DIMENSION)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=10, help="search_memories limit (candidates = 3x)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent end-to-end searches")
+    parser.add_argument("--database-url", default=None, help="Run end-to-end search against this Postgres")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark_results.json")
+    args = parser.parse_args()
+
+    torch.manual_seed(args.seed)
+    results: Dict[str, Dict] = {}
+
+    start = time.perf_counter()
+    graph = SyntheticMemoryGraph(args.nodes, args.degree, args.dim, seed=args.seed)
+    print(f"generated {graph.num_nodes} nodes / {len(graph.edges)} edges in {time.perf_counter() - start:.1f}s")
+    queries = graph.query_vectors(args.queries)
+    subgraphs = [graph.subgraph(query, args.limit * 3) for query in queries]
+
+    gnn = GNNProcessor()
+
+    results['graph_build'] = time_each(subgraphs, lambda subgraph: gnn.create_graph_data(*subgraph))
+
+    graphs = [gnn.create_graph_data(*subgraph) for subgraph in subgraphs]
+    states = [torch.randn(g.num_nodes, settings.GNN_HIDDEN_DIM) for g in graphs]
+
+    def forward(index):
+        with torch.no_grad():
+            gnn.inference_model(graphs[index], states[index])
+
+    results['forward'] = time_each(list(range(len(graphs))), forward)
+    results['activate_memories'] = time_each(
+        list(zip(subgraphs, queries)),
+        lambda item: gnn.activate_memories(item[0][0], item[0][1], item[1], args.limit)
+    )
+
+    external_memory = ExternalMemory(memory_size=graph.num_nodes, key_dim=args.dim)
+    results['external_memory_write'] = time_each(list(graph.embeddings), lambda key: external_memory.write(key, key))
+    results['external_memory_read'] = time_each(list(queries), lambda query: external_memory.read(query, k=3))
+
+    replica = MemoryGraphReplica(dim=args.dim, hidden_dim=settings.GNN_HIDDEN_DIM)
+    replica.add_nodes([graph.node(i) for i in range(graph.num_nodes)])
+    replica.add_edges([graph.edge(i) for i in range(len(graph.edges))])
+    results['replica_subgraph'] = time_each(
+        list(queries), lambda query: replica.fetch_candidate_subgraph(query, args.limit * 3)
+    )
+
+    if args.database_url:
+        results['search_e2e_postgres'] = asyncio.run(postgres_search(graph, args))
+    else:
+        results['search_e2e_in_memory'] = asyncio.run(in_memory_search(graph, gnn, queries, args))
+
+    report = {
+        'meta': {
+            'git_revision': git_revision(),
+            'timestamp': datetime.utcnow().isoformat(),
+            'python': platform.python_version(),
+            'torch': torch.__version__,
+            'torch_threads': torch.get_num_threads(),
+            'inference_variant': settings.GNN_INFERENCE_VARIANT,
+            'incremental_inference': settings.GNN_INCREMENTAL_INFERENCE,
+            'params': vars(args)
+        },
+        'stages': results
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2, default=str)
+
+    print(f"{'stage':<24}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'ops/s':>12}{'peak MB':>10}")
+    for stage, stats in results.items():
+        print(f"{stage:<24}{stats['p50_ms']:>10.3f}{stats['p95_ms']:>10.3f}{stats['p99_ms']:>10.3f}"
+              f"{stats['throughput_per_s']:>12.1f}{stats['peak_rss_mb']:>10.1f}")
+    print(f"results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
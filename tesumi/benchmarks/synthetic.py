@@ -0,0 +1,113 @@
+"""
+Synthetic memory-graph generator for benchmarks
+Clustered 384-d embeddings with similarity edges of a configurable average degree
+"""
+
+import uuid
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+
+def clustered_vectors(rng: np.random.Generator, n: int, dim: int, clusters: int) -> np.ndarray:
+    """Synthetic embeddings drawn around a set of topic centres"""
+    centres = rng.standard_normal((clusters, dim))
+    labels = rng.integers(0, clusters, n)
+    return (centres[labels] + 0.6 * rng.standard_normal((n, dim))).astype(np.float32)
+
+
+class SyntheticMemoryGraph:
+    """
+    In-memory stand-in for the memory_nodes / memory_edges tables
+
+    Nodes carry clustered embeddings and random valence/arousal; each node is
+    linked to random members of its nearest neighbours until the requested
+    average degree is reached, mirroring similarity-edge creation.
+    """
+
+    def __init__(
+        self,
+        num_nodes: int = 10000,
+        avg_degree: int = 8,
+        dim: int = 384,
+        clusters: int = 200,
+        seed: int = 0
+    ):
+        self.rng = np.random.default_rng(seed)
+        self.dim = dim
+        self.clusters = clusters
+
+        self.embeddings = clustered_vectors(self.rng, num_nodes, dim, clusters)
+        self.normalized = self.embeddings / np.linalg.norm(self.embeddings, axis=1, keepdims=True)
+        self.ids = [str(uuid.UUID(int=int(self.rng.integers(1, 2**62)) << 64 | i)) for i in range(num_nodes)]
+        self.valence = self.rng.uniform(-1, 1, num_nodes).astype(np.float32)
+        self.arousal = self.rng.uniform(-1, 1, num_nodes).astype(np.float32)
+        self.created_at = datetime.utcnow()
+        self._edge_prefix = int(self.rng.integers(1, 2**62))
+
+        self.edges = self._build_edges(avg_degree)
+        self.adjacency: List[List[int]] = [[] for _ in range(num_nodes)]
+        for edge_index, (source, target, _) in enumerate(self.edges):
+            self.adjacency[source].append(edge_index)
+            self.adjacency[target].append(edge_index)
+
+    def _build_edges(self, avg_degree: int) -> List[Tuple[int, int, float]]:
+        num_nodes = len(self.ids)
+        edges_per_node = max(1, avg_degree // 2)
+        edges = []
+        block = 1024
+        for start in range(0, num_nodes, block):
+            similarities = self.normalized[start:start + block] @ self.normalized.T
+            for offset, row in enumerate(similarities):
+                node = start + offset
+                row[node] = -np.inf
+                neighbours = np.argpartition(-row, edges_per_node)[:edges_per_node]
+                edges.extend((node, int(n), float(row[n])) for n in neighbours)
+        return edges
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.ids)
+
+    def node(self, index: int) -> Dict:
+        return {
+            'id': self.ids[index],
+            'content': f"synthetic memory {index}",
+            'memory_type': "episodic",
+            'category': "benchmark",
+            'valence': float(self.valence[index]),
+            'arousal': float(self.arousal[index]),
+            'activation_strength': 1.0,
+            'access_count': 0,
+            'created_at': self.created_at,
+            'last_accessed': self.created_at,
+            'embedding': self.embeddings[index].tolist()
+        }
+
+    def edge(self, edge_index: int) -> Dict:
+        source, target, weight = self.edges[edge_index]
+        return {
+            'id': str(uuid.UUID(int=self._edge_prefix << 64 | edge_index)),
+            'source_id': self.ids[source],
+            'target_id': self.ids[target],
+            'edge_type': "similarity",
+            'weight': weight
+        }
+
+    def query_vectors(self, n: int) -> np.ndarray:
+        """Queries drawn from the same topic distribution as the nodes"""
+        picks = self.embeddings[self.rng.integers(0, self.num_nodes, n)]
+        return (picks + 0.3 * self.rng.standard_normal(picks.shape)).astype(np.float32)
+
+    def candidates(self, query: np.ndarray, limit: int) -> List[int]:
+        """Exact cosine top-`limit` nodes (the pgvector candidate query)"""
+        scores = self.normalized @ (query / (np.linalg.norm(query) + 1e-8))
+        top = np.argpartition(-scores, limit)[:limit]
+        return top[np.argsort(-scores[top])].tolist()
+
+    def subgraph(self, query: np.ndarray, limit: int) -> Tuple[List[Dict], List[Dict]]:
+        """Candidate nodes and every edge touching them, as search_memories builds them"""
+        candidate_rows = self.candidates(query, limit)
+        edge_indices = sorted({e for row in candidate_rows for e in self.adjacency[row]})
+        return [self.node(row) for row in candidate_rows], [self.edge(e) for e in edge_indices]
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Bulk memory ingestion CLI
+Imports an NDJSON file of memory records straight into the database
+(same pipeline as POST /api/memory/nodes/bulk)
+
+Usage:
+    python bulk_ingest.py memories.ndjson
+    python bulk_ingest.py memories.ndjson --job-id <id>   # resume
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+import uuid
+
+from sentence_transformers import SentenceTransformer
+
+from app.core.config import settings
+from app.core.database import init_db, close_db
+from app.services.bulk_ingest import BulkIngestor, read_ndjson_file
+from app.services.embedding_cache import EmbeddingCache
+from app.services.embedding_service import EmbeddingService
+from app.services.inference_executor import InferenceExecutor
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+
+def print_progress(status: dict):
+    rate = status['lines_done'] / status['elapsed_seconds'] if status.get('elapsed_seconds') else 0.0
+    print(
+        f"[{status['job_id']}] lines {status['lines_done']}  nodes +{status['nodes_inserted']}  "
+        f"edges +{status['edges_inserted']}  failed {status['failed_lines']}  ({rate:.0f} lines/s)",
+        flush=True
+    )
+
+
+async def main(args) -> int:
+    await init_db()
+    executor = InferenceExecutor(max_workers=1, torch_threads=settings.TORCH_NUM_THREADS)
+    embedding_service = EmbeddingService(
+        SentenceTransformer(settings.EMBEDDING_MODEL),
+        executor,
+        cache=EmbeddingCache(
+            settings.EMBEDDING_MODEL,
+            settings.VECTOR_DIMENSION,
+            capacity=settings.EMBEDDING_CACHE_SIZE,
+            path=settings.EMBEDDING_CACHE_PATH,
+            disk_max_entries=settings.EMBEDDING_CACHE_DISK_MAX_ENTRIES
+        )
+    )
+    ingestor = BulkIngestor(embedding_service, executor, batch_size=args.batch_size)
+
+    job_id = args.job_id or str(uuid.uuid4())
+    print(f"Job {job_id} (resume with --job-id {job_id})", flush=True)
+    try:
+        status = await ingestor.run(read_ndjson_file(args.path), job_id=job_id, progress=print_progress)
+        print(f"Completed: {status['nodes_inserted']} nodes, {status['edges_inserted']} edges, "
+              f"{status['failed_lines']} failed lines")
+        return 0
+    except Exception as e:
+        logger.error(f"Ingestion failed: {e}")
+        return 1
+    finally:
+        executor.shutdown()
+        embedding_service.close()
+        await close_db()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk-import NDJSON memory records")
+    parser.add_argument("path", help="NDJSON file, one memory record per line")
+    parser.add_argument("--job-id", default=None, help="Resume this ingestion job")
+    parser.add_argument("--batch-size", type=int, default=settings.BULK_INGEST_BATCH_SIZE)
+    sys.exit(asyncio.run(main(parser.parse_args())))
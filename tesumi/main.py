@@ -16,7 +16,6 @@ from app.core.database import init_db, close_db
 from app.api.routes import memory, conversation, report
 from app.services.memory_manager import MemoryManager
 from app.services.claude_client import ClaudeClient
-from app.services.gnn_processor import GNNProcessor
 
 # Configure logging
 logging.basicConfig(
@@ -37,14 +36,16 @@ async def lifespan(app: FastAPI):
     # Initialize core services
     app.state.memory_manager = MemoryManager()
     app.state.claude_client = ClaudeClient()
-    app.state.gnn_processor = GNNProcessor()
+    await app.state.memory_manager.start()
     
     logger.info("Tesumi System v2.0 started successfully")
     
     yield
     
-    # Cleanup
+    # Cleanup: flush write-behind state (access counters, GRU states, queued
+    # turns and edges) while the database is still open
     logger.info("Shutting down Tesumi System v2.0...")
+    await app.state.memory_manager.shutdown()
     await close_db()
 
 
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Vector index maintenance CLI
+Rebuilds the pgvector index on memory_nodes.embedding concurrently (reads
+and writes continue during the build), e.g. once the table has grown or
+after VECTOR_INDEX_* settings change
+
+Usage:
+    python rebuild_vector_index.py --status
+    python rebuild_vector_index.py                       # VECTOR_INDEX_TYPE
+    python rebuild_vector_index.py --type ivfflat --lists 200
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+
+from app.core import database
+from app.core.database import init_db, close_db
+from app.core.vector_index import rebuild_vector_index, vector_index_status
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+
+async def main(args) -> int:
+    await init_db()
+    try:
+        if not args.status:
+            result = await rebuild_vector_index(database.engine, index_type=args.type, lists=args.lists)
+            print(json.dumps(result, indent=2))
+        print(json.dumps(await vector_index_status(database.engine), indent=2))
+        return 0
+    except Exception as e:
+        logger.error(f"Vector index maintenance failed: {e}")
+        return 1
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild the memory embedding index")
+    parser.add_argument("--status", action="store_true", help="Only show the current index")
+    parser.add_argument("--type", choices=("hnsw", "ivfflat"), default=None)
+    parser.add_argument("--lists", type=int, default=None, help="IVFFlat lists (default: derived from rows)")
+    sys.exit(asyncio.run(main(parser.parse_args())))
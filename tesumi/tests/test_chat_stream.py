@@ -0,0 +1,145 @@
+"""/chat/stream against a fake streaming Messages API"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+
+from app.api.routes import conversation
+from app.services.claude_client import ClaudeClient
+
+MEMORIES = [{'id': "m1", 'content': "海に行った", 'valence': 0.6, 'arousal': 0.4}]
+
+
+class FakeStream:
+    """Async iterator of Messages API stream events; raises `error` after `fail_after` chunks"""
+
+    def __init__(self, chunks, fail_after=None):
+        self.chunks = chunks
+        self.fail_after = fail_after
+
+    async def __aiter__(self):
+        yield SimpleNamespace(type="message_start")
+        for i, chunk in enumerate(self.chunks):
+            if i == self.fail_after:
+                raise RuntimeError("connection reset")
+            yield SimpleNamespace(type="content_block_delta", delta=SimpleNamespace(text=chunk))
+        yield SimpleNamespace(type="message_stop")
+
+
+class FakeMessages:
+    def __init__(self, stream):
+        self.stream = stream
+        self.calls = []
+
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+        return self.stream
+
+
+class FakeRecorder:
+    def __init__(self):
+        self.turns = []
+
+    async def record(self, **turn):
+        self.turns.append(turn)
+
+
+class FakeMemoryManager:
+    def __init__(self):
+        self.conversation_recorder = FakeRecorder()
+
+    async def retrieve_chat_context(self, **kwargs):
+        return MEMORIES, []
+
+
+def make_app(stream):
+    app = FastAPI()
+    app.include_router(conversation.router, prefix="/api/conversation")
+    app.state.memory_manager = FakeMemoryManager()
+    claude_client = ClaudeClient()
+    claude_client.client = SimpleNamespace(messages=FakeMessages(stream))
+    app.state.claude_client = claude_client
+    return app
+
+
+def post_stream(app, body):
+    """
+    POST to /chat/stream through the ASGI app
+
+    Returns:
+        (event, data, turns recorded when the event was sent) per SSE event
+    """
+    recorder = app.state.memory_manager.conversation_recorder
+    received = []
+    request_sent = False
+
+    async def receive():
+        nonlocal request_sent
+        if request_sent:
+            await asyncio.sleep(3600)
+            return {'type': "http.disconnect"}
+        request_sent = True
+        return {'type': "http.request", 'body': json.dumps(body).encode(), 'more_body': False}
+
+    async def send(message):
+        if message['type'] == "http.response.body" and message.get('body'):
+            received.append((message['body'].decode(), len(recorder.turns)))
+
+    scope = {
+        'type': "http",
+        'asgi': {'version': "3.0"},
+        'http_version': "1.1",
+        'method': "POST",
+        'scheme': "http",
+        'path': "/api/conversation/chat/stream",
+        'raw_path': b"/api/conversation/chat/stream",
+        'root_path': "",
+        'query_string': b"",
+        'headers': [(b"content-type", b"application/json")],
+        'server': ("testserver", 80),
+        'client': ("testclient", 50000)
+    }
+    asyncio.run(app(scope, receive, send))
+
+    events = []
+    for chunk, recorded in received:
+        for block in chunk.split("\n\n"):
+            if not block.strip():
+                continue
+            lines = dict(line.split(": ", 1) for line in block.splitlines())
+            events.append((lines['event'], json.loads(lines['data']), recorded))
+    return events
+
+
+def test_stream_events_in_order_and_turn_recorded_before_done():
+    app = make_app(FakeStream(["こんに", "ちは", "！"]))
+    events = post_stream(app, {'message': "やあ", 'session_id': "s1"})
+
+    names = [name for name, _, _ in events]
+    assert names == ["memories", "token", "token", "token", "done"]
+    assert events[0][1] == {'session_id': "s1", 'activated_memories': ["m1"]}
+    assert "".join(data['text'] for name, data, _ in events if name == "token") == "こんにちは！"
+
+    turns = app.state.memory_manager.conversation_recorder.turns
+    assert turns == [{
+        'session_id': "s1",
+        'user_input': "やあ",
+        'system_response': "こんにちは！",
+        'activated_memories': ["m1"]
+    }]
+    # Stored before `done` went out, not after
+    assert events[-1][2] == 1
+    assert all(recorded == 0 for name, _, recorded in events if name != "done")
+    assert app.state.claude_client.client.messages.calls[0]['stream'] is True
+
+
+def test_stream_error_midway_sends_error_and_records_nothing():
+    app = make_app(FakeStream(["こんに", "ちは", "！"], fail_after=2))
+    events = post_stream(app, {'message': "やあ", 'session_id': "s1"})
+
+    names = [name for name, _, _ in events]
+    assert names == ["memories", "token", "token", "error"]
+    assert "detail" in events[-1][1]
+    assert app.state.memory_manager.conversation_recorder.turns == []
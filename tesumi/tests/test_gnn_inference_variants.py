@@ -0,0 +1,41 @@
+"""Parity of the GraphSAGEMemory inference variants with the eager model"""
+
+import pytest
+import torch
+
+from app.core.config import settings
+from app.services.gnn_inference import build_inference_model
+from app.services.gnn_processor import GraphSAGEMemory
+from benchmarks.gnn_inference_variants import TOLERANCES, random_graph
+
+OUTPUT_KEYS = ("node_embeddings", "activation_scores", "emotion_predictions", "memory_states")
+
+
+@pytest.fixture(scope="module")
+def model():
+    torch.manual_seed(0)
+    return GraphSAGEMemory(
+        input_dim=settings.VECTOR_DIMENSION,
+        hidden_dim=settings.GNN_HIDDEN_DIM,
+        num_layers=settings.GNN_NUM_LAYERS,
+        dropout=settings.GNN_DROPOUT
+    ).eval()
+
+
+@pytest.mark.parametrize("num_nodes", [1, 30, 500])
+@pytest.mark.parametrize("variant", ["eager", "optimized", "int8"])
+@pytest.mark.parametrize("with_states", [True, False])
+def test_variant_matches_eager(model, variant, num_nodes, with_states):
+    generator = torch.Generator().manual_seed(num_nodes)
+    data = random_graph(num_nodes, 6, generator)
+    states = torch.randn(num_nodes, settings.GNN_HIDDEN_DIM, generator=generator) if with_states else None
+    inference_model = build_inference_model(model, variant, torch.device("cpu"))
+
+    with torch.no_grad():
+        reference = model(data, states)
+        output = inference_model(data, states)
+
+    for key in OUTPUT_KEYS:
+        assert output[key].shape == reference[key].shape
+        error = (output[key] - reference[key]).abs().max().item()
+        assert error <= TOLERANCES[variant], f"{variant} {key}: max abs diff {error:.2e}"
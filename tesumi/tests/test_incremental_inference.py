@@ -0,0 +1,82 @@
+"""Incremental inference matches a from-scratch pass over the same known graph"""
+
+import numpy as np
+import pytest
+import torch
+
+from app.core.config import settings
+from app.services.gnn_processor import GNNProcessor
+from app.services.incremental_inference import IncrementalInference
+
+TOLERANCE = 1e-5
+
+
+@pytest.fixture
+def processor():
+    torch.manual_seed(0)
+    processor = GNNProcessor()
+    processor.model.eval()
+    processor.incremental = IncrementalInference(processor.model)
+    return processor
+
+
+def full_recompute(incremental: IncrementalInference, node_ids):
+    """Every layer over the whole known graph, no cache"""
+    known = list(incremental.features)
+    rows = {node_id: i for i, node_id in enumerate(known)}
+    edges = [
+        (rows[source_id], rows[target_id])
+        for source_id, neighbors in incremental.neighbors.items() if source_id in rows
+        for target_id in neighbors if target_id in rows
+    ]
+    x = torch.stack([incremental.features[node_id] for node_id in known])
+    edge_index = torch.tensor(edges, dtype=torch.long).t().reshape(2, -1)
+    with torch.no_grad():
+        for layer_index in range(incremental.num_layers):
+            x = incremental.model.conv_layer(layer_index, x, edge_index)
+    return x[[rows[node_id] for node_id in node_ids]]
+
+
+def assert_matches_full(processor, node_ids):
+    incremental = processor.incremental
+    with torch.no_grad():
+        output = incremental.encode(node_ids)
+    error = (output - full_recompute(incremental, node_ids)).abs().max().item()
+    assert error <= TOLERANCE, f"max abs diff {error:.2e}"
+
+
+def observe_subgraph(processor, generator, num_nodes=12, num_edges=20):
+    node_ids = [f"n{i}" for i in range(num_nodes)]
+    features = torch.randn(num_nodes, settings.VECTOR_DIMENSION + 2, generator=generator)
+    pairs = torch.randint(0, num_nodes, (num_edges, 2), generator=generator).tolist()
+    processor.incremental.observe(node_ids, features, [(node_ids[s], node_ids[t]) for s, t in pairs])
+    return node_ids
+
+
+def test_new_node_and_edges_match_full_recompute(processor):
+    generator = torch.Generator().manual_seed(1)
+    node_ids = observe_subgraph(processor, generator)
+    assert_matches_full(processor, node_ids)
+    computed = processor.incremental.rows_computed
+
+    embedding = np.random.default_rng(2).standard_normal(settings.VECTOR_DIMENSION).astype(np.float32)
+    processor.register_memory_node("new", embedding, 0.5, -0.2)
+    processor.register_memory_edges([("new", "n0"), ("n3", "n7")])
+
+    node_ids = node_ids + ["new"]
+    assert_matches_full(processor, node_ids)
+    # Only the invalidated neighbourhood was recomputed
+    assert processor.incremental.rows_computed - computed < len(node_ids) * processor.incremental.num_layers
+    assert processor.incremental.rows_reused > 0
+
+
+def test_changed_feature_matches_full_recompute(processor):
+    generator = torch.Generator().manual_seed(3)
+    node_ids = observe_subgraph(processor, generator)
+    assert_matches_full(processor, node_ids)
+
+    features = torch.stack([processor.incremental.features[node_id] for node_id in node_ids[:3]])
+    features[1] += 1.0
+    processor.incremental.observe(node_ids[:3], features, [(node_ids[1], node_ids[-1])])
+
+    assert_matches_full(processor, node_ids)